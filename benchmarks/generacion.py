@@ -0,0 +1,64 @@
+"""Benchmark de throughput de Mapa.generar_estructura (habitaciones/segundo).
+
+Cada tamaño se mide con varias semillas y se informa la mediana: el crecimiento
+aleatorio a veces se corta a las pocas habitaciones (p. ej. 100x100 con la
+semilla 42 crea 2), y una sola semilla no representa al generador.
+
+Uso:
+    python benchmarks/generacion.py
+    python benchmarks/generacion.py --tamanos 100x100:5000 2000x2000:1000000 --repeticiones 3 --semillas 1 2 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dungeon_generator.mapa import Mapa
+
+TAMANOS_POR_DEFECTO = ["10x10:30", "100x100:5000", "1000x1000:500000", "2000x2000:1000000"]
+SEMILLAS_POR_DEFECTO = list(range(42, 49))
+
+
+def medir(ancho: int, alto: int, n_habitaciones: int, compacto: bool, semilla: int = 42) -> tuple[int, float]:
+    """Genera un mapa y devuelve (habitaciones creadas, segundos)."""
+    inicio = time.perf_counter()
+    mapa = Mapa(ancho, alto, compacto=compacto, semilla=semilla)
+    mapa.generar_estructura(n_habitaciones)
+    return len(mapa.habitaciones), time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", nargs="+", default=TAMANOS_POR_DEFECTO, help="ANCHOxALTO:HABITACIONES")
+    parser.add_argument("--repeticiones", type=int, default=1, help="Corridas por semilla (se toma la más rápida)")
+    parser.add_argument("--semillas", nargs="+", type=int, default=SEMILLAS_POR_DEFECTO,
+                        help="Semillas a medir (se informa la mediana)")
+    parser.add_argument("--solo-compacto", action="store_true", help="Omite el almacenamiento por diccionario")
+    args = parser.parse_args()
+
+    print(f"{'tamaño':>20} {'modo':>8} {'habitaciones':>13} {'segundos':>9} {'hab/s':>11} {'cortadas':>9}")
+    for tamano in args.tamanos:
+        dimensiones, n_habitaciones = tamano.split(":")
+        ancho, alto = (int(v) for v in dimensiones.split("x"))
+        for compacto in ((True,) if args.solo_compacto else (False, True)):
+            resultados = []
+            for semilla in args.semillas:
+                resultados.append(min(
+                    (medir(ancho, alto, int(n_habitaciones), compacto, semilla) for _ in range(args.repeticiones)),
+                    key=lambda r: r[1],
+                ))
+            creadas = statistics.median(r[0] for r in resultados)
+            segundos = statistics.median(r[1] for r in resultados)
+            por_segundo = statistics.median(r[0] / r[1] for r in resultados)
+            # Semillas cuyo crecimiento se cortó antes de la mitad de lo pedido
+            cortadas = sum(1 for r in resultados if r[0] < int(n_habitaciones) / 2)
+            modo = "compacto" if compacto else "dict"
+            print(f"{tamano:>20} {modo:>8} {creadas:>13.0f} {segundos:>9.3f} {por_segundo:>11.0f} "
+                  f"{cortadas:>4}/{len(resultados)}")
+
+
+if __name__ == "__main__":
+    main()
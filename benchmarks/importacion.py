@@ -0,0 +1,88 @@
+"""Tiempo de importación de los módulos del núcleo, con presupuesto.
+
+Cada módulo se importa en un intérprete nuevo con -X importtime (se toma el
+acumulado del propio módulo, sin el arranque de Python) y se queda el mejor de
+--repeticiones. Además se comprueba que el núcleo no cargue rich ni yaml: solo
+la presentación (main.py, visualizador) y las rutas YAML pueden hacerlo.
+
+Sale con código 1 si algún módulo supera su presupuesto o carga un módulo prohibido.
+
+Uso:
+    python benchmarks/importacion.py
+    python benchmarks/importacion.py --repeticiones 10 --escala 1.5   # máquinas lentas
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulo -> presupuesto en milisegundos (mejor de varias corridas, .pyc ya compilados). Hay margen
+# para el ruido de la máquina: lo que se busca atrapar es una dependencia pesada nueva (rich sola
+# suma unos 20 ms); la comprobación de módulos prohibidos es exacta
+PRESUPUESTOS: Dict[str, float] = {
+    "dungeon_generator.mapa": 30.0,
+    "dungeon_generator.explorador": 30.0,
+    "dungeon_generator.simulacion": 35.0,
+    "dungeon_generator.lote": 40.0,
+    "dungeon_generator.serializacion": 40.0,
+    "dungeon_generator.cache": 40.0,
+}
+PROHIBIDOS = ("rich", "yaml")
+
+_SONDA = "import sys, {modulo}; print(','.join(m for m in {prohibidos!r} if m in sys.modules))"
+
+
+def medir(modulo: str) -> Tuple[float, List[str]]:
+    """(milisegundos de importación, módulos prohibidos cargados) en un intérprete nuevo."""
+    entorno = dict(os.environ, PYTHONPATH=RAIZ)
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SONDA.format(modulo=modulo, prohibidos=PROHIBIDOS)],
+        capture_output=True, text=True, env=entorno, check=True)
+    microsegundos = None
+    for linea in proceso.stderr.splitlines():
+        # "import time: propio | acumulado | nombre"; la sangría del nombre marca la profundidad
+        partes = linea.split("|")
+        if len(partes) == 3 and partes[2].strip() == modulo and not partes[2][1:].startswith(" "):
+            microsegundos = int(partes[1])
+    if microsegundos is None:
+        raise RuntimeError(f"No se encontró {modulo} en la salida de -X importtime")
+    cargados = [m for m in proceso.stdout.strip().split(",") if m]
+    return microsegundos / 1000, cargados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica todos los presupuestos")
+    args = parser.parse_args()
+
+    # Con los .pyc al día no se mide la compilación
+    subprocess.run([sys.executable, "-m", "compileall", "-q", os.path.join(RAIZ, "dungeon_generator")], check=True)
+
+    fallas = []
+    print(f"{'módulo':<34} {'ms':>7} {'presupuesto':>11}")
+    for modulo, presupuesto in PRESUPUESTOS.items():
+        mediciones = [medir(modulo) for _ in range(args.repeticiones)]
+        ms = min(m[0] for m in mediciones)
+        cargados = sorted({c for _, lista in mediciones for c in lista})
+        limite = presupuesto * args.escala
+        marcas = []
+        if ms > limite:
+            marcas.append("excede el presupuesto")
+        if cargados:
+            marcas.append(f"carga {', '.join(cargados)}")
+        print(f"{modulo:<34} {ms:>7.1f} {limite:>11.1f}" + (f"  <- {'; '.join(marcas)}" if marcas else ""))
+        if marcas:
+            fallas.append(modulo)
+
+    if fallas:
+        print(f"\n{len(fallas)} módulos fuera de presupuesto.")
+        sys.exit(1)
+    print("\nTodo dentro del presupuesto.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Informe de memoria: bytes por habitación según el modelo de datos.
+
+Mide con tracemalloc lo que queda asignado tras generar un mapa (estructura y
+contenido), dividido por la cantidad de habitaciones.
+
+Uso:
+    python benchmarks/memoria.py
+    python benchmarks/memoria.py --tamano 1000x1000:300000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dungeon_generator.mapa import Mapa
+
+
+def medir(ancho: int, alto: int, n_habitaciones: int, compacto: bool, semilla: int = 1) -> tuple[int, float, float]:
+    """Devuelve (habitaciones, bytes/hab. de la estructura, bytes/hab. con contenido)."""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    mapa = Mapa(ancho, alto, compacto=compacto, semilla=semilla)
+    mapa.generar_estructura(n_habitaciones)
+    estructura = tracemalloc.get_traced_memory()[0] - base
+    mapa.colocar_contenido()
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    n = len(mapa.habitaciones)
+    return n, estructura / n, total / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamano", default="500x500:100000", help="ANCHOxALTO:HABITACIONES")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    dimensiones, n_habitaciones = args.tamano.split(":")
+    ancho, alto = (int(v) for v in dimensiones.split("x"))
+    print(f"{'modo':>8} {'habitaciones':>13} {'estructura B/hab':>17} {'con contenido B/hab':>20}")
+    for compacto in (False, True):
+        n, estructura, total = medir(ancho, alto, int(n_habitaciones), compacto, args.semilla)
+        modo = "compacto" if compacto else "dict"
+        print(f"{modo:>8} {n:>13} {estructura:>17.1f} {total:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
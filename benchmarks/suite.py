@@ -0,0 +1,235 @@
+"""Suite de benchmarks: tiempo y memoria pico por fase, con semillas fijas.
+
+Fases, en el orden en que se ejecutan sobre el mismo mapa:
+    estructura    Mapa.generar_estructura
+    contenido     Mapa.colocar_contenido
+    guardar_json  guardar_partida(..., '*.json')
+    cargar_json   cargar_partida('*.json')
+    guardar_dgn   guardar_partida(..., '*.dgn')
+    cargar_dgn    cargar_partida('*.dgn') y lectura de todas las habitaciones
+    render        cuadros de Minimapa + Pantalla durante un paseo aleatorio
+    simulacion    simulacion.jugar_partida con la política 'explorar'
+
+El tiempo es el mejor de --repeticiones pasadas sin medir memoria; la memoria
+pico sale de una pasada aparte con tracemalloc (que hace más lento el código).
+
+Uso:
+    python benchmarks/suite.py correr --salida base.json
+    python benchmarks/suite.py correr --completo --repeticiones 1 --salida nuevo.json
+    python benchmarks/suite.py correr --tamanos 200x200:20000 --modos compacto
+    python benchmarks/suite.py comparar base.json nuevo.json --tolerancia 0.15
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.habitacion import DIRECCIONES
+from dungeon_generator.mapa import Mapa
+from dungeon_generator.minimapa import Minimapa
+from dungeon_generator.serializacion import guardar_partida, cargar_partida
+from dungeon_generator.simulacion import ExplorarTodo, jugar_partida
+from dungeon_generator.terminal import Pantalla
+
+TAMANOS_POR_DEFECTO = ["10x10:30", "100x100:5000"]
+# --completo agrega el mapa grande: cada pasada tarda varios minutos (sobre todo el JSON)
+TAMANOS_COMPLETOS = TAMANOS_POR_DEFECTO + ["1000x1000:500000"]
+FASES = ("estructura", "contenido", "guardar_json", "cargar_json",
+         "guardar_dgn", "cargar_dgn", "render", "simulacion")
+PASOS_RENDER = 2000
+TURNOS_SIMULACION = 5000
+
+
+class Corrida:
+    """Estado compartido entre las fases de una pasada (mapa, explorador, archivos)."""
+
+    def __init__(self, ancho: int, alto: int, n_habitaciones: int, compacto: bool, semilla: int, directorio: str):
+        self.ancho = ancho
+        self.alto = alto
+        self.n_habitaciones = n_habitaciones
+        self.compacto = compacto
+        self.semilla = semilla
+        self.directorio = directorio
+        self.mapa: Optional[Mapa] = None
+        self.explorador: Optional[Explorador] = None
+
+    def ruta(self, extension: str) -> str:
+        return os.path.join(self.directorio, f"partida{extension}")
+
+    # --- FASES ---
+    def estructura(self):
+        self.mapa = Mapa(self.ancho, self.alto, compacto=self.compacto, semilla=self.semilla)
+        self.mapa.generar_estructura(self.n_habitaciones)
+
+    def contenido(self):
+        self.mapa.colocar_contenido()
+        self.explorador = Explorador(self.mapa, vida=10, rng=random.Random(self.semilla), salida=None)
+
+    def guardar_json(self):
+        guardar_partida(self.mapa, self.explorador, self.ruta(".json"))
+
+    def cargar_json(self):
+        cargar_partida(self.ruta(".json"))
+
+    def guardar_dgn(self):
+        guardar_partida(self.mapa, self.explorador, self.ruta(".dgn"))
+
+    def cargar_dgn(self):
+        mapa, _ = cargar_partida(self.ruta(".dgn"))
+        # La carga es perezosa: se recorren las habitaciones para medir también su lectura
+        for _ in mapa.habitaciones.values():
+            pass
+
+    def render(self):
+        explorador = Explorador(self.mapa, vida=10, rng=random.Random(self.semilla), salida=None)
+        minimapa = Minimapa(self.mapa, 40, 20)
+        pantalla = Pantalla(io.StringIO(), es_tty=True)
+        rng = random.Random(self.semilla)
+        for _ in range(PASOS_RENDER):
+            explorador.mover(rng.choice(DIRECCIONES))
+            self.mapa.marcar_visitada(explorador.habitacion_actual)
+            pantalla.dibujar(minimapa.filas(explorador.posicion_actual))
+        minimapa.cerrar()
+
+    def simulacion(self):
+        jugar_partida(self.mapa, ExplorarTodo(), random.Random(self.semilla), random.Random(self.semilla + 1),
+                      vida=1000, max_turnos=TURNOS_SIMULACION)
+
+
+def _pasada(ancho: int, alto: int, n_habitaciones: int, compacto: bool, semilla: int,
+            medir_memoria: bool) -> Dict[str, Tuple[float, int]]:
+    """Ejecuta todas las fases una vez; devuelve fase -> (segundos, bytes pico o 0)."""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        corrida = Corrida(ancho, alto, n_habitaciones, compacto, semilla, directorio)
+        for fase in FASES:
+            paso: Callable[[], None] = getattr(corrida, fase)
+            if medir_memoria:
+                tracemalloc.start()
+            inicio = time.perf_counter()
+            paso()
+            segundos = time.perf_counter() - inicio
+            pico = 0
+            if medir_memoria:
+                pico = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            resultados[fase] = (segundos, pico)
+        resultados["habitaciones"] = len(corrida.mapa.habitaciones)
+    return resultados
+
+
+def correr(tamanos: List[str], modos: List[str], semilla: int, repeticiones: int, medir_memoria: bool) -> dict:
+    filas = []
+    print(f"{'tamaño':>18} {'modo':>8} {'fase':>13} {'segundos':>10} {'pico MB':>9}")
+    for tamano in tamanos:
+        dimensiones, n_habitaciones = tamano.split(":")
+        ancho, alto = (int(v) for v in dimensiones.split("x"))
+        for modo in modos:
+            compacto = modo == "compacto"
+            pasadas = [_pasada(ancho, alto, int(n_habitaciones), compacto, semilla, False)
+                       for _ in range(repeticiones)]
+            memoria = _pasada(ancho, alto, int(n_habitaciones), compacto, semilla, True) if medir_memoria else None
+            for fase in FASES:
+                segundos = min(p[fase][0] for p in pasadas)
+                pico = memoria[fase][1] if memoria else None
+                filas.append({
+                    "tamano": tamano, "modo": modo, "fase": fase, "habitaciones": pasadas[0]["habitaciones"],
+                    "segundos": segundos, "pico_bytes": pico,
+                })
+                pico_mb = f"{pico / 1e6:.1f}" if pico is not None else "-"
+                print(f"{tamano:>18} {modo:>8} {fase:>13} {segundos:>10.4f} {pico_mb:>9}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementacion": platform.python_implementation(),
+            "plataforma": platform.platform(),
+            "semilla": semilla,
+            "repeticiones": repeticiones,
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "resultados": filas,
+    }
+
+
+def comparar(base: dict, nuevo: dict, tolerancia: float, minimo_segundos: float) -> List[str]:
+    """Regresiones de 'nuevo' respecto de 'base' (más lento o más memoria que la tolerancia)."""
+    clave = lambda fila: (fila["tamano"], fila["modo"], fila["fase"])
+    anteriores = {clave(fila): fila for fila in base["resultados"]}
+    regresiones = []
+    print(f"{'tamaño':>18} {'modo':>8} {'fase':>13} {'tiempo':>9} {'memoria':>9}")
+    for fila in nuevo["resultados"]:
+        anterior = anteriores.get(clave(fila))
+        if anterior is None:
+            continue
+        marcas = []
+        cambio_tiempo = fila["segundos"] / anterior["segundos"] - 1 if anterior["segundos"] > 0 else 0.0
+        # Las fases muy cortas varían más que la tolerancia por puro ruido
+        if cambio_tiempo > tolerancia and fila["segundos"] >= minimo_segundos:
+            marcas.append(f"tiempo +{cambio_tiempo:.0%}")
+        cambio_memoria = None
+        if fila.get("pico_bytes") and anterior.get("pico_bytes"):
+            cambio_memoria = fila["pico_bytes"] / anterior["pico_bytes"] - 1
+            if cambio_memoria > tolerancia:
+                marcas.append(f"memoria +{cambio_memoria:.0%}")
+        memoria = f"{cambio_memoria:+.0%}" if cambio_memoria is not None else "-"
+        print(f"{fila['tamano']:>18} {fila['modo']:>8} {fila['fase']:>13} {cambio_tiempo:>+9.0%} {memoria:>9}"
+              + ("  <- REGRESIÓN" if marcas else ""))
+        if marcas:
+            regresiones.append(f"{fila['tamano']} {fila['modo']} {fila['fase']}: {', '.join(marcas)}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_correr = subcomandos.add_parser("correr", help="Ejecuta la suite y guarda los resultados en JSON")
+    p_correr.add_argument("--tamanos", nargs="+", help="ANCHOxALTO:HABITACIONES")
+    p_correr.add_argument("--completo", action="store_true", help="Incluye 1000x1000:500000")
+    p_correr.add_argument("--modos", nargs="+", choices=("dict", "compacto"), default=["dict", "compacto"])
+    p_correr.add_argument("--semilla", type=int, default=1)
+    p_correr.add_argument("--repeticiones", type=int, default=3)
+    p_correr.add_argument("--sin-memoria", action="store_true", help="Omite la pasada con tracemalloc")
+    p_correr.add_argument("--salida", help="Archivo JSON de resultados")
+
+    p_comparar = subcomandos.add_parser("comparar", help="Marca regresiones contra resultados guardados")
+    p_comparar.add_argument("base")
+    p_comparar.add_argument("nuevo")
+    p_comparar.add_argument("--tolerancia", type=float, default=0.20, help="Aumento relativo permitido")
+    p_comparar.add_argument("--minimo-segundos", type=float, default=0.005,
+                            help="No se marcan como más lentas las fases por debajo de este tiempo")
+    args = parser.parse_args()
+
+    if args.comando == "correr":
+        tamanos = args.tamanos or (TAMANOS_COMPLETOS if args.completo else TAMANOS_POR_DEFECTO)
+        datos = correr(tamanos, args.modos, args.semilla, args.repeticiones, not args.sin_memoria)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(datos, f, indent=2)
+        return
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding="utf-8") as f:
+        nuevo = json.load(f)
+    regresiones = comparar(base, nuevo, args.tolerancia, args.minimo_segundos)
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones:")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
+    print("\nSin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import random
+from typing import Optional
+
+
+def semilla_nueva() -> int:
+    """Semilla de 64 bits tomada del sistema operativo (no del módulo global 'random')."""
+    return int.from_bytes(os.urandom(8), "little")
+
+
+def derivar_semilla(semilla: int, *etiquetas) -> int:
+    """Deriva una semilla hija estable a partir de una semilla y etiquetas (índice de tarea, chunk...)."""
+    return random.Random(f"{semilla}/" + "/".join(str(e) for e in etiquetas)).getrandbits(64)
+
+
+class FlujosAleatorios:
+    """Generadores independientes de un mapa: estructura, contenido y combate.
+
+    Cada flujo se siembra con la semilla del mapa y su nombre, así que la misma
+    semilla reproduce el mismo dungeon sin depender del estado global de 'random'.
+    """
+
+    NOMBRES = ("estructura", "contenido", "combate")
+
+    def __init__(self, semilla: Optional[int] = None):
+        self.semilla = semilla if semilla is not None else semilla_nueva()
+        self.estructura = random.Random(f"{self.semilla}/estructura")
+        self.contenido = random.Random(f"{self.semilla}/contenido")
+        self.combate = random.Random(f"{self.semilla}/combate")
+
+    @classmethod
+    def desde_generador(cls, rng: random.Random) -> 'FlujosAleatorios':
+        """Crea los flujos tomando la semilla de un generador inyectado."""
+        return cls(rng.getrandbits(64))
+
+    def estado(self) -> dict:
+        """Estado serializable (JSON/YAML) de los tres flujos."""
+        return {
+            'semilla': self.semilla,
+            **{nombre: _estado_a_lista(getattr(self, nombre).getstate()) for nombre in self.NOMBRES},
+        }
+
+    @classmethod
+    def desde_estado(cls, estado: dict) -> 'FlujosAleatorios':
+        flujos = cls(estado['semilla'])
+        for nombre in cls.NOMBRES:
+            if nombre in estado:
+                getattr(flujos, nombre).setstate(_lista_a_estado(estado[nombre]))
+        return flujos
+
+
+def _estado_a_lista(estado: tuple) -> list:
+    version, interno, gauss = estado
+    return [version, list(interno), gauss]
+
+
+def _lista_a_estado(lista: list) -> tuple:
+    version, interno, gauss = lista
+    return (version, tuple(interno), gauss)
@@ -0,0 +1,520 @@
+"""Formato binario versionado de partidas (.dgn) con carga por mmap.
+
+Estructura del archivo (little-endian):
+
+    cabecera      _CABECERA
+    registros     n_registros x _REGISTRO, ordenados por (y, x)
+    objetos       n_objetos x _OBJETO (recompensas de tesoros, jefes e inventario)
+    inventario    n_inventario x uint32 (índice en la tabla de objetos)
+    cadenas       uint32 cantidad, (cantidad + 1) x uint32 desplazamientos, bytes UTF-8
+
+Al cargar solo se lee la cabecera: cada habitación se materializa (búsqueda
+binaria sobre los registros) la primera vez que se accede a ella, y sus
+vecinas recién cuando se consultan sus conexiones. Estadísticas, sorteo de
+posiciones e índices del mapa salen de columnas cortadas de los registros
+(HabitacionesBinarias.columnas), sin materializar habitaciones. El archivo
+queda mapeado mientras el mapa lo necesite; cerrar_archivo(mapa) materializa
+lo que falta y lo cierra.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .aleatorio import FlujosAleatorios
+from .contenido import ContenidoHabitacion, Tesoro, Monstruo, Jefe, Trampa, Curacion, Portal
+from .explorador import Explorador
+from .habitacion import Habitacion, DIRECCIONES, DELTAS, BITS_DIRECCION
+from .mapa import Mapa
+from .objeto import Objeto
+from .rejilla import CODIGOS_CONTENIDO
+
+MAGIA = b'DGNS'
+VERSION = 1
+
+_CABECERA = struct.Struct(
+    '<4sHH'      # magia, versión, banderas
+    'iiii'       # ancho, alto, siguiente id, versión de topología
+    'iiii'       # habitación inicial (x, y), habitación del jefe (x, y)
+    'iiiiii'     # explorador: vida, vida_max, x, y, bonificación, reservado
+    'III'        # n_registros, n_objetos, n_inventario
+    'QQQQ'       # desplazamientos: registros, objetos, inventario, cadenas
+    'I'          # id de cadena con el estado de los generadores (JSON)
+)
+_REGISTRO = struct.Struct('<iiiiIBBBxiii')  # x, y, id, distancia, estado, máscara, visitada, contenido, p1, p2, p3
+_OBJETO = struct.Struct('<III')                # nombre, valor, descripción
+_INDICE = struct.Struct('<I')
+
+_TIENE_INICIAL = 1
+_TIENE_JEFE = 2
+# El mapa guardado recorría sus habitaciones por id (orden de creación, como los mapas dict) y no por (y, x).
+# El sorteo de posiciones depende de ese orden, así que al cargar se recorre igual
+_ORDEN_POR_ID = 4
+
+# Códigos de contenido del formato (independientes de los de RejillaCompacta)
+SIN_CONTENIDO, MONSTRUO, TESORO, JEFE, TRAMPA, CURACION, PORTAL = range(7)
+# Traducción a los códigos de tipo de RejillaCompacta (CODIGOS_CONTENIDO), con bytes.translate
+_A_CODIGO_REJILLA = bytes([0, CODIGOS_CONTENIDO["monstruo"], CODIGOS_CONTENIDO["tesoro"], CODIGOS_CONTENIDO["jefe"],
+                           CODIGOS_CONTENIDO["evento"], CODIGOS_CONTENIDO["evento"], CODIGOS_CONTENIDO["evento"]]
+                          + [0] * 249)
+# Posición en _REGISTRO de la máscara, la visita y el código de contenido (un byte cada uno)
+_BYTE_MASCARA, _BYTE_VISITADA, _BYTE_CONTENIDO = 20, 21, 22
+
+
+class _Cadenas:
+    """Tabla de cadenas deduplicadas que se arma al guardar."""
+
+    def __init__(self):
+        self.indices: Dict[str, int] = {}
+        self.lista: List[str] = []
+
+    def id(self, texto: str) -> int:
+        indice = self.indices.get(texto)
+        if indice is None:
+            indice = self.indices[texto] = len(self.lista)
+            self.lista.append(texto)
+        return indice
+
+    def a_bytes(self) -> bytes:
+        codificadas = [texto.encode('utf-8') for texto in self.lista]
+        desplazamientos = [0]
+        for datos in codificadas:
+            desplazamientos.append(desplazamientos[-1] + len(datos))
+        return (struct.pack(f'<I{len(desplazamientos)}I', len(codificadas), *desplazamientos)
+                + b''.join(codificadas))
+
+
+# --- GUARDAR ---
+
+def guardar_binario(mapa: Mapa, explorador: Explorador, archivo: str):
+    """Escribe la partida en formato .dgn (vía archivo temporal y reemplazo atómico)."""
+    cadenas = _Cadenas()
+    objetos: List[bytes] = []
+    indices_objeto: Dict[int, int] = {}
+
+    def id_objeto(obj: Objeto) -> int:
+        clave = id(obj)
+        if clave not in indices_objeto:
+            indices_objeto[clave] = len(objetos)
+            objetos.append(_OBJETO.pack(cadenas.id(obj.nombre), obj.valor, cadenas.id(obj.descripcion)))
+        return indices_objeto[clave]
+
+    registros = []
+    orden_por_id = True
+    id_anterior = None
+    for (x, y), hab in mapa.habitaciones.items():
+        if id_anterior is not None and hab.id <= id_anterior:
+            orden_por_id = False
+        id_anterior = hab.id
+        mascara = 0
+        for direccion in hab.conexiones:
+            mascara |= BITS_DIRECCION[direccion]
+        codigo, p1, p2, p3 = _codificar_contenido(hab.contenido, cadenas, id_objeto)
+        registros.append(((y, x), _REGISTRO.pack(x, y, hab.id, hab.distancia_manhattan, cadenas.id(hab.estado),
+                                                 mascara, 1 if hab.visitada else 0, codigo, p1, p2, p3)))
+    registros.sort(key=lambda r: r[0])
+    inventario = [_INDICE.pack(id_objeto(obj)) for obj in explorador.inventario]
+    id_flujos = cadenas.id(json.dumps(mapa.flujos.estado(), separators=(',', ':')))
+
+    banderas = 0
+    inicial = jefe = (0, 0)
+    if mapa.habitacion_inicial is not None:
+        banderas |= _TIENE_INICIAL
+        inicial = mapa.habitacion_inicial.coordenadas
+    if mapa.habitacion_jefe is not None:
+        banderas |= _TIENE_JEFE
+        jefe = mapa.habitacion_jefe.coordenadas
+    if orden_por_id:
+        banderas |= _ORDEN_POR_ID
+
+    off_registros = _CABECERA.size
+    off_objetos = off_registros + len(registros) * _REGISTRO.size
+    off_inventario = off_objetos + len(objetos) * _OBJETO.size
+    off_cadenas = off_inventario + len(inventario) * _INDICE.size
+    cabecera = _CABECERA.pack(
+        MAGIA, VERSION, banderas,
+        mapa.ancho, mapa.alto, mapa.habitacion_id_counter, mapa.version_topologia,
+        inicial[0], inicial[1], jefe[0], jefe[1],
+        explorador.vida, explorador.vida_max, explorador.posicion_actual[0], explorador.posicion_actual[1],
+        explorador.bonificacion_combate, 0,
+        len(registros), len(objetos), len(inventario),
+        off_registros, off_objetos, off_inventario, off_cadenas,
+        id_flujos,
+    )
+
+    # Temporal único junto al destino: dos escrituras simultáneas del mismo archivo no se pisan
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(archivo) or '.',
+                                            prefix=os.path.basename(archivo) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(cabecera)
+            f.writelines(registro for _, registro in registros)
+            f.writelines(objetos)
+            f.writelines(inventario)
+            f.write(cadenas.a_bytes())
+        os.replace(temporal, archivo)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def _codificar_contenido(contenido: Optional[ContenidoHabitacion], cadenas: _Cadenas, id_objeto) -> Tuple[int, int, int, int]:
+    if contenido is None:
+        return SIN_CONTENIDO, 0, 0, 0
+    if isinstance(contenido, Jefe):
+        return JEFE, contenido.vida, contenido.ataque, id_objeto(contenido.recompensa_especial)
+    if isinstance(contenido, Monstruo):
+        return MONSTRUO, contenido.vida, contenido.ataque, cadenas.id(contenido.nombre)
+    if isinstance(contenido, Tesoro):
+        return TESORO, id_objeto(contenido.recompensa), 0, 0
+    if isinstance(contenido, Trampa):
+        return TRAMPA, contenido.dano, 0, 0
+    if isinstance(contenido, Curacion):
+        return CURACION, contenido.cura, 0, 0
+    if isinstance(contenido, Portal):
+        return PORTAL, 0, 0, 0
+    raise ValueError(f"Contenido no soportado por el formato binario: {type(contenido).__name__}")
+
+
+# --- CARGAR ---
+
+class ArchivoPartida:
+    """Vista de solo lectura sobre un archivo .dgn mapeado en memoria.
+
+    El mapeo queda abierto hasta cerrar() (o al salir de un bloque with).
+    """
+
+    def __init__(self, archivo: str):
+        with open(archivo, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        campos = _CABECERA.unpack_from(self._mm, 0)
+        if campos[0] != MAGIA or campos[1] != VERSION:
+            self._mm.close()
+            if campos[0] != MAGIA:
+                raise ValueError(f"{archivo} no es una partida binaria (magia {campos[0]!r}).")
+            raise ValueError(f"Versión de formato no soportada: {campos[1]} (se esperaba {VERSION}).")
+        (_, _, self.banderas,
+         self.ancho, self.alto, self.siguiente_id, self.version_topologia,
+         ix, iy, jx, jy,
+         self.vida, self.vida_max, px, py, self.bonificacion, _,
+         self.n_registros, self.n_objetos, self.n_inventario,
+         self.off_registros, self.off_objetos, self.off_inventario, self.off_cadenas,
+         self.id_flujos) = campos
+        self.inicial = (ix, iy) if self.banderas & _TIENE_INICIAL else None
+        self.jefe = (jx, jy) if self.banderas & _TIENE_JEFE else None
+        self.posicion = (px, py)
+        self._n_cadenas = _INDICE.unpack_from(self._mm, self.off_cadenas)[0]
+        self._cadenas: Dict[int, str] = {}
+
+    @property
+    def cerrado(self) -> bool:
+        return self._mm.closed
+
+    def cerrar(self):
+        self._mm.close()
+
+    def __enter__(self) -> 'ArchivoPartida':
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def cadena(self, indice: int) -> str:
+        texto = self._cadenas.get(indice)
+        if texto is None:
+            base = self.off_cadenas + _INDICE.size
+            inicio, fin = struct.unpack_from('<II', self._mm, base + 4 * indice)
+            datos = base + 4 * (self._n_cadenas + 1)
+            texto = self._cadenas[indice] = self._mm[datos + inicio:datos + fin].decode('utf-8')
+        return texto
+
+    def registro(self, i: int) -> tuple:
+        return _REGISTRO.unpack_from(self._mm, self.off_registros + i * _REGISTRO.size)
+
+    def buscar(self, x: int, y: int) -> int:
+        """Índice del registro de (x, y) por búsqueda binaria, o -1."""
+        bajo, alto = 0, self.n_registros
+        clave = (y, x)
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            rx, ry = struct.unpack_from('<ii', self._mm, self.off_registros + medio * _REGISTRO.size)
+            if (ry, rx) < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        if bajo < self.n_registros:
+            rx, ry = struct.unpack_from('<ii', self._mm, self.off_registros + bajo * _REGISTRO.size)
+            if (rx, ry) == (x, y):
+                return bajo
+        return -1
+
+    def objeto(self, indice: int) -> Objeto:
+        nombre, valor, descripcion = _OBJETO.unpack_from(self._mm, self.off_objetos + indice * _OBJETO.size)
+        return Objeto(nombre=self.cadena(nombre), valor=valor, descripcion=self.cadena(descripcion))
+
+    def inventario(self) -> List[Objeto]:
+        return [self.objeto(_INDICE.unpack_from(self._mm, self.off_inventario + i * _INDICE.size)[0])
+                for i in range(self.n_inventario)]
+
+
+def _decodificar_contenido(archivo: ArchivoPartida, mapa: Mapa,
+                           codigo: int, p1: int, p2: int, p3: int) -> Optional[ContenidoHabitacion]:
+    if codigo == SIN_CONTENIDO:
+        return None
+    if codigo == MONSTRUO:
+        return Monstruo(vida=p1, ataque=p2, nombre=archivo.cadena(p3))
+    if codigo == JEFE:
+        return Jefe(vida=p1, ataque=p2, recompensa_especial=archivo.objeto(p3))
+    if codigo == TESORO:
+        return Tesoro(recompensa=archivo.objeto(p1))
+    if codigo == TRAMPA:
+        return Trampa(dano=p1)
+    if codigo == CURACION:
+        return Curacion(cura=p1)
+    if codigo == PORTAL:
+        return Portal(mapa)
+    raise ValueError(f"Código de contenido desconocido en el archivo: {codigo}")
+
+
+class HabitacionBinaria(Habitacion):
+    """Habitacion materializada desde un registro; sus vecinas se materializan al pedir 'conexiones'."""
+    __slots__ = ('_pendientes', '_habitaciones')
+
+    def __init__(self, id: int, x: int, y: int, inicial: bool, mascara: int, habitaciones: 'HabitacionesBinarias'):
+        super().__init__(id, x, y, inicial)
+        # Máscara de las conexiones que todavía no se enlazaron
+        self._pendientes = mascara
+        self._habitaciones = habitaciones
+
+    def _enlazar(self):
+        for direccion in DIRECCIONES:
+            if self._pendientes & BITS_DIRECCION[direccion]:
+                dx, dy = DELTAS[direccion]
+                Habitacion.conectar(self, direccion, self._habitaciones[(self.x + dx, self.y + dy)])
+        self._pendientes = 0
+
+    @property
+    def conexiones(self) -> Dict[str, Habitacion]:
+        if self._pendientes:
+            self._enlazar()
+        return Habitacion.conexiones.fget(self)
+
+    @conexiones.setter
+    def conexiones(self, valor: Dict[str, Habitacion]):
+        self._pendientes = 0
+        Habitacion.conexiones.fset(self, valor)
+
+    def vecina(self, direccion: str) -> Optional[Habitacion]:
+        if self._pendientes:
+            self._enlazar()
+        return Habitacion.vecina(self, direccion)
+
+    def conectar(self, direccion: str, vecina: Optional[Habitacion]):
+        if self._pendientes:
+            self._enlazar()
+        Habitacion.conectar(self, direccion, vecina)
+
+
+class HabitacionesBinarias(Mapping):
+    """Mapping (x, y) -> Habitacion sobre un ArchivoPartida; materializa y guarda en caché bajo demanda."""
+
+    def __init__(self, archivo: ArchivoPartida, mapa: Mapa):
+        self._archivo = archivo
+        self._mapa = mapa
+        self._materializadas: Dict[Tuple[int, int], Habitacion] = {}
+        self._mascaras: Optional[bytearray] = None
+        self._orden: Optional[array] = None  # índices de registro por id, si el archivo lo pide
+        self._claves: Optional[List[Tuple[int, int]]] = None  # orden de iteración, tras cerrar()
+        self._columnas_archivo: Optional[tuple] = None
+
+    def cerrar(self):
+        """Materializa las habitaciones que faltan y cierra el archivo: el mapa deja de depender de él."""
+        if self._archivo.cerrado:
+            return
+        self.mascaras()
+        claves = list(self)
+        for clave in claves:
+            self[clave]
+        self._claves = claves
+        self._archivo.cerrar()
+
+    def mascaras(self) -> bytearray:
+        """Máscara de conexiones por celda (y * ancho + x), leída de los registros sin materializar nada."""
+        if self._mascaras is None:
+            archivo = self._archivo
+            ancho = archivo.ancho
+            mascaras = bytearray(ancho * archivo.alto)
+            for x, y, _, _, _, mascara, *_ in _REGISTRO.iter_unpack(
+                    archivo._mm[archivo.off_registros:archivo.off_objetos]):
+                mascaras[y * ancho + x] = mascara
+            self._mascaras = mascaras
+        return self._mascaras
+
+    def columnas(self, en_orden: bool = True) -> Optional[Tuple[array, bytes, bytes, bytes]]:
+        """Celda (y * ancho + x), máscara, visitada y tipo de contenido de cada habitación.
+
+        Se leen de los registros con cortes del mmap, sin materializar nada (con ellas
+        el mapa arma sus índices); los tipos usan los códigos de RejillaCompacta y las
+        habitaciones ya materializadas aportan sus visitas y su contenido actuales.
+        Con en_orden=False salen en el orden de los registros, que basta para contar.
+        None una vez cerrado el archivo: ahí todas las habitaciones están en memoria.
+        """
+        archivo = self._archivo
+        if self._claves is not None:
+            return None
+        if self._columnas_archivo is None:
+            inicio, fin = archivo.off_registros, archivo.off_objetos
+            enteros = array('i', archivo._mm[inicio:fin])
+            paso = _REGISTRO.size // enteros.itemsize
+            ancho = archivo.ancho
+            celdas = array('i', [y * ancho + x for x, y in zip(enteros[0::paso], enteros[1::paso])])
+            self._columnas_archivo = (
+                celdas,
+                archivo._mm[inicio + _BYTE_MASCARA:fin:_REGISTRO.size],
+                archivo._mm[inicio + _BYTE_VISITADA:fin:_REGISTRO.size],
+                archivo._mm[inicio + _BYTE_CONTENIDO:fin:_REGISTRO.size].translate(_A_CODIGO_REJILLA),
+            )
+        celdas, mascaras, visitadas, tipos = self._columnas_archivo
+        if self._materializadas:
+            visitadas, tipos = bytearray(visitadas), bytearray(tipos)
+            for (x, y), hab in self._materializadas.items():
+                i = archivo.buscar(x, y)
+                visitadas[i] = hab.visitada
+                tipos[i] = CODIGOS_CONTENIDO[hab.contenido.tipo] if hab.contenido is not None else 0
+        if en_orden and archivo.banderas & _ORDEN_POR_ID:
+            orden = self._orden_por_id()
+            celdas = array('i', map(celdas.__getitem__, orden))
+            mascaras, visitadas, tipos = (bytes(map(columna.__getitem__, orden))
+                                          for columna in (mascaras, visitadas, tipos))
+        return celdas, mascaras, visitadas, tipos
+
+    @property
+    def materializadas(self) -> int:
+        return len(self._materializadas)
+
+    def _materializar(self, x: int, y: int) -> Optional[Habitacion]:
+        archivo = self._archivo
+        if self._claves is not None:
+            return None  # cerrado: todas las habitaciones ya están materializadas
+        i = archivo.buscar(x, y)
+        if i < 0:
+            return None
+        _, _, id_hab, distancia, estado, mascara, visitada, codigo, p1, p2, p3 = archivo.registro(i)
+        hab = HabitacionBinaria(id_hab, x, y, (x, y) == archivo.inicial, mascara, self)
+        hab.distancia_manhattan = distancia
+        hab.estado = archivo.cadena(estado)
+        hab.visitada = bool(visitada)
+        hab.contenido = _decodificar_contenido(archivo, self._mapa, codigo, p1, p2, p3)
+        self._materializadas[(x, y)] = hab
+        return hab
+
+    def __getitem__(self, clave: Tuple[int, int]) -> Habitacion:
+        hab = self._materializadas.get(clave)
+        if hab is None:
+            hab = self._materializar(*clave)
+            if hab is None:
+                raise KeyError(clave)
+        return hab
+
+    def get(self, clave: Tuple[int, int], default=None):
+        hab = self._materializadas.get(clave)
+        if hab is None:
+            hab = self._materializar(*clave)
+        return hab if hab is not None else default
+
+    def __contains__(self, clave) -> bool:
+        if clave in self._materializadas:
+            return True
+        return self._claves is None and self._archivo.buscar(*clave) >= 0
+
+    def _orden_por_id(self) -> array:
+        if self._orden is None:
+            archivo = self._archivo
+            enteros = array('i', archivo._mm[archivo.off_registros:archivo.off_objetos])
+            ids = enteros[2::_REGISTRO.size // enteros.itemsize]
+            self._orden = array('i', sorted(range(len(ids)), key=ids.__getitem__))
+        return self._orden
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        if self._claves is not None:
+            yield from self._claves
+            return
+        archivo = self._archivo
+        orden = self._orden_por_id() if archivo.banderas & _ORDEN_POR_ID else range(archivo.n_registros)
+        for i in orden:
+            x, y = struct.unpack_from('<ii', archivo._mm, archivo.off_registros + i * _REGISTRO.size)
+            yield (x, y)
+
+    def __len__(self) -> int:
+        return self._archivo.n_registros
+
+
+def cargar_binario(archivo: str, compacto: bool = False) -> Tuple[Mapa, Explorador]:
+    """Abre una partida .dgn; solo se decodifica la cabecera, las habitaciones llegan bajo demanda.
+
+    Con compacto=True, en cambio, los registros se vuelcan enteros a las columnas
+    de un mapa compacto (como uno generado con compacto=True) y el archivo se cierra.
+    """
+    datos = ArchivoPartida(archivo)
+    try:
+        flujos = FlujosAleatorios.desde_estado(json.loads(datos.cadena(datos.id_flujos)))
+        if compacto:
+            mapa = _volcar_a_rejilla(datos, flujos)
+        else:
+            mapa = Mapa(0, 0, flujos=flujos)
+            mapa.ancho, mapa.alto = datos.ancho, datos.alto
+            mapa.habitaciones = HabitacionesBinarias(datos, mapa)
+            mapa.habitacion_inicial = mapa.obtener_habitacion(*datos.inicial) if datos.inicial else None
+            mapa.habitacion_jefe = mapa.obtener_habitacion(*datos.jefe) if datos.jefe else None
+        mapa.habitacion_id_counter = datos.siguiente_id
+        mapa.version_topologia = datos.version_topologia
+        mapa.invalidar_indices()
+    except Exception:
+        datos.cerrar()
+        raise
+
+    explorador = Explorador(mapa, vida=datos.vida_max)
+    explorador.vida = datos.vida
+    explorador.posicion_actual = datos.posicion
+    explorador.bonificacion_combate = datos.bonificacion
+    explorador.inventario = datos.inventario()
+    if compacto:
+        datos.cerrar()
+    return mapa, explorador
+
+
+def _volcar_a_rejilla(datos: ArchivoPartida, flujos: FlujosAleatorios) -> Mapa:
+    mapa = Mapa(datos.ancho, datos.alto, compacto=True, flujos=flujos)
+    rejilla = mapa._rejilla
+    # Los eventos vuelven a ser las instancias compartidas del mapa, como al generarlo
+    mapa._eventos = (Trampa(dano=2), Curacion(cura=3), Portal(mapa))
+    compartidos = {(type(evento), tuple(evento.parametros().items())): evento for evento in mapa._eventos}
+    for x, y, id_hab, distancia, estado, mascara, visitada, codigo, p1, p2, p3 in _REGISTRO.iter_unpack(
+            datos._mm[datos.off_registros:datos.off_objetos]):
+        idx = rejilla.indice(x, y)
+        rejilla.agregar(idx, id_hab, (x, y) == datos.inicial)
+        rejilla.conexiones[idx] = mascara
+        rejilla.distancias[idx] = distancia
+        rejilla.visitadas[idx] = visitada
+        rejilla.estados[idx] = rejilla.codigo_estado(datos.cadena(estado))
+        contenido = _decodificar_contenido(datos, mapa, codigo, p1, p2, p3)
+        if contenido is not None:
+            if codigo in (TRAMPA, CURACION, PORTAL):
+                contenido = compartidos.get((type(contenido), tuple(contenido.parametros().items())), contenido)
+            rejilla.fijar_contenido(idx, contenido)
+    mapa.habitacion_inicial = mapa.obtener_habitacion(*datos.inicial) if datos.inicial else None
+    mapa.habitacion_jefe = mapa.obtener_habitacion(*datos.jefe) if datos.jefe else None
+    return mapa
+
+
+def cerrar_archivo(mapa: Mapa):
+    """Si 'mapa' viene de cargar_binario, materializa lo que falta y cierra el archivo (no hace nada si no)."""
+    if isinstance(mapa.habitaciones, HabitacionesBinarias):
+        mapa.habitaciones.cerrar()
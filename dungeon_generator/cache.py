@@ -0,0 +1,162 @@
+"""Caché en disco de mapas generados, direccionada por contenido.
+
+La clave es un hash de los parámetros que determinan el dungeon (ancho, alto,
+habitaciones, semilla, modo, distancia por camino y VERSION_GENERADOR). Cada
+entrada es el mapa recién generado en formato .dgn, con el estado de sus
+flujos aleatorios, así que un acierto da la misma partida que generarla. La
+carga es perezosa (mmap): leer una entrada no depende del tamaño del mapa.
+Las entradas compactas vuelven como mapas compactos, igual que al generarlas:
+sus registros se vuelcan a columnas, en tiempo proporcional a las habitaciones.
+
+Varios procesos pueden compartir el directorio: las entradas se escriben en
+un temporal único y se publican con os.replace, y una entrada que desaparece
+o está dañada cuenta como fallo (y solo una dañada se borra). El orden LRU es la fecha de modificación,
+que se renueva en cada acierto; al superar max_bytes se borran las más viejas.
+
+    cache = CacheMapas(directorio_por_defecto())
+    mapa = cache.obtener(10, 10, 30, semilla=42)
+"""
+import hashlib
+import json
+import os
+import secrets
+import struct
+from typing import Dict, Optional
+
+from . import instrumentacion
+from .binario import VERSION as VERSION_BINARIO, cargar_binario, guardar_binario
+from .explorador import Explorador
+from .mapa import Mapa, VERSION_GENERADOR, generar_mapa
+
+EXTENSION = ".dgn"
+MAX_BYTES_POR_DEFECTO = 256 * 1024 * 1024
+
+
+def directorio_por_defecto() -> str:
+    """$XDG_CACHE_HOME/dungeon_generator (o ~/.cache/dungeon_generator)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "dungeon_generator")
+
+
+class CacheMapas:
+    """Mapas terminados en disco, con desalojo LRU por tamaño y contadores de aciertos."""
+
+    def __init__(self, directorio: str, max_bytes: int = MAX_BYTES_POR_DEFECTO):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        os.makedirs(directorio, exist_ok=True)
+
+    @staticmethod
+    def clave(ancho: int, alto: int, n_habitaciones: int, semilla: int, compacto: bool = False,
+              usar_distancia_camino: bool = False) -> str:
+        parametros = [VERSION_GENERADOR, VERSION_BINARIO, ancho, alto, n_habitaciones, semilla,
+                      compacto, usar_distancia_camino]
+        return hashlib.sha256(json.dumps(parametros).encode("utf-8")).hexdigest()[:32]
+
+    def ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave + EXTENSION)
+
+    def cargar(self, clave: str, compacto: bool = False) -> Optional[Mapa]:
+        """El mapa guardado con 'clave', o None (fallo) si no está o no se puede leer."""
+        ruta = self.ruta(clave)
+        with instrumentacion.tramo("cache.cargar"):
+            try:
+                mapa, _ = cargar_binario(ruta, compacto=compacto)
+                os.utime(ruta)  # renueva su lugar en el orden LRU
+            except (ValueError, struct.error):
+                # Entrada dañada (p. ej. de una versión anterior): se descarta y se regenera
+                self._borrar(ruta)
+                mapa = None
+            except OSError:
+                # Ausente, o ilegible por ahora (permisos, demasiados archivos abiertos): la entrada queda
+                mapa = None
+        if mapa is None:
+            self.fallos += 1
+            instrumentacion.contar("cache.fallos")
+        else:
+            self.aciertos += 1
+            instrumentacion.contar("cache.aciertos")
+        return mapa
+
+    def guardar(self, clave: str, mapa: Mapa):
+        """Publica 'mapa' (recién generado, sin jugar) bajo 'clave' y desaloja si hace falta."""
+        ruta = self.ruta(clave)
+        # Temporal propio: dos procesos que generan la misma clave no pisan el archivo del otro
+        temporal = f"{ruta}.{os.getpid()}.{secrets.token_hex(4)}"
+        with instrumentacion.tramo("cache.guardar"):
+            try:
+                guardar_binario(mapa, Explorador(mapa, salida=None), temporal)
+                os.replace(temporal, ruta)
+            finally:
+                self._borrar(temporal)
+        self.desalojar()
+
+    def obtener(self, ancho: int, alto: int, n_habitaciones: int, semilla: Optional[int],
+                compacto: bool = False, usar_distancia_camino: bool = False) -> Mapa:
+        """Como mapa.generar_mapa, pero leyendo de la caché cuando se puede (sin semilla no se guarda)."""
+        if semilla is None:
+            return generar_mapa(ancho, alto, n_habitaciones, None, compacto, usar_distancia_camino)
+        clave = self.clave(ancho, alto, n_habitaciones, semilla, compacto, usar_distancia_camino)
+        mapa = self.cargar(clave, compacto)
+        if mapa is None:
+            mapa = generar_mapa(ancho, alto, n_habitaciones, semilla, compacto, usar_distancia_camino)
+            self.guardar(clave, mapa)
+        return mapa
+
+    # --- DESALOJO ---
+    def desalojar(self) -> int:
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes; devuelve cuántas borró."""
+        entradas = []
+        total = 0
+        with os.scandir(self.directorio) as it:
+            for entrada in it:
+                if not entrada.name.endswith(EXTENSION):
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue  # otro proceso la borró mientras se listaba
+                entradas.append((info.st_mtime, info.st_size, entrada.path))
+                total += info.st_size
+        if total <= self.max_bytes:
+            return 0
+        borradas = 0
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            self._borrar(ruta)
+            total -= tamano
+            borradas += 1
+        self.desalojos += borradas
+        return borradas
+
+    def vaciar(self):
+        with os.scandir(self.directorio) as it:
+            for entrada in it:
+                if entrada.name.endswith(EXTENSION):
+                    self._borrar(entrada.path)
+
+    @staticmethod
+    def _borrar(ruta: str):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass  # ya borrada por otro proceso (o en uso, en sistemas que no permiten borrarla)
+
+    def estadisticas(self) -> Dict[str, int]:
+        entradas = 0
+        total = 0
+        with os.scandir(self.directorio) as it:
+            for entrada in it:
+                if not entrada.name.endswith(EXTENSION):
+                    continue
+                try:
+                    total += entrada.stat().st_size
+                except FileNotFoundError:
+                    continue
+                entradas += 1
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "desalojos": self.desalojos,
+                "entradas": entradas, "bytes": total}
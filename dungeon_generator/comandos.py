@@ -0,0 +1,82 @@
+"""Vocabulario de comandos del juego, compartido por la consola (main.py) y el servidor.
+
+ejecutar() resuelve los comandos que solo dependen del explorador (movimiento,
+EXPLORAR, ESTADO, SALIR y, en partidas de varios pisos, BAJAR y SUBIR). MAPA y
+GUARDAR dependen de la interfaz y los resuelve quien llama.
+"""
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from .explorador import Explorador
+    from .pisos import Pisos
+
+# El índice de cada comando es su código en las grabaciones (.dgr): los nuevos van al final
+COMANDOS = ("NORTE", "SUR", "ESTE", "OESTE", "SALIR", "ESTADO", "MAPA", "GUARDAR", "EXPLORAR", "BAJAR", "SUBIR")
+DIRECCIONES_COMANDO = {"NORTE": "norte", "SUR": "sur", "ESTE": "este", "OESTE": "oeste"}
+
+
+def mensaje_bienvenida(explorador: 'Explorador') -> List[str]:
+    return [
+        "¡Bienvenido al Dungeon Mapa Generador!",
+        f"Tu aventura comienza en la habitación {explorador.posicion_actual}.",
+        f"Explorador {explorador.vida}/{explorador.vida_max} HP. Encuentra la habitación del Jefe para ganar.",
+    ]
+
+
+def mensaje_estado(explorador: 'Explorador') -> List[str]:
+    inventario_str = ", ".join([obj.nombre for obj in explorador.inventario]) if explorador.inventario else "Vacío"
+    lineas = [
+        "-- ESTADO DEL EXPLORADOR --",
+        f"Ubicación: {explorador.posicion_actual}",
+        f"Vida: {explorador.vida}/{explorador.vida_max}",
+        f"Inventario: {inventario_str}",
+    ]
+    x, y = explorador.posicion_actual
+    cercano = explorador.mapa.indice_espacial().cercanas(x, y, "monstruo")
+    if cercano:
+        mx, my = cercano[0]
+        lineas.append(f"Pista: el monstruo más cercano está en {(mx, my)}, a {abs(mx - x) + abs(my - y)} casillas.")
+    return lineas
+
+
+def ejecutar(explorador: 'Explorador', comando: str, mensajes: List[str], pisos: Optional['Pisos'] = None) -> bool:
+    """Aplica 'comando' (ya en mayúsculas) y agrega sus mensajes. True si la partida terminó.
+
+    Sin 'pisos' la partida tiene un solo piso y derrotar al jefe la gana.
+    """
+    if comando == "SALIR":
+        mensajes.append("¡Adiós! Gracias por jugar.")
+        return True
+    if comando == "ESTADO":
+        mensajes.extend(mensaje_estado(explorador))
+    elif comando == "EXPLORAR":
+        hab_actual = explorador.habitacion_actual
+        mensajes.append(explorador.explorar_habitacion())
+        if hab_actual.estado == "Jefe" and hab_actual.contenido is None:
+            if pisos is not None and pisos.actual < pisos.n_pisos:
+                mensajes.append(f"¡Jefe derrotado! Se abre una escalera hacia el piso {pisos.actual + 1} (BAJAR).")
+                return False
+            mensajes.append("¡HAS DERROTADO AL JEFE Y GANADO EL JUEGO!")
+            return True
+        if explorador.vida <= 0:
+            mensajes.append("GAME OVER. Tu vida llegó a cero.")
+            return True
+    elif comando in DIRECCIONES_COMANDO:
+        if explorador.mover(DIRECCIONES_COMANDO[comando]):
+            mensajes.append(f"Te has movido a la habitación {explorador.posicion_actual} en dirección {comando}.")
+        else:
+            mensajes.append("No hay conexión en esa dirección.")
+    elif comando == "BAJAR":
+        if pisos is not None and pisos.escalera_abajo(explorador):
+            latencia = pisos.bajar(explorador)
+            mensajes.append(f"Bajas al piso {pisos.actual} de {pisos.n_pisos} (listo en {latencia * 1000:.1f} ms). "
+                            f"Los enemigos son más fuertes.")
+        else:
+            mensajes.append("No hay una escalera hacia abajo aquí.")
+    elif comando == "SUBIR":
+        if pisos is not None and pisos.escalera_arriba(explorador):
+            pisos.subir(explorador)
+            mensajes.append(f"Subes al piso {pisos.actual} de {pisos.n_pisos}.")
+        else:
+            mensajes.append("No hay una escalera hacia arriba aquí.")
+    return False
@@ -1,10 +1,10 @@
 
 
 from abc import ABC, abstractmethod
-import random
 from typing import TYPE_CHECKING, Optional, List
 # Importar Objeto (asumido)
 from .objeto import Objeto 
+from .plantillas import Plantilla, plantilla_fija, PORTAL
 
 # Usamos TYPE_CHECKING para evitar la dependencia circular con Mapa y Explorador
 if TYPE_CHECKING:
@@ -12,7 +12,12 @@ if TYPE_CHECKING:
     from .mapa import Mapa 
 
 class ContenidoHabitacion(ABC):
-    """Clase base abstracta para todo el contenido de las habitaciones."""
+    """Clase base abstracta para todo el contenido de las habitaciones.
+
+    Cada instancia guarda solo una Plantilla compartida, su nivel y el estado
+    mutable; nombres y textos se derivan de la plantilla al leerlos.
+    """
+    __slots__ = ('plantilla', 'nivel')
     
     @property
     @abstractmethod
@@ -28,9 +33,40 @@ class ContenidoHabitacion(ABC):
     def interactuar(self, explorador: 'Explorador') -> str:
         pass
 
+    def resolver(self, explorador: 'Explorador') -> bool:
+        """Aplica el efecto sin formatear mensajes (simulaciones). True si el contenido se consumió."""
+        self.interactuar(explorador)
+        return explorador.habitacion_actual.contenido is not self
+
+    def parametros(self) -> dict:
+        """Argumentos del constructor que recrean este contenido (para serializar)."""
+        return {}
+
 class Tesoro(ContenidoHabitacion):
+    __slots__ = ('_recompensa',)
+
     def __init__(self, recompensa: Objeto):
-        self.recompensa = recompensa
+        self.plantilla: Optional[Plantilla] = None
+        self.nivel = 0
+        self._recompensa: Optional[Objeto] = recompensa
+
+    @classmethod
+    def desde_plantilla(cls, plantilla: Plantilla, nivel: int) -> 'Tesoro':
+        """Tesoro cuya recompensa se crea recién cuando alguien la pide."""
+        tesoro = cls.__new__(cls)
+        tesoro.plantilla = plantilla
+        tesoro.nivel = nivel
+        tesoro._recompensa = None
+        return tesoro
+
+    @property
+    def recompensa(self) -> Objeto:
+        if self._recompensa is None:
+            self._recompensa = self.plantilla.objeto_en(self.nivel)
+        return self._recompensa
+
+    def parametros(self) -> dict:
+        return {'recompensa': self.recompensa}
 
     @property
     def tipo(self) -> str:
@@ -40,17 +76,45 @@ class Tesoro(ContenidoHabitacion):
     def descripcion(self) -> str:
         return f"Un tesoro brillante: {self.recompensa.nombre}."
 
-    def interactuar(self, explorador: 'Explorador') -> str:
+    def resolver(self, explorador: 'Explorador') -> bool:
         explorador.inventario.append(self.recompensa)
-        explorador.habitacion_actual.contenido = None 
+        explorador.mapa.retirar_contenido(explorador.habitacion_actual)
+        return True
+
+    def interactuar(self, explorador: 'Explorador') -> str:
+        self.resolver(explorador)
         return f"[bold green]¡TESORO RECIBIDO![/bold green] Has encontrado {self.recompensa.nombre} (Valor: {self.recompensa.valor})."
 
 class Monstruo(ContenidoHabitacion):
+    __slots__ = ('vida',)
+
     def __init__(self, vida: int, ataque: int, nombre: str = "Orco Salvaje"):
-        self.nombre = nombre
+        self.plantilla = plantilla_fija(self.tipo, nombre, vida=vida, ataque=ataque)
+        self.nivel = 0
         self.vida = vida
-        self.ataque = ataque
-        self._vida_max = vida 
+
+    @classmethod
+    def desde_plantilla(cls, plantilla: Plantilla, nivel: int) -> 'Monstruo':
+        monstruo = cls.__new__(cls)
+        monstruo.plantilla = plantilla
+        monstruo.nivel = nivel
+        monstruo.vida = plantilla.vida_en(nivel)
+        return monstruo
+
+    @property
+    def nombre(self) -> str:
+        return self.plantilla.nombre
+
+    @property
+    def ataque(self) -> int:
+        return self.plantilla.ataque_en(self.nivel)
+
+    @property
+    def vida_max(self) -> int:
+        return self.plantilla.vida_en(self.nivel)
+
+    def parametros(self) -> dict:
+        return {'vida': self.vida, 'ataque': self.ataque, 'nombre': self.nombre}
 
     @property
     def tipo(self) -> str:
@@ -60,27 +124,52 @@ class Monstruo(ContenidoHabitacion):
     def descripcion(self) -> str:
         return f"Un Monstruo ({self.nombre}) con {self.vida} HP te bloquea el camino."
 
+    def resolver(self, explorador: 'Explorador') -> bool:
+        if self.vida <= 0:
+            return True
+        
+        # Asumiendo un combate simplificado: 60% de probabilidad de golpe para el explorador
+        if explorador.rng.random() < 0.6: 
+            self.vida = 0
+            explorador.mapa.retirar_contenido(explorador.habitacion_actual)
+            return True
+        explorador.recibir_dano(self.ataque)
+        return False
+
     def interactuar(self, explorador: 'Explorador') -> str:
         if self.vida <= 0:
             return f"El {self.nombre} ya fue derrotado."
             
         dano_a_explorador = self.ataque
         
-        # Asumiendo un combate simplificado: 60% de probabilidad de golpe para el explorador
-        if random.random() < 0.6: 
-            self.vida = 0
-            explorador.habitacion_actual.contenido = None
+        if self.resolver(explorador):
             return f"[bold green]¡VICTORIA![/bold green] Has derrotado al {self.nombre}."
         else:
-            explorador.recibir_dano(dano_a_explorador)
             # CORRECCIÓN: Usar explorador.vida_max
             return f"[bold red]¡ATAQUE RECIBIDO![/bold red] El {self.nombre} te golpea. Pierdes {dano_a_explorador} vida. Tu vida: {explorador.vida}/{explorador.vida_max}"
 
 
 class Jefe(Monstruo):
+    __slots__ = ('_recompensa',)
+
     def __init__(self, vida: int, ataque: int, recompensa_especial: Objeto):
         super().__init__(vida, ataque, nombre="Gran Jefe Oscuro")
-        self.recompensa_especial = recompensa_especial
+        self._recompensa: Optional[Objeto] = recompensa_especial
+
+    @classmethod
+    def desde_plantilla(cls, plantilla: Plantilla, nivel: int) -> 'Jefe':
+        jefe = super().desde_plantilla(plantilla, nivel)
+        jefe._recompensa = None
+        return jefe
+
+    @property
+    def recompensa_especial(self) -> Objeto:
+        if self._recompensa is None:
+            self._recompensa = self.plantilla.objeto_en(self.nivel)
+        return self._recompensa
+
+    def parametros(self) -> dict:
+        return {'vida': self.vida, 'ataque': self.ataque, 'recompensa_especial': self.recompensa_especial}
         
     @property
     def tipo(self) -> str:
@@ -90,25 +179,38 @@ class Jefe(Monstruo):
     def descripcion(self) -> str:
         return f"El Jefe final ({self.nombre}) con {self.vida} HP. ¡Peligro!"
     
+    def resolver(self, explorador: 'Explorador') -> bool:
+        if self.vida <= 0:
+            return True
+        
+        # Combate de Jefe simplificado: 30% de probabilidad de golpe para el explorador
+        if explorador.rng.random() < 0.3: 
+            self.vida = 0
+            explorador.inventario.append(self.recompensa_especial)
+            explorador.mapa.retirar_contenido(explorador.habitacion_actual)
+            return True
+        explorador.recibir_dano(self.ataque)
+        return False
+
     def interactuar(self, explorador: 'Explorador') -> str:
         if self.vida <= 0:
             return f"El {self.nombre} (Jefe) ya fue derrotado."
             
         dano_a_explorador = self.ataque
         
-        # Combate de Jefe simplificado: 30% de probabilidad de golpe para el explorador
-        if random.random() < 0.3: 
-            self.vida = 0
-            explorador.inventario.append(self.recompensa_especial)
-            explorador.habitacion_actual.contenido = None
+        if self.resolver(explorador):
             return f"[bold yellow]¡ÉPICA VICTORIA![/bold yellow] Has derrotado al {self.nombre} y has obtenido el {self.recompensa_especial.nombre}."
         else:
-            explorador.recibir_dano(dano_a_explorador)
             # CORRECCIÓN: Usar explorador.vida_max
             return f"[bold red]¡GOLPE DE JEFE![/bold red] El {self.nombre} te inflige {dano_a_explorador} daño. Tu vida: {explorador.vida}/{explorador.vida_max}"
 
 class Evento(ContenidoHabitacion):
-    """Clase base para Eventos Aleatorios."""
+    """Clase base para Eventos Aleatorios.
+
+    Los eventos no tienen estado propio: una misma instancia puede ocupar
+    muchas habitaciones (ver Mapa._crear_contenido).
+    """
+    __slots__ = ()
     
     @property
     def tipo(self) -> str:
@@ -116,61 +218,106 @@ class Evento(ContenidoHabitacion):
     
     @property
     def descripcion(self) -> str:
-        return self._nombre_evento
+        return self.plantilla.nombre
+
+    @property
+    def efecto(self) -> str:
+        return ""
 
-    def __init__(self, nombre: str, efecto: str):
-        self._nombre_evento = nombre
-        self._efecto = efecto
+    def __init__(self, plantilla: Plantilla):
+        self.plantilla = plantilla
+        self.nivel = 0
 
     def interactuar(self, explorador: 'Explorador') -> str:
-        return f"[bold yellow]EVENTO: {self._nombre_evento}[/bold yellow] - {self._efecto}"
+        return f"[bold yellow]EVENTO: {self.descripcion}[/bold yellow] - {self.efecto}"
 
 
 class Trampa(Evento):
     """Subclase de Evento: Trampa que reduce vida."""
+    __slots__ = ()
+
     def __init__(self, dano: int):
-        super().__init__("Trampa Oculta", f"Una trampa se activa y pierdes {dano} de vida.")
-        self.dano = dano
+        super().__init__(plantilla_fija("evento", "Trampa Oculta", efecto=dano))
 
-    def interactuar(self, explorador: 'Explorador') -> str:
+    @property
+    def dano(self) -> int:
+        return self.plantilla.efecto
+
+    @property
+    def efecto(self) -> str:
+        return f"Una trampa se activa y pierdes {self.dano} de vida."
+
+    def parametros(self) -> dict:
+        return {'dano': self.dano}
+
+    def resolver(self, explorador: 'Explorador') -> bool:
         explorador.recibir_dano(self.dano)
-        explorador.habitacion_actual.contenido = None
+        explorador.mapa.retirar_contenido(explorador.habitacion_actual)
+        return True
+
+    def interactuar(self, explorador: 'Explorador') -> str:
+        self.resolver(explorador)
         return f"[bold red]¡TRAMPA![/bold red] Se activa una trampa. Pierdes {self.dano} vida. Vida restante: {explorador.vida}."
 
 class Curacion(Evento):
     """Subclase de Evento: Fuentes que restauran vida."""
+    __slots__ = ()
+
     def __init__(self, cura: int):
-        super().__init__("Fuente de Vida", f"Una fuente mágica restaura {cura} de tu vida.")
-        self.cura = cura
+        super().__init__(plantilla_fija("evento", "Fuente de Vida", efecto=cura))
 
-    def interactuar(self, explorador: 'Explorador') -> str:
+    @property
+    def cura(self) -> int:
+        return self.plantilla.efecto
+
+    @property
+    def efecto(self) -> str:
+        return f"Una fuente mágica restaura {self.cura} de tu vida."
+
+    def parametros(self) -> dict:
+        return {'cura': self.cura}
+
+    def resolver(self, explorador: 'Explorador') -> bool:
         # Usamos explorador.vida_max (corregido previamente)
-        vida_recuperada = min(self.cura, explorador.vida_max - explorador.vida) 
-        
-        explorador.vida += vida_recuperada
-        explorador.habitacion_actual.contenido = None
+        explorador.vida += min(self.cura, explorador.vida_max - explorador.vida)
+        explorador.mapa.retirar_contenido(explorador.habitacion_actual)
+        return True
+
+    def interactuar(self, explorador: 'Explorador') -> str:
+        vida_antes = explorador.vida
+        self.resolver(explorador)
+        vida_recuperada = explorador.vida - vida_antes
         
         return f"[bold green]¡CURACIÓN![/bold green] Bebes de la fuente y recuperas {vida_recuperada} vida. Vida actual: {explorador.vida}/{explorador.vida_max}."
 
 class Portal(Evento):
     """Subclase de Evento: Portales que teletransportan."""
     
+    __slots__ = ('mapa',)
+
     # El tipo 'mapa' se omite en el constructor para evitar la dependencia circular
     def __init__(self, mapa): 
-        super().__init__("Portal Dimensional", "Un portal te teletransporta a un lugar aleatorio del dungeon.")
+        super().__init__(PORTAL)
         self.mapa = mapa 
 
-    def interactuar(self, explorador: 'Explorador') -> str:
-        habitaciones_keys = list(self.mapa.habitaciones.keys())
-        if not habitaciones_keys:
-             return "[bold yellow]El portal parpadea[/bold yellow], pero no encuentra destino."
-             
-        nueva_posicion = random.choice(habitaciones_keys)
+    @property
+    def efecto(self) -> str:
+        return "Un portal te teletransporta a un lugar aleatorio del dungeon."
+
+    def resolver(self, explorador: 'Explorador') -> bool:
+        nueva_posicion = self.mapa.posicion_aleatoria(explorador.rng)
+        if nueva_posicion is None:
+            return False
         
-        nueva_habitacion = self.mapa.obtener_habitacion(nueva_posicion[0], nueva_posicion[1])
-        # Asignar nueva posición
+        # El portal se consume en su habitación, como los demás eventos
+        self.mapa.retirar_contenido(explorador.habitacion_actual)
         explorador.posicion_actual = nueva_posicion 
-        explorador.habitacion_actual.visitada = True
-        explorador.habitacion_actual.contenido = None 
+        self.mapa.al_entrar(*nueva_posicion)
+        self.mapa.marcar_visitada(explorador.habitacion_actual)
+        return True
+
+    def interactuar(self, explorador: 'Explorador') -> str:
+        if not self.resolver(explorador):
+             return "[bold yellow]El portal parpadea[/bold yellow], pero no encuentra destino."
         
-        return f"[bold magenta]¡TELETRANSPORTE![/bold magenta] El portal te ha movido a {nueva_posicion}."
+        return f"[bold magenta]¡TELETRANSPORTE![/bold magenta] El portal te ha movido a {explorador.posicion_actual}."
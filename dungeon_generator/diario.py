@@ -0,0 +1,189 @@
+"""Autoguardado incremental: instantánea .dgn + diario de cambios de solo anexado.
+
+El diario vive junto a la instantánea ('partida.dgn' -> 'partida.dgn.log') y
+guarda registros pequeños: cabecera _REGISTRO (tipo, largo) + datos. Todos los
+registros llevan valores absolutos (posición, vida, índice en el inventario),
+así que reaplicarlos sobre una instantánea más nueva no cambia el resultado:
+la compactación no necesita coordinar la escritura de ambos archivos.
+
+El generador de combate no se registra turno a turno: al reanudar, sigue desde
+el estado guardado en la última instantánea.
+"""
+import os
+import struct
+from typing import TYPE_CHECKING, Tuple
+
+from .binario import guardar_binario, cargar_binario
+from .objeto import Objeto
+
+if TYPE_CHECKING:
+    from .explorador import Explorador
+    from .habitacion import Habitacion
+    from .mapa import Mapa
+
+EXTENSION_DIARIO = '.log'
+
+_REGISTRO = struct.Struct('<BH')     # tipo, largo de los datos
+_POSICION = struct.Struct('<ii')
+_VIDA = struct.Struct('<ii')         # vida, vida_max
+_ENTERO = struct.Struct('<i')
+_OBJETO = struct.Struct('<IiHH')     # índice en el inventario, valor, largos de nombre y descripción
+
+MOVER, VISITADA, CONSUMIDO, VIDA, BONIFICACION, OBJETO = range(1, 7)
+
+
+def ruta_diario(archivo: str) -> str:
+    return archivo + EXTENSION_DIARIO
+
+
+class Diario:
+    """Registra los cambios de cada turno al final del diario y compacta cada 'compactar_cada' registros.
+
+    Las visitas y el contenido consumido llegan como avisos del mapa (Mapa.observar)
+    en el momento en que ocurren, también en habitaciones de paso como la de un
+    portal; registrar() solo compara el explorador con lo último anotado, así que
+    su coste no depende del tamaño del mapa.
+    """
+
+    def __init__(self, mapa: 'Mapa', explorador: 'Explorador', archivo: str, compactar_cada: int = 4096):
+        self.mapa = mapa
+        self.explorador = explorador
+        self.archivo = archivo
+        self.compactar_cada = compactar_cada
+        self.registros = 0
+        self.compactaciones = 0
+        self._log = None
+        self.compactar()
+        mapa.observar(self._al_cambiar)
+
+    # --- INSTANTÁNEAS ---
+    def compactar(self):
+        """Escribe una instantánea completa y vacía el diario."""
+        guardar_binario(self.mapa, self.explorador, self.archivo)
+        if self._log is not None:
+            self._log.close()
+        self._log = open(ruta_diario(self.archivo), 'wb')
+        self.registros = 0
+        self.compactaciones += 1
+        self._tomar_referencia()
+
+    def _tomar_referencia(self):
+        explorador = self.explorador
+        self._posicion = explorador.posicion_actual
+        self._vida = (explorador.vida, explorador.vida_max)
+        self._bonificacion = explorador.bonificacion_combate
+        self._n_inventario = len(explorador.inventario)
+
+    def cambiar_mapa(self, mapa: 'Mapa'):
+        """Sigue la partida en otro mapa (otro piso): instantánea nueva y diario vacío."""
+        self.mapa.dejar_de_observar(self._al_cambiar)
+        self.mapa = mapa
+        self.compactar()
+        mapa.observar(self._al_cambiar)
+
+    def cerrar(self):
+        self.mapa.dejar_de_observar(self._al_cambiar)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    # --- REGISTRO ---
+    def _anotar(self, tipo: int, datos: bytes):
+        self._log.write(_REGISTRO.pack(tipo, len(datos)) + datos)
+        self.registros += 1
+
+    def _al_cambiar(self, habitacion: 'Habitacion', cambio: str):
+        if cambio == "visitada":
+            self._anotar(VISITADA, _POSICION.pack(habitacion.x, habitacion.y))
+        elif cambio == "contenido" and habitacion.contenido is None:
+            self._anotar(CONSUMIDO, _POSICION.pack(habitacion.x, habitacion.y))
+
+    def registrar(self):
+        """Autoguardado del turno: anota solo lo que cambió desde la última llamada."""
+        explorador = self.explorador
+        posicion = explorador.posicion_actual
+        if posicion != self._posicion:
+            self._anotar(MOVER, _POSICION.pack(*posicion))
+            self._posicion = posicion
+
+        vida = (explorador.vida, explorador.vida_max)
+        if vida != self._vida:
+            self._anotar(VIDA, _VIDA.pack(*vida))
+            self._vida = vida
+        if explorador.bonificacion_combate != self._bonificacion:
+            self._bonificacion = explorador.bonificacion_combate
+            self._anotar(BONIFICACION, _ENTERO.pack(self._bonificacion))
+        inventario = explorador.inventario
+        while self._n_inventario < len(inventario):
+            obj = inventario[self._n_inventario]
+            nombre, descripcion = obj.nombre.encode('utf-8'), obj.descripcion.encode('utf-8')
+            self._anotar(OBJETO, _OBJETO.pack(self._n_inventario, obj.valor, len(nombre), len(descripcion))
+                         + nombre + descripcion)
+            self._n_inventario += 1
+
+        self._log.flush()
+        if self.registros >= self.compactar_cada:
+            self.compactar()
+
+
+# --- REPRODUCCIÓN ---
+
+def reproducir_diario(mapa: 'Mapa', explorador: 'Explorador', archivo: str) -> int:
+    """Aplica el diario de 'archivo' sobre la partida cargada; devuelve los registros aplicados.
+
+    Un registro final incompleto (corte durante la escritura) se ignora.
+    """
+    try:
+        with open(ruta_diario(archivo), 'rb') as f:
+            datos = f.read()
+    except FileNotFoundError:
+        return 0
+
+    aplicados = 0
+    pos = 0
+    while pos + _REGISTRO.size <= len(datos):
+        tipo, largo = _REGISTRO.unpack_from(datos, pos)
+        inicio = pos + _REGISTRO.size
+        if inicio + largo > len(datos):
+            break
+        cuerpo = datos[inicio:inicio + largo]
+        pos = inicio + largo
+
+        if tipo == MOVER:
+            explorador.posicion_actual = _POSICION.unpack(cuerpo)
+        elif tipo == VISITADA:
+            mapa.marcar_visitada(mapa.obtener_habitacion(*_POSICION.unpack(cuerpo)))
+        elif tipo == CONSUMIDO:
+            mapa.retirar_contenido(mapa.obtener_habitacion(*_POSICION.unpack(cuerpo)))
+        elif tipo == VIDA:
+            explorador.vida, explorador.vida_max = _VIDA.unpack(cuerpo)
+        elif tipo == BONIFICACION:
+            explorador.bonificacion_combate = _ENTERO.unpack(cuerpo)[0]
+        elif tipo == OBJETO:
+            indice, valor, largo_nombre, largo_desc = _OBJETO.unpack_from(cuerpo)
+            texto = cuerpo[_OBJETO.size:]
+            if indice == len(explorador.inventario):
+                explorador.inventario.append(Objeto(
+                    nombre=texto[:largo_nombre].decode('utf-8'),
+                    valor=valor,
+                    descripcion=texto[largo_nombre:largo_nombre + largo_desc].decode('utf-8'),
+                ))
+        else:
+            raise ValueError(f"Tipo de registro desconocido en el diario: {tipo}")
+        aplicados += 1
+    return aplicados
+
+
+def cargar_con_diario(archivo: str) -> Tuple['Mapa', 'Explorador']:
+    """Carga la instantánea .dgn y reaplica su diario, si existe."""
+    mapa, explorador = cargar_binario(archivo)
+    reproducir_diario(mapa, explorador, archivo)
+    return mapa, explorador
+
+
+def descartar_diario(archivo: str):
+    """Borra el diario de 'archivo' (tras escribir una instantánea completa por otra vía)."""
+    try:
+        os.remove(ruta_diario(archivo))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,166 @@
+"""Índice espacial de habitaciones: rejilla de cubetas de tamano x tamano celdas.
+
+Cada cubeta guarda las coordenadas de sus habitaciones y, aparte, las de cada
+tipo de contenido. Solo existen las cubetas con algo adentro, así que sirve
+también para mapas sin límites (coordenadas negativas incluidas).
+
+    rectangulo / radio   recorren las cubetas que tocan la zona (o solo las
+                         ocupadas, si son menos) y filtran las de los bordes
+    cercanas             anillos de cubetas alrededor del punto hasta que el
+                         anillo siguiente ya no puede mejorar las k encontradas
+
+Las distancias son Manhattan, como distancia_manhattan en el resto del juego.
+El mapa lo mantiene al crear habitaciones y al asignar o retirar contenido
+(ver Mapa.indice_espacial).
+"""
+import heapq
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+TAMANO_CUBETA = 8
+
+Celda = Tuple[int, int]
+Cubetas = Dict[Celda, Set[Celda]]
+
+
+def _anillo(bx: int, by: int, r: int, limites: List[int]) -> Iterator[Celda]:
+    """Cubetas a distancia de Chebyshev exactamente r de (bx, by), recortadas a 'limites'."""
+    lx0, ly0, lx1, ly1 = limites
+    if r == 0:
+        yield bx, by
+        return
+    desde, hasta = max(bx - r, lx0), min(bx + r, lx1)
+    for cy in (by - r, by + r):
+        if ly0 <= cy <= ly1:
+            for cx in range(desde, hasta + 1):
+                yield cx, cy
+    desde, hasta = max(by - r + 1, ly0), min(by + r - 1, ly1)
+    for cx in (bx - r, bx + r):
+        if lx0 <= cx <= lx1:
+            for cy in range(desde, hasta + 1):
+                yield cx, cy
+
+
+class IndiceEspacial:
+    """Habitaciones y contenido por cubetas, para consultas por zona y vecinos más cercanos."""
+
+    def __init__(self, tamano: int = TAMANO_CUBETA):
+        self.tamano = tamano
+        self._habitaciones: Cubetas = {}
+        self._por_tipo: Dict[str, Cubetas] = {}
+        # Cubetas extremas ocupadas alguna vez (clave None = habitaciones): acotan las búsquedas.
+        # Solo crecen; que queden grandes tras consumir contenido no cambia los resultados
+        self._limites: Dict[Optional[str], List[int]] = {}
+
+    # --- MANTENIMIENTO ---
+    def _poner(self, cubetas: Cubetas, clave_limites: Optional[str], x: int, y: int):
+        t = self.tamano
+        bx, by = x // t, y // t
+        celdas = cubetas.get((bx, by))
+        if celdas is None:
+            celdas = cubetas[bx, by] = set()
+            limites = self._limites.get(clave_limites)
+            if limites is None:
+                self._limites[clave_limites] = [bx, by, bx, by]
+            else:
+                limites[0], limites[1] = min(limites[0], bx), min(limites[1], by)
+                limites[2], limites[3] = max(limites[2], bx), max(limites[3], by)
+        celdas.add((x, y))
+
+    def agregar(self, x: int, y: int, tipo: Optional[str] = None):
+        """Habitación nueva en (x, y), con el tipo de su contenido si tiene."""
+        self._poner(self._habitaciones, None, x, y)
+        if tipo is not None:
+            self.agregar_contenido(x, y, tipo)
+
+    def agregar_contenido(self, x: int, y: int, tipo: str):
+        self._poner(self._por_tipo.setdefault(tipo, {}), tipo, x, y)
+
+    def quitar_contenido(self, x: int, y: int, tipo: str):
+        cubetas = self._por_tipo.get(tipo)
+        if cubetas is None:
+            return
+        clave = (x // self.tamano, y // self.tamano)
+        celdas = cubetas.get(clave)
+        if celdas is not None:
+            celdas.discard((x, y))
+            if not celdas:
+                del cubetas[clave]
+
+    def _cubetas(self, tipo: Optional[str]) -> Optional[Cubetas]:
+        return self._habitaciones if tipo is None else self._por_tipo.get(tipo)
+
+    # --- CONSULTAS ---
+    def rectangulo(self, x0: int, y0: int, x1: int, y1: int, tipo: Optional[str] = None) -> List[Celda]:
+        """Habitaciones (o con contenido 'tipo') con x0 <= x <= x1 e y0 <= y <= y1, sin orden particular."""
+        cubetas = self._cubetas(tipo)
+        if not cubetas or x0 > x1 or y0 > y1:
+            return []
+        t = self.tamano
+        limites = self._limites[tipo]
+        bx0, by0 = max(x0 // t, limites[0]), max(y0 // t, limites[1])
+        bx1, by1 = min(x1 // t, limites[2]), min(y1 // t, limites[3])
+        if bx0 > bx1 or by0 > by1:
+            return []
+
+        if (bx1 - bx0 + 1) * (by1 - by0 + 1) <= len(cubetas):
+            claves = ((bx, by) for by in range(by0, by1 + 1) for bx in range(bx0, bx1 + 1))
+        else:
+            # Zona grande sobre un índice disperso: más barato recorrer solo las cubetas ocupadas
+            claves = (clave for clave in cubetas if bx0 <= clave[0] <= bx1 and by0 <= clave[1] <= by1)
+
+        resultado: List[Celda] = []
+        for bx, by in claves:
+            celdas = cubetas.get((bx, by))
+            if not celdas:
+                continue
+            if x0 <= bx * t and bx * t + t - 1 <= x1 and y0 <= by * t and by * t + t - 1 <= y1:
+                resultado.extend(celdas)  # cubeta entera dentro del rectángulo
+            else:
+                resultado.extend(c for c in celdas if x0 <= c[0] <= x1 and y0 <= c[1] <= y1)
+        return resultado
+
+    def radio(self, x: int, y: int, r: int, tipo: Optional[str] = None) -> List[Celda]:
+        """Habitaciones (o con contenido 'tipo') a distancia Manhattan <= r de (x, y), sin orden particular."""
+        return [c for c in self.rectangulo(x - r, y - r, x + r, y + r, tipo)
+                if abs(c[0] - x) + abs(c[1] - y) <= r]
+
+    def cercanas(self, x: int, y: int, tipo: Optional[str] = None, k: int = 1) -> List[Celda]:
+        """Las k habitaciones (o con contenido 'tipo') más cercanas a (x, y), de la más cercana a la más lejana.
+
+        Los empates se resuelven por (y, x), así que el resultado no depende del orden de inserción.
+        """
+        cubetas = self._cubetas(tipo)
+        if not cubetas or k <= 0:
+            return []
+        t = self.tamano
+        bx, by = x // t, y // t
+        limites = self._limites[tipo]
+        # Los anillos anteriores a 'primero' no tocan la zona ocupada; después de 'alcance' ya no queda nada
+        primero = max(0, limites[0] - bx, bx - limites[2], limites[1] - by, by - limites[3])
+        alcance = max(bx - limites[0], limites[2] - bx, by - limites[1], limites[3] - by)
+
+        # Montículo de máximos con las k mejores: (-distancia, -y, -x)
+        mejores: List[Tuple[int, int, int]] = []
+        for r in range(primero, alcance + 1):
+            # Toda celda del anillo r está a distancia >= (r - 1) * t + 1 del punto
+            if len(mejores) == k and -mejores[0][0] <= (r - 1) * t:
+                break
+            lleno = len(mejores) == k
+            for clave in _anillo(bx, by, r, limites):
+                celdas = cubetas.get(clave)
+                if not celdas:
+                    continue
+                if lleno:
+                    # Distancia mínima del punto a la cubeta: si no mejora a la peor, no se miran sus celdas
+                    x0, y0 = clave[0] * t, clave[1] * t
+                    minima = max(0, x0 - x, x - x0 - t + 1) + max(0, y0 - y, y - y0 - t + 1)
+                    if minima > -mejores[0][0]:
+                        continue
+                for cx, cy in celdas:
+                    candidata = (-(abs(cx - x) + abs(cy - y)), -cy, -cx)
+                    if len(mejores) < k:
+                        heapq.heappush(mejores, candidata)
+                        lleno = len(mejores) == k
+                    elif candidata > mejores[0]:
+                        heapq.heapreplace(mejores, candidata)
+        return [(-mx, -my) for _, my, mx in sorted(mejores, reverse=True)]
@@ -1,6 +1,5 @@
 
 from .contenido import ContenidoHabitacion
-import random
 
 
 
@@ -22,7 +21,6 @@ class Evento(ContenidoHabitacion):
 class EventoTeletransporte(Evento):
     """Teletransporta al explorador a una habitación visitada aleatoria."""
     def __init__(self, mapa):
-        super().__init__(tipo='evento', descripcion="Un portal inestable te espera.")
         self.mapa = mapa # Necesita la referencia del mapa para teletransportar
         
     @property
@@ -30,17 +28,15 @@ class EventoTeletransporte(Evento):
         return "Un portal inestable te espera: ¡podrías terminar en cualquier lugar!"
 
     def interactuar(self, explorador) -> str:
-        habitaciones_visitadas = [
-            h for h in self.mapa.habitaciones.values() 
-            if h.visitada and h.current_pos != explorador.current_pos
-        ]
+        # Sorteo O(1) entre las visitadas, sin contar la habitación actual
+        destino = self.mapa.posicion_aleatoria(explorador.rng, solo_visitadas=True,
+                                               excluir=explorador.posicion_actual)
         
-        if habitaciones_visitadas:
-            destino = random.choice(habitaciones_visitadas)
-            
+        if destino is not None:
             # Mover el explorador directamente (sin usar el método mover)
-            explorador.current_pos = (destino.x, destino.y)
-            return f"¡Un rayo de energía te golpea! Has sido teletransportado a ({destino.x}, {destino.y})."
+            explorador.posicion_actual = destino
+            self.mapa.al_entrar(*destino)
+            return f"¡Un rayo de energía te golpea! Has sido teletransportado a {destino}."
         else:
             return "El portal parpadea pero no encuentra un destino viable. No pasa nada."
 
@@ -1,7 +1,10 @@
 
 
-from typing import Tuple, List, Optional, TYPE_CHECKING
+import random
+from typing import Callable, Tuple, List, Optional, TYPE_CHECKING
 from .objeto import Objeto 
+from .habitacion import DELTAS
+from .salida import avisar
 
 if TYPE_CHECKING:
     from .mapa import Mapa
@@ -9,12 +12,18 @@ if TYPE_CHECKING:
 
 class Explorador:
     """Representa al personaje que explora el dungeon."""
+    __slots__ = ('vida', 'vida_max', 'inventario', 'mapa', 'rng', 'salida', 'posicion_actual', 'bonificacion_combate')
 
-    def __init__(self, mapa: 'Mapa', vida: int = 5):
+    def __init__(self, mapa: 'Mapa', vida: int = 5, rng: Optional[random.Random] = None,
+                 salida: Optional[Callable[[str], None]] = avisar):
         self.vida = vida
         self.vida_max = vida 
         self.inventario: List[Objeto] = []
         self.mapa = mapa
+        # Generador de combate y teletransportes; por defecto el flujo 'combate' del mapa
+        self.rng = rng if rng is not None else mapa.flujos.combate
+        # Destino de los avisos (muerte); None en simulaciones sin salida
+        self.salida = salida
         
         # Esta línea ahora funciona porque Habitacion tiene la propiedad 'coordenadas'
         self.posicion_actual: Tuple[int, int] = mapa.habitacion_inicial.coordenadas if mapa.habitacion_inicial else (0, 0)
@@ -33,10 +42,10 @@ class Explorador:
 
     def mover(self, direccion: str) -> bool:
         """Moverse entre habitaciones conectadas."""
-        hab_actual = self.habitacion_actual
-        if direccion in hab_actual.conexiones:
-            nueva_hab = hab_actual.conexiones[direccion]
+        nueva_hab = self.habitacion_actual.vecina(direccion) if direccion in DELTAS else None
+        if nueva_hab is not None:
             self.posicion_actual = nueva_hab.coordenadas
+            self.mapa.al_entrar(*self.posicion_actual)
             
             if self.bonificacion_combate > 0:
                 self.bonificacion_combate -= 1
@@ -47,13 +56,24 @@ class Explorador:
     def explorar_habitacion(self) -> str:
         """Interactuar con el contenido de la habitación."""
         hab_actual = self.habitacion_actual
-        hab_actual.visitada = True
+        self.mapa.marcar_visitada(hab_actual)
         
         if hab_actual.contenido:
             return hab_actual.contenido.interactuar(self)
         
         return "La habitación está vacía. No hay nada que hacer aquí."
 
+    def resolver_habitacion(self) -> bool:
+        """Como explorar_habitacion, pero sin construir mensajes. True si había contenido."""
+        hab_actual = self.habitacion_actual
+        self.mapa.marcar_visitada(hab_actual)
+        
+        contenido = hab_actual.contenido
+        if contenido:
+            contenido.resolver(self)
+            return True
+        return False
+
     def obtener_habitaciones_adyacentes(self) -> List[str]:
         """Listar direcciones disponibles."""
         return list(self.habitacion_actual.conexiones.keys())
@@ -61,5 +81,5 @@ class Explorador:
     def recibir_dano(self, cantidad: int):
         """Reducir vida del explorador."""
         self.vida = max(0, self.vida - cantidad)
-        if not self.esta_vivo:
-            print("[bold red]¡HAS MUERTO![/bold red] Tu aventura termina aquí.")
+        if not self.esta_vivo and self.salida is not None:
+            self.salida("[bold red]¡HAS MUERTO![/bold red] Tu aventura termina aquí.")
@@ -4,15 +4,30 @@ from typing import Dict, Tuple, Optional, TYPE_CHECKING
 if TYPE_CHECKING:
     from .contenido import ContenidoHabitacion
 
+# Direcciones cardinales, sus desplazamientos y el bit que ocupan en una máscara de conexiones
+DIRECCIONES: Tuple[str, ...] = ("norte", "sur", "este", "oeste")
+DELTAS: Dict[str, Tuple[int, int]] = {"norte": (0, -1), "sur": (0, 1), "este": (1, 0), "oeste": (-1, 0)}
+OPUESTOS: Dict[str, str] = {"norte": "sur", "sur": "norte", "este": "oeste", "oeste": "este"}
+BITS_DIRECCION: Dict[str, int] = {"norte": 1, "sur": 2, "este": 4, "oeste": 8}
+
 class Habitacion:
-    """Representa una celda en el mapa del dungeon."""
+    """Representa una celda en el mapa del dungeon.
+
+    Sin __dict__: las vecinas ocupan cuatro ranuras fijas (una por dirección) y
+    'conexiones' es una vista que se arma al leerla.
+    """
+    __slots__ = ('id', 'x', 'y', 'inicial', 'contenido', 'visitada', 'distancia_manhattan', 'estado',
+                 '_norte', '_sur', '_este', '_oeste')
     
     def __init__(self, id: int, x: int, y: int, inicial: bool = False):
         self.id = id
         self.x = x
         self.y = y
         self.inicial = inicial
-        self.conexiones: Dict[str, 'Habitacion'] = {}
+        self._norte: Optional['Habitacion'] = None
+        self._sur: Optional['Habitacion'] = None
+        self._este: Optional['Habitacion'] = None
+        self._oeste: Optional['Habitacion'] = None
         self.contenido: Optional['ContenidoHabitacion'] = None
         self.visitada = False
         self.distancia_manhattan = 0
@@ -23,4 +38,29 @@ class Habitacion:
         
         return (self.x, self.y)
 
- 
+    @property
+    def conexiones(self) -> Dict[str, 'Habitacion']:
+        """Vecinas conectadas por dirección, en el orden de DIRECCIONES (modificarlo no cambia nada)."""
+        conexiones = {}
+        if self._norte is not None: conexiones["norte"] = self._norte
+        if self._sur is not None: conexiones["sur"] = self._sur
+        if self._este is not None: conexiones["este"] = self._este
+        if self._oeste is not None: conexiones["oeste"] = self._oeste
+        return conexiones
+
+    @conexiones.setter
+    def conexiones(self, conexiones: Dict[str, 'Habitacion']):
+        for direccion in DIRECCIONES:
+            setattr(self, _RANURAS[direccion], conexiones.get(direccion))
+
+    def vecina(self, direccion: str) -> Optional['Habitacion']:
+        """Habitación conectada en 'direccion', o None."""
+        return getattr(self, _RANURAS[direccion])
+
+    def conectar(self, direccion: str, vecina: Optional['Habitacion']):
+        """Enlaza (solo en este sentido) la vecina de 'direccion'; None la desconecta."""
+        setattr(self, _RANURAS[direccion], vecina)
+
+
+# Atributo que guarda la vecina de cada dirección
+_RANURAS: Dict[str, str] = {direccion: "_" + direccion for direccion in DIRECCIONES}
@@ -0,0 +1,182 @@
+"""Instrumentación opcional: tramos de tiempo con nombre y contadores.
+
+Desactivada (lo normal) cuesta una comparación con None por punto medido, más
+la llamada a la envoltura en las funciones decoradas con @medido: tramo()
+devuelve un administrador de contexto vacío compartido y contar() no hace
+nada. Para activarla:
+
+    with instrumentar() as sesion:
+        mapa, explorador = inicializar_juego()
+    sesion.guardar("perfil.json")                 # resumen + tramos + contadores
+    sesion.guardar("perfil.trace.json", "chrome") # abrir en chrome://tracing o Perfetto
+
+Con memoria=True cada tramo anota además los bytes asignados (tracemalloc),
+lo que hace más lento el código medido.
+"""
+import functools
+import os
+import time
+from _thread import get_ident
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Sesión activa; None cuando la instrumentación está apagada. El código caliente la consulta directamente
+sesion: Optional['Sesion'] = None
+
+
+class _TramoNulo:
+    """Administrador de contexto que no hace nada (instrumentación apagada)."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _TramoNulo()
+
+
+class _Tramo:
+    __slots__ = ('sesion', 'nombre', 'args', 'inicio', 'memoria_inicial')
+
+    def __init__(self, sesion: 'Sesion', nombre: str, args: Dict[str, Any]):
+        self.sesion = sesion
+        self.nombre = nombre
+        self.args = args
+
+    def __enter__(self):
+        if self.sesion._tracemalloc is not None:
+            self.memoria_inicial = self.sesion._tracemalloc.get_traced_memory()[0]
+        self.inicio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        fin = time.perf_counter_ns()
+        if self.sesion._tracemalloc is not None:
+            self.args["bytes_asignados"] = self.sesion._tracemalloc.get_traced_memory()[0] - self.memoria_inicial
+        self.sesion._cerrar_tramo(self.nombre, self.inicio, fin, self.args)
+        return False
+
+
+class Sesion:
+    """Tramos y contadores recogidos mientras la instrumentación está activa."""
+
+    def __init__(self, memoria: bool = False):
+        self.memoria = memoria
+        self._tracemalloc = None
+        if memoria:
+            # Se importa solo si se pide: tracemalloc arrastra más módulos que todo el resto
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+        self._detener_tracemalloc = False
+        self.origen = time.perf_counter_ns()
+        # (nombre, inicio_ns, duracion_ns, hilo, args)
+        self.tramos: List[tuple] = []
+        self.contadores: Counter = Counter()
+
+    def tramo(self, nombre: str, **args) -> _Tramo:
+        return _Tramo(self, nombre, args)
+
+    def contar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] += cantidad
+
+    def _cerrar_tramo(self, nombre: str, inicio: int, fin: int, args: Dict[str, Any]):
+        self.tramos.append((nombre, inicio - self.origen, fin - inicio, get_ident(), args))
+
+    # --- EXPORTACIÓN ---
+    def resumen(self) -> Dict[str, Dict[str, float]]:
+        """nombre -> llamadas y milisegundos totales, ordenado de mayor a menor tiempo."""
+        totales: Dict[str, List[float]] = {}
+        for nombre, _, duracion, _, _ in self.tramos:
+            acumulado = totales.setdefault(nombre, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += duracion / 1e6
+        return {nombre: {"llamadas": llamadas, "total_ms": round(total, 3)}
+                for nombre, (llamadas, total) in sorted(totales.items(), key=lambda par: -par[1][1])}
+
+    def a_dict(self) -> dict:
+        return {
+            "resumen": self.resumen(),
+            "contadores": dict(self.contadores),
+            "tramos": [{"nombre": nombre, "inicio_us": inicio / 1e3, "duracion_us": duracion / 1e3, "args": args}
+                       for nombre, inicio, duracion, _, args in self.tramos],
+        }
+
+    def a_chrome(self) -> dict:
+        """Formato Trace Event de Chrome: un evento completo ('X') por tramo y los contadores al final."""
+        pid = os.getpid()
+        eventos = [{"name": nombre, "ph": "X", "ts": inicio / 1e3, "dur": duracion / 1e3,
+                    "pid": pid, "tid": hilo, "args": args}
+                   for nombre, inicio, duracion, hilo, args in self.tramos]
+        fin = max((inicio + duracion for _, inicio, duracion, _, _ in self.tramos), default=0)
+        eventos.extend({"name": nombre, "ph": "C", "ts": fin / 1e3, "pid": pid, "args": {"valor": valor}}
+                       for nombre, valor in self.contadores.items())
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def guardar(self, archivo: str, formato: Optional[str] = None):
+        """Escribe la sesión en JSON; formato 'chrome' (o un archivo '*.trace.json') para el visor de trazas."""
+        if formato is None:
+            formato = "chrome" if archivo.endswith(".trace.json") else "json"
+        import json
+
+        datos = self.a_chrome() if formato == "chrome" else self.a_dict()
+        with open(archivo, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=1)
+
+
+# --- API DEL MÓDULO ---
+
+def tramo(nombre: str, **args):
+    """with tramo("mapa.generar_estructura"): ... (no hace nada si no hay sesión activa)."""
+    if sesion is None:
+        return _NULO
+    return sesion.tramo(nombre, **args)
+
+
+def contar(nombre: str, cantidad: int = 1):
+    if sesion is not None:
+        sesion.contadores[nombre] += cantidad
+
+
+def medido(nombre: str) -> Callable:
+    """Decorador: cada llamada es un tramo 'nombre'. Apagado solo agrega la llamada a la envoltura."""
+    def decorador(funcion: Callable) -> Callable:
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if sesion is None:
+                return funcion(*args, **kwargs)
+            with sesion.tramo(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def activar(memoria: bool = False) -> Sesion:
+    global sesion
+    sesion = Sesion(memoria)
+    if memoria and not sesion._tracemalloc.is_tracing():
+        # Solo se detiene al desactivar si la sesión fue la que lo encendió
+        sesion._detener_tracemalloc = True
+        sesion._tracemalloc.start()
+    return sesion
+
+
+def desactivar() -> Optional[Sesion]:
+    """Apaga la instrumentación y devuelve la sesión que estaba activa."""
+    global sesion
+    anterior, sesion = sesion, None
+    if anterior is not None and anterior._detener_tracemalloc:
+        anterior._tracemalloc.stop()
+    return anterior
+
+
+@contextmanager
+def instrumentar(memoria: bool = False) -> Iterator[Sesion]:
+    actual = activar(memoria)
+    try:
+        yield actual
+    finally:
+        desactivar()
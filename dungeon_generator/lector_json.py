@@ -0,0 +1,212 @@
+"""Carga incremental de partidas JSON grandes.
+
+El archivo se lee por bloques y la sección 'habitaciones' se decodifica una
+habitación a la vez: cada registro se convierte directamente en una Habitacion
+(o en una celda de RejillaCompacta) y se descarta. La memoria usada por el
+análisis depende del tamaño de un registro, no del archivo.
+"""
+import json
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+from .aleatorio import FlujosAleatorios
+from .contenido import ContenidoHabitacion, Tesoro, Monstruo, Jefe, Trampa, Curacion, Portal
+from .evento import EventoTeletransporte, EventoCuracion, EventoTrampa
+from .explorador import Explorador
+from .habitacion import Habitacion, OPUESTOS, BITS_DIRECCION
+from .mapa import Mapa
+from .objeto import Objeto
+
+# Clases que pueden aparecer como '__clase__' dentro de una habitación o del inventario
+CLASES_CONTENIDO = {clase.__name__: clase for clase in (
+    Tesoro, Monstruo, Jefe, Trampa, Curacion, Portal,
+    EventoTeletransporte, EventoCuracion, EventoTrampa, Objeto,
+)}
+
+# Se guardan como los argumentos de su constructor (ContenidoHabitacion.parametros)
+_POR_CONSTRUCTOR = (Tesoro, Monstruo, Jefe, Trampa, Curacion, Objeto)
+
+_BLANCOS = ' \t\n\r'
+
+
+class LectorJSON:
+    """Recorre un documento JSON por bloques, entregando claves y valores a pedido."""
+
+    def __init__(self, entrada: TextIO, tamano_bloque: int = 1 << 16):
+        self._entrada = entrada
+        self._tamano_bloque = tamano_bloque
+        self._decodificador = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._fin = False
+
+    def _llenar(self) -> bool:
+        """Agrega un bloque al búfer; False si ya no queda nada por leer."""
+        if self._fin:
+            return False
+        if self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        # Si un valor no cabe, el siguiente bloque es al menos tan grande como lo pendiente
+        bloque = self._entrada.read(max(self._tamano_bloque, len(self._buf) - self._pos))
+        if not bloque:
+            self._fin = True
+            return False
+        self._buf += bloque
+        return True
+
+    def _caracter(self) -> str:
+        """Siguiente carácter significativo, sin consumirlo ('' al final del documento)."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _BLANCOS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._llenar():
+                return ''
+
+    def esperar(self, simbolo: str):
+        caracter = self._caracter()
+        if caracter != simbolo:
+            raise ValueError(f"JSON inesperado: se esperaba '{simbolo}' y se encontró '{caracter}'.")
+        self._pos += 1
+
+    def valor(self) -> Any:
+        """Decodifica el siguiente valor completo."""
+        while True:
+            self._caracter()
+            try:
+                valor, fin = self._decodificador.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._llenar():
+                    raise
+                continue
+            # Un número al borde del búfer podría seguir en el próximo bloque
+            if fin == len(self._buf) and self._llenar():
+                continue
+            self._pos = fin
+            return valor
+
+    def claves(self) -> Iterator[str]:
+        """Claves del objeto cuya '{' ya se consumió. Tras cada clave hay que leer su valor."""
+        primera = True
+        while True:
+            caracter = self._caracter()
+            if caracter == '}':
+                self._pos += 1
+                return
+            if not primera:
+                self.esperar(',')
+            primera = False
+            clave = self.valor()
+            self.esperar(':')
+            yield clave
+
+
+def parsear_posicion(texto: str) -> Tuple[int, int]:
+    """'(3, 4)' -> (3, 4) sin evaluar código."""
+    x, y = texto.strip().strip('()').split(',')
+    return int(x), int(y)
+
+
+def _decodificar(valor: Any, mapa: Mapa) -> Any:
+    """Reconstruye contenido y objetos guardados como {'__clase__', '__data__'}."""
+    if isinstance(valor, list):
+        return [_decodificar(v, mapa) for v in valor]
+    if not isinstance(valor, dict):
+        return valor
+    clase = CLASES_CONTENIDO.get(valor.get('__clase__'))
+    if clase is None:
+        return {k: _decodificar(v, mapa) for k, v in valor.items()}
+    datos = {atributo: _decodificar(dato, mapa) for atributo, dato in valor['__data__'].items()}
+    if clase is Portal:
+        return Portal(mapa)
+    if clase in _POR_CONSTRUCTOR:
+        return clase(**datos)
+    # Eventos heredados: sin constructor utilizable, se restauran atributo por atributo
+    instancia = object.__new__(clase)
+    for atributo, dato in datos.items():
+        setattr(instancia, atributo, dato)
+    if isinstance(instancia, EventoTeletransporte):
+        instancia.mapa = mapa
+    return instancia
+
+
+def _crear_mapa(datos: dict, compacto: bool) -> Mapa:
+    flujos = FlujosAleatorios.desde_estado(datos['flujos']) if 'flujos' in datos else FlujosAleatorios()
+    mapa = Mapa(datos['ancho'], datos['alto'], compacto=compacto, flujos=flujos)
+    mapa.habitacion_id_counter = datos.get('habitacion_id_counter', 1)
+    return mapa
+
+
+def _agregar_habitacion(mapa: Mapa, x: int, y: int, datos: dict):
+    """Crea la habitación y la enlaza con las vecinas que ya llegaron (las demás la enlazarán a ella)."""
+    contenido: Optional[ContenidoHabitacion] = _decodificar(datos.get('contenido'), mapa)
+    rejilla = mapa._rejilla
+    if rejilla is not None:
+        idx = rejilla.indice(x, y)
+        rejilla.agregar(idx, datos['id'], datos.get('inicial', False))
+        mascara = 0
+        for direccion in datos.get('conexiones', ()):
+            mascara |= BITS_DIRECCION[direccion]
+        rejilla.conexiones[idx] = mascara
+        hab = rejilla.vista(idx)
+    else:
+        hab = Habitacion(datos['id'], x, y, datos.get('inicial', False))
+        habitaciones = mapa.habitaciones
+        habitaciones[(x, y)] = hab
+        for direccion, (vx, vy) in datos.get('conexiones', {}).items():
+            vecina = habitaciones.get((vx, vy))
+            if vecina is not None:
+                hab.conectar(direccion, vecina)
+                vecina.conectar(OPUESTOS[direccion], hab)
+    hab.visitada = datos.get('visitada', False)
+    hab.distancia_manhattan = datos.get('distancia_manhattan', 0)
+    hab.estado = datos.get('estado', "Vacía")
+    hab.contenido = contenido
+
+
+def cargar_json_incremental(archivo: str, compacto: bool = False,
+                            tamano_bloque: int = 1 << 16) -> Tuple[Mapa, Explorador]:
+    """Carga una partida guardada por guardar_partida(..., '*.json') sin leer el archivo entero.
+
+    Con compacto=True las habitaciones van directo a columnas de RejillaCompacta,
+    lo más barato para analizar muchas partidas archivadas.
+    """
+    datos_mapa = datos_explorador = None
+    mapa: Optional[Mapa] = None
+    with open(archivo, 'r', encoding='utf-8') as f:
+        lector = LectorJSON(f, tamano_bloque)
+        lector.esperar('{')
+        for clave in lector.claves():
+            if clave == 'mapa':
+                datos_mapa = lector.valor()['__data__']
+            elif clave == 'explorador':
+                datos_explorador = lector.valor()['__data__']
+            elif clave == 'habitaciones':
+                if datos_mapa is None:
+                    raise ValueError(f"{archivo}: la sección 'mapa' debe preceder a 'habitaciones'.")
+                mapa = _crear_mapa(datos_mapa, compacto)
+                lector.esperar('{')
+                for posicion in lector.claves():
+                    x, y = parsear_posicion(posicion)
+                    _agregar_habitacion(mapa, x, y, lector.valor()['__data__'])
+            else:
+                lector.valor()
+
+    if mapa is None or datos_explorador is None:
+        raise ValueError(f"{archivo}: faltan las secciones 'mapa', 'explorador' o 'habitaciones'.")
+
+    inicial, jefe = datos_mapa.get('habitacion_inicial_pos'), datos_mapa.get('habitacion_jefe_pos')
+    mapa.habitacion_inicial = mapa.obtener_habitacion(*inicial) if inicial else None
+    mapa.habitacion_jefe = mapa.obtener_habitacion(*jefe) if jefe else None
+    mapa.version_topologia += 1
+    mapa.invalidar_indices()
+
+    explorador = Explorador(mapa, vida=datos_explorador.get('vida_max', datos_explorador['vida']))
+    explorador.vida = datos_explorador['vida']
+    explorador.posicion_actual = tuple(datos_explorador['posicion_actual'])
+    explorador.bonificacion_combate = datos_explorador.get('bonificacion_combate', 0)
+    explorador.inventario = _decodificar(datos_explorador.get('inventario', []), mapa)
+    return mapa, explorador
@@ -0,0 +1,109 @@
+"""Generación de dungeons por lotes en un pool de procesos.
+
+Cada tarea recibe una semilla derivada de (semilla del lote, índice), genera
+un mapa compacto y devuelve solo bytes empaquetados, nunca el grafo de objetos.
+
+Uso por consola:
+    python -m dungeon_generator.lote -n 10000 --ancho 10 --alto 10 --habitaciones 30 --semilla 1
+    python -m dungeon_generator.lote -n 10000 --formato binario > lote.bin
+"""
+import base64
+import json
+import os
+import struct
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+from .aleatorio import derivar_semilla
+from .mapa import generar_mapa
+
+# Registro binario: índice, semilla, longitud de los datos (seguido de los datos)
+REGISTRO_BINARIO = struct.Struct('<IQI')
+
+RegistroLote = Tuple[int, int, bytes, Dict]
+
+
+def _generar_tarea(tarea: Tuple[int, int, int, int, int]) -> RegistroLote:
+    indice, semilla, ancho, alto, n_habitaciones = tarea
+    mapa = generar_mapa(ancho, alto, n_habitaciones, semilla, compacto=True)
+    return indice, semilla, mapa.empaquetar(), mapa.obtener_estadisticas_mapa()
+
+
+def generar_lote(n: int, ancho: int, alto: int, n_habitaciones: int, seed: int,
+                 workers: Optional[int] = None) -> Iterator[RegistroLote]:
+    """Genera 'n' mapas y los devuelve en orden como (índice, semilla, datos, estadísticas).
+
+    'datos' es Mapa.empaquetar(); se reconstruye con Mapa.desempaquetar(datos, semilla).
+    Con workers=1 no se crea el pool (útil para depurar y para lotes pequeños).
+    """
+    workers = workers or os.cpu_count() or 1
+    tareas = ((i, derivar_semilla(seed, i), ancho, alto, n_habitaciones) for i in range(n))
+
+    if workers == 1:
+        yield from map(_generar_tarea, tareas)
+        return
+
+    from multiprocessing import Pool  # cargarlo cuesta más que el resto del paquete: solo si hay pool
+
+    # Trozos grandes amortizan el coste de IPC sin dejar procesos ociosos al final
+    chunksize = max(1, n // (workers * 8))
+    with Pool(workers) as pool:
+        yield from pool.imap(_generar_tarea, tareas, chunksize=chunksize)
+
+
+def escribir_ndjson(registros: Iterator[RegistroLote], salida) -> int:
+    """Escribe una línea JSON por mapa; devuelve los bytes escritos."""
+    escritos = 0
+    for indice, semilla, datos, estadisticas in registros:
+        linea = json.dumps({
+            'indice': indice,
+            'semilla': semilla,
+            'estadisticas': estadisticas,
+            'datos': base64.b64encode(datos).decode('ascii'),
+        }, separators=(',', ':')) + '\n'
+        salida.write(linea.encode('utf-8'))
+        escritos += len(linea)
+    return escritos
+
+
+def escribir_binario(registros: Iterator[RegistroLote], salida) -> int:
+    """Escribe registros (cabecera REGISTRO_BINARIO + datos); devuelve los bytes escritos."""
+    escritos = 0
+    for indice, semilla, datos, _ in registros:
+        salida.write(REGISTRO_BINARIO.pack(indice, semilla, len(datos)))
+        salida.write(datos)
+        escritos += REGISTRO_BINARIO.size + len(datos)
+    return escritos
+
+
+def leer_binario(entrada) -> Iterator[Tuple[int, int, bytes]]:
+    """Lee los registros producidos por escribir_binario()."""
+    while True:
+        cabecera = entrada.read(REGISTRO_BINARIO.size)
+        if not cabecera:
+            return
+        indice, semilla, longitud = REGISTRO_BINARIO.unpack(cabecera)
+        yield indice, semilla, entrada.read(longitud)
+
+
+def main(argv=None):
+    import argparse  # solo para la consola
+
+    parser = argparse.ArgumentParser(description="Genera dungeons por lotes en paralelo.")
+    parser.add_argument("-n", type=int, required=True, help="Cantidad de mapas")
+    parser.add_argument("--ancho", type=int, default=10)
+    parser.add_argument("--alto", type=int, default=10)
+    parser.add_argument("--habitaciones", type=int, default=30)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--formato", choices=("ndjson", "binario"), default="ndjson")
+    args = parser.parse_args(argv)
+
+    registros = generar_lote(args.n, args.ancho, args.alto, args.habitaciones, args.semilla, args.workers)
+    escribir = escribir_ndjson if args.formato == "ndjson" else escribir_binario
+    escribir(registros, sys.stdout.buffer)
+    sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
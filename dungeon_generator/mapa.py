@@ -1,32 +1,395 @@
 
 
-import random
-from typing import TYPE_CHECKING, Optional, List, Dict, Tuple
+import heapq
+from abc import ABC, abstractmethod
+from array import array
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, List, Dict, Set, Tuple
 from collections import Counter
-from .habitacion import Habitacion
+from collections.abc import Mapping
+from .habitacion import Habitacion, DIRECCIONES, DELTAS, OPUESTOS, BITS_DIRECCION
+from .rejilla import RejillaCompacta, HabitacionesCompactas, TIPOS_CONTENIDO
+from .aleatorio import FlujosAleatorios, derivar_semilla, semilla_nueva
+from .rutas import Enrutador
+from .muestreo import ConjuntoIndexado
+from .espacial import IndiceEspacial
+from . import instrumentacion
+from .instrumentacion import medido
 # Importación de contenido (incluyendo todas las subclases)
 from .contenido import Tesoro, Monstruo, Jefe, Evento, ContenidoHabitacion, Trampa, Curacion, Portal 
-from .objeto import Objeto 
+from . import plantillas
 
 
 if TYPE_CHECKING:
-   
+    import random
     from .explorador import Explorador 
 
-class Mapa:
-    """Representa la estructura del dungeon, conteniendo todas las habitaciones."""
-    
-    def __init__(self, ancho: int, alto: int):
-        self.ancho = ancho
-        self.alto = alto
-        self.habitaciones: Dict[Tuple[int, int], Habitacion] = {} 
+# Versión del algoritmo de generación: subirla cuando la misma semilla pase a dar otro dungeon
+# (invalida, entre otras cosas, las entradas de cache.CacheMapas)
+VERSION_GENERADOR = 1
+
+# Un mapa generado es jugable si tiene jefe y al menos esta fracción de las habitaciones pedidas:
+# el crecimiento aleatorio a veces se corta a las pocas habitaciones (ver generar_mapa_jugable)
+FRACCION_JUGABLE = 0.5
+INTENTOS_JUGABLE = 32
+
+# Contenido que en mapas compactos se guarda como plantilla + nivel (los eventos son instancias compartidas)
+_PLANTILLA_POR_TIPO = {"monstruo": plantillas.ORCO, "tesoro": plantillas.JOYA, "jefe": plantillas.JEFE}
+
+# Bits en 1 de cada máscara de conexiones: bytearray.translate + sum cuenta conexiones sin un bucle en Python
+_BITS_POR_MASCARA = bytes(bin(i).count("1") for i in range(256))
+
+
+class MapaBase(ABC):
+    """Lo que comparten todos los mapas: habitaciones, contenido, visitas, índices y estadísticas.
+
+    Las subclases definen 'habitaciones' y '_rejilla' antes de llamar a este
+    __init__, y cómo se sortea una posición (posicion_aleatoria). Mapa agrega lo
+    que necesita límites fijos: generación, campo de distancias, enrutador y
+    forma empaquetada; mundo.MapaInfinito genera sus trozos bajo demanda.
+    """
+    ancho: Optional[int]
+    alto: Optional[int]
+    habitaciones: Mapping[Tuple[int, int], Habitacion]
+    _rejilla: Optional[RejillaCompacta]
+
+    def __init__(self, semilla: Optional[int] = None, flujos: Optional[FlujosAleatorios] = None):
+        # Generadores propios del mapa (estructura, contenido, combate); nunca el 'random' global
+        self.flujos = flujos if flujos is not None else FlujosAleatorios(semilla)
         self.habitacion_inicial: Optional[Habitacion] = None
+        self.habitacion_jefe: Optional[Habitacion] = None
         self.habitacion_id_counter = 1
+        self._reiniciar_caches()
+
+    def _reiniciar_caches(self):
+        """(Re)crea el estado derivado; también se usa al reconstruir un mapa cargado."""
+        # Cada cambio de conexiones incrementa la versión e invalida lo calculado sobre el grafo
+        self.version_topologia = 0
+        self._eventos: Optional[Tuple[ContenidoHabitacion, ...]] = None
+        self._observadores: List[Callable[[Habitacion, str], None]] = []
+        # Un mapa que ya trae habitaciones (p. ej. uno cargado) reconstruye los índices al consultarlos
+        self._reiniciar_indices(validos=not self.habitaciones)
+
+    # --- OBSERVADORES ---
+    def observar(self, funcion: Callable[[Habitacion, str], None]):
+        """Registra funcion(habitacion, cambio), con cambio "visitada" o "contenido", para cada cambio de partida."""
+        self._observadores.append(funcion)
+
+    def dejar_de_observar(self, funcion: Callable[[Habitacion, str], None]):
+        if funcion in self._observadores:
+            self._observadores.remove(funcion)
+
+    def _notificar(self, habitacion: Habitacion, cambio: str):
+        for funcion in self._observadores:
+            funcion(habitacion, cambio)
+
+    # --- ÍNDICES INCREMENTALES (ESTADÍSTICAS Y CONTENIDO POR TIPO) ---
+    def _reiniciar_indices(self, validos: bool = True):
+        self._conteo_contenido: Counter = Counter()
+        self._total_conexiones = 0
+        self._n_visitadas = 0
+        # tipo -> coordenadas; se arma con la primera consulta y desde ahí se mantiene
+        self._por_tipo: Optional[Dict[str, Set[Tuple[int, int]]]] = None
+        # Celdas de todas las habitaciones y de las visitadas, para sortear destinos (ver posicion_aleatoria)
+        self._celdas_habitaciones: Optional[ConjuntoIndexado] = None
+        self._celdas_visitadas: Optional[ConjuntoIndexado] = None
+        # Cubetas de habitaciones y contenido para consultas por zona (ver indice_espacial)
+        self._espacial: Optional[IndiceEspacial] = None
+        self._indices_validos = validos
+
+    def invalidar_indices(self):
+        """Para quien llena las habitaciones sin pasar por los métodos del mapa (cargadores)."""
+        self._reiniciar_indices(validos=False)
+
+    def _asegurar_indices(self):
+        if not self._indices_validos:
+            self._reconstruir_indices()
+
+    def _reconstruir_indices(self):
+        """Recorrido completo; solo hace falta una vez tras invalidar_indices()."""
+        self._reiniciar_indices()
+        if self._rejilla is not None:
+            self._contar_columnas(self._rejilla.tipos, self._rejilla.conexiones, self._rejilla.visitadas)
+            return
+        columnas = self._columnas_archivo(en_orden=False)
+        if columnas is not None:
+            _, conexiones, visitadas, tipos = columnas
+            self._contar_columnas(tipos, conexiones, visitadas)
+            return
+
+        for hab in self.habitaciones.values():
+            if hab.contenido is not None:
+                self._conteo_contenido[hab.contenido.tipo] += 1
+            self._total_conexiones += len(hab.conexiones)
+            if hab.visitada:
+                self._n_visitadas += 1
+
+    def _contar_columnas(self, tipos: bytes, conexiones: bytes, visitadas: bytes):
+        """Suma columnas de tipos, máscaras y visitas: no crea vistas de habitación ni contenido."""
+        for codigo, tipo in TIPOS_CONTENIDO.items():
+            n = tipos.count(codigo)
+            if n:
+                self._conteo_contenido[tipo] += n
+        self._total_conexiones += sum(conexiones.translate(_BITS_POR_MASCARA))
+        self._n_visitadas += visitadas.count(1)
+
+    def _columnas_archivo(self, en_orden: bool = True) -> Optional[Tuple[array, bytes, bytes, bytes]]:
+        """Columnas (celdas, máscaras, visitas, tipos) de un mapa cargado de un .dgn todavía abierto.
+
+        Con ellas los índices se arman sin materializar habitaciones (ver
+        binario.HabitacionesBinarias.columnas); None para los mapas en memoria.
+        """
+        columnas = getattr(self.habitaciones, "columnas", None)
+        return columnas(en_orden) if columnas is not None else None
+
+    def _tipo_contenido(self, habitacion: Habitacion) -> Optional[str]:
+        """Tipo del contenido actual; en mapas compactos se lee de la columna sin materializarlo."""
+        if self._rejilla is not None:
+            return TIPOS_CONTENIDO.get(self._rejilla.tipos[self._rejilla.indice(habitacion.x, habitacion.y)])
+        return habitacion.contenido.tipo if habitacion.contenido is not None else None
+
+    def _contar_contenido(self, habitacion: Habitacion, tipo: Optional[str], delta: int):
+        if tipo is None or not self._indices_validos:
+            return
+        self._conteo_contenido[tipo] += delta
+        if self._por_tipo is not None:
+            coordenadas = self._por_tipo.setdefault(tipo, set())
+            if delta > 0:
+                coordenadas.add((habitacion.x, habitacion.y))
+            else:
+                coordenadas.discard((habitacion.x, habitacion.y))
+        if self._espacial is not None:
+            if delta > 0:
+                self._espacial.agregar_contenido(habitacion.x, habitacion.y, tipo)
+            else:
+                self._espacial.quitar_contenido(habitacion.x, habitacion.y, tipo)
+
+    def asignar_contenido(self, habitacion: Habitacion, contenido: Optional[ContenidoHabitacion]):
+        """Reemplaza el contenido de la habitación manteniendo los índices al día."""
+        self._contar_contenido(habitacion, self._tipo_contenido(habitacion), -1)
+        habitacion.contenido = contenido
+        self._contar_contenido(habitacion, contenido.tipo if contenido is not None else None, 1)
+        if self._observadores:
+            self._notificar(habitacion, "contenido")
+
+    def retirar_contenido(self, habitacion: Habitacion):
+        """El contenido se consumió (monstruo vencido, tesoro recogido, evento resuelto)."""
+        self.asignar_contenido(habitacion, None)
+
+    def marcar_visitada(self, habitacion: Habitacion):
+        if not habitacion.visitada:
+            habitacion.visitada = True
+            if self._indices_validos:
+                self._n_visitadas += 1
+            if self._celdas_visitadas is not None:
+                self._celdas_visitadas.agregar(habitacion.y * self.ancho + habitacion.x)
+            if self._observadores:
+                self._notificar(habitacion, "visitada")
+
+    def habitaciones_con(self, tipo: str) -> Set[Tuple[int, int]]:
+        """Coordenadas de las habitaciones cuyo contenido es de 'tipo' ("monstruo", "tesoro", ...).
+
+        Devuelve el conjunto que mantiene el mapa: se actualiza solo y no debe modificarse.
+        """
+        self._asegurar_indices()
+        if self._por_tipo is None:
+            self._por_tipo = {t: set() for t in TIPOS_CONTENIDO.values()}
+            columnas = self._columnas_archivo(en_orden=False) if self._rejilla is None else None
+            if self._rejilla is not None or columnas is not None:
+                # Por columnas: la posición en 'tipos' es la celda (rejilla) o el registro (archivo)
+                ancho = self.ancho
+                celdas, tipos = (None, self._rejilla.tipos) if columnas is None else (columnas[0], columnas[3])
+                for codigo, t in TIPOS_CONTENIDO.items():
+                    coordenadas = self._por_tipo[t]
+                    i = tipos.find(codigo)
+                    while i >= 0:
+                        idx = celdas[i] if celdas is not None else i
+                        coordenadas.add((idx % ancho, idx // ancho))
+                        i = tipos.find(codigo, i + 1)
+            else:
+                for posicion, hab in self.habitaciones.items():
+                    if hab.contenido is not None:
+                        self._por_tipo.setdefault(hab.contenido.tipo, set()).add(posicion)
+        return self._por_tipo.setdefault(tipo, set())
+
+    def indice_espacial(self) -> IndiceEspacial:
+        """Índice por cubetas para consultas por rectángulo, radio y k más cercanas de un tipo.
+
+        Se arma con la primera llamada y desde ahí se mantiene al crear habitaciones
+        y al asignar o retirar contenido, así que sigue al día durante la partida.
+        """
+        self._asegurar_indices()
+        if self._espacial is None:
+            indice = IndiceEspacial()
+            columnas = self._columnas_archivo(en_orden=False) if self._rejilla is None else None
+            if self._rejilla is not None:
+                # Por columnas: no se crean vistas ni se materializa el contenido
+                rejilla, ancho, tipos = self._rejilla, self.ancho, self._rejilla.tipos
+                for idx in rejilla.indices_ocupados():
+                    indice.agregar(idx % ancho, idx // ancho, TIPOS_CONTENIDO.get(tipos[idx]))
+            elif columnas is not None:
+                ancho, (celdas, _, _, tipos) = self.ancho, columnas
+                for i, idx in enumerate(celdas):
+                    indice.agregar(idx % ancho, idx // ancho, TIPOS_CONTENIDO.get(tipos[i]))
+            else:
+                for (x, y), hab in self.habitaciones.items():
+                    indice.agregar(x, y, hab.contenido.tipo if hab.contenido is not None else None)
+            self._espacial = indice
+        return self._espacial
+
+    @abstractmethod
+    def posicion_aleatoria(self, rng: 'random.Random', solo_visitadas: bool = False,
+                           excluir: Optional[Tuple[int, int]] = None) -> Optional[Tuple[int, int]]:
+        """Coordenadas de una habitación elegida uniformemente (o None si no hay candidatas)."""
+
+    @property
+    def compacto(self) -> bool:
+        return self._rejilla is not None
 
     def obtener_habitacion(self, x: int, y: int) -> Optional[Habitacion]:
         return self.habitaciones.get((x, y))
 
-  --
+    def al_entrar(self, x: int, y: int):
+        """Aviso de que un explorador entró en (x, y). Los mapas por trozos lo usan para precargar."""
+        pass
+
+    def _crear_contenido(self, tipo: str, distancia: int, rng: Optional['random.Random'] = None) -> ContenidoHabitacion:
+        """Helper para crear Monstruo, Tesoro o Evento según el tipo y distancia."""
+        
+        if tipo == "monstruo":
+            return Monstruo.desde_plantilla(plantillas.ORCO, distancia)
+            
+        elif tipo == "tesoro":
+            return Tesoro.desde_plantilla(plantillas.JOYA, distancia)
+
+        elif tipo == "jefe":
+            return Jefe.desde_plantilla(plantillas.JEFE, distancia)
+            
+        elif tipo == "evento":
+            # Los eventos no tienen estado: todas las habitaciones comparten las mismas tres instancias
+            if self._eventos is None:
+                self._eventos = (Trampa(dano=2), Curacion(cura=3), Portal(self))
+            return (rng or self.flujos.contenido).choice(self._eventos)
+            
+        raise ValueError(f"Tipo de contenido desconocido: {tipo}")
+
+    def obtener_estadisticas_mapa(self) -> Dict[str, int | float]:
+        """Resumen del mapa en O(1): sale de los contadores que se mantienen al modificarlo."""
+        self._asegurar_indices()
+        n_habitaciones = len(self.habitaciones)
+        distribucion = {tipo: n for tipo, n in self._conteo_contenido.items() if n}
+        n_vacias = n_habitaciones - sum(distribucion.values())
+        if n_vacias > 0:
+            distribucion["vacía"] = n_vacias
+
+        promedio_conexiones = self._total_conexiones / n_habitaciones if n_habitaciones > 0 else 0
+        
+        return {
+            "habitaciones_totales": n_habitaciones,
+            "distribucion_contenido": distribucion,
+            "promedio_conexiones": promedio_conexiones,
+            "habitaciones_visitadas": self._n_visitadas,
+        }
+
+
+class Mapa(MapaBase):
+    """Representa la estructura del dungeon, conteniendo todas las habitaciones."""
+    
+    def __init__(self, ancho: int, alto: int, compacto: bool = False,
+                 semilla: Optional[int] = None, flujos: Optional[FlujosAleatorios] = None):
+        self.ancho = ancho
+        self.alto = alto
+        # Con compacto=True las habitaciones viven en columnas planas y se entregan como vistas
+        self._rejilla: Optional[RejillaCompacta] = RejillaCompacta(ancho, alto) if compacto else None
+        # Solo el dict del modo normal admite escrituras; las vistas compactas y binarias son de lectura
+        self.habitaciones: Mapping[Tuple[int, int], Habitacion] = HabitacionesCompactas(self._rejilla) if compacto else {}
+        super().__init__(semilla, flujos)
+
+    def _reiniciar_caches(self):
+        self._distancias_camino: Optional[array] = None
+        self._version_distancias = -1
+        self._enrutador: Optional[Enrutador] = None
+        super()._reiniciar_caches()
+
+    # --- SORTEO DE POSICIONES ---
+    def _armar_celdas(self, solo_visitadas: bool) -> ConjuntoIndexado:
+        """Arma el conjunto en el orden de las claves del mapa (el mismo sorteo que list(habitaciones))."""
+        conjunto = ConjuntoIndexado(self.ancho * self.alto)
+        if self._rejilla is not None:
+            columna = self._rejilla.visitadas if solo_visitadas else None
+            for idx in self._rejilla.indices_ocupados():
+                if columna is None or columna[idx]:
+                    conjunto.agregar(idx)
+            return conjunto
+        columnas = self._columnas_archivo()
+        if columnas is not None:
+            celdas, _, visitadas, _ = columnas
+            for i, idx in enumerate(celdas):
+                if not solo_visitadas or visitadas[i]:
+                    conjunto.agregar(idx)
+            return conjunto
+        ancho = self.ancho
+        for (x, y), hab in self.habitaciones.items():
+            if not solo_visitadas or hab.visitada:
+                conjunto.agregar(y * ancho + x)
+        return conjunto
+
+    def posicion_aleatoria(self, rng: 'random.Random', solo_visitadas: bool = False,
+                           excluir: Optional[Tuple[int, int]] = None) -> Optional[Tuple[int, int]]:
+        """Coordenadas de una habitación elegida uniformemente en O(1); None si no hay candidatas.
+
+        Los conjuntos se arman con la primera llamada y después se mantienen al
+        crear habitaciones y al marcarlas como visitadas.
+        """
+        if solo_visitadas:
+            if self._celdas_visitadas is None:
+                self._celdas_visitadas = self._armar_celdas(True)
+            conjunto = self._celdas_visitadas
+        else:
+            if self._celdas_habitaciones is None:
+                self._celdas_habitaciones = self._armar_celdas(False)
+            conjunto = self._celdas_habitaciones
+        ancho = self.ancho
+        idx = conjunto.elegir(rng, excluir[1] * ancho + excluir[0] if excluir is not None else -1)
+        return (idx % ancho, idx // ancho) if idx >= 0 else None
+
+    @property
+    def enrutador(self) -> Enrutador:
+        """Servicio de caminos compartido por todos los que recorren este mapa."""
+        if self._enrutador is None:
+            self._enrutador = Enrutador(self)
+        return self._enrutador
+
+    def empaquetar(self) -> bytes:
+        """Forma compacta del mapa (columnas comprimidas), apta para enviar entre procesos."""
+        if self._rejilla is None:
+            raise ValueError("Solo los mapas creados con compacto=True se pueden empaquetar.")
+        return self._rejilla.empaquetar(self.habitacion_id_counter)
+
+    @classmethod
+    def desempaquetar(cls, datos: bytes, semilla: Optional[int] = None) -> 'Mapa':
+        """Reconstruye un mapa compacto desde Mapa.empaquetar()."""
+        rejilla, siguiente_id = RejillaCompacta.desempaquetar(datos)
+        mapa = cls(rejilla.ancho, rejilla.alto, semilla=semilla)
+        mapa._rejilla = rejilla
+        mapa.habitaciones = HabitacionesCompactas(rejilla)
+        mapa.habitacion_id_counter = siguiente_id
+        mapa.habitacion_inicial = rejilla.vista(rejilla.idx_inicial) if rejilla.idx_inicial >= 0 else None
+        idx_jefe = rejilla.estados.find(rejilla.codigo_estado("Jefe"))
+        mapa.habitacion_jefe = rejilla.vista(idx_jefe) if idx_jefe >= 0 else None
+        # Los eventos vuelven a ser las instancias compartidas del mapa (y los portales, suyos)
+        mapa._eventos = (Trampa(dano=2), Curacion(cura=3), Portal(mapa))
+        compartidos = {(type(evento), tuple(evento.parametros().items())): evento for evento in mapa._eventos}
+        for idx, contenido in rejilla.contenidos.items():
+            if isinstance(contenido, (Trampa, Curacion, Portal)):
+                rejilla.contenidos[idx] = compartidos.get((type(contenido), tuple(contenido.parametros().items())),
+                                                          contenido)
+                if isinstance(contenido, Portal):
+                    contenido.mapa = mapa
+        mapa.version_topologia += 1
+        mapa.invalidar_indices()
+        return mapa
+
+    @medido("mapa.generar_estructura")
     def generar_estructura(self, n_habitaciones: int):
         """Crea la estructura del dungeon, asegura borde inicial y accesibilidad."""
         
@@ -37,46 +400,42 @@ class Mapa:
             borde_opciones.extend([(0, y), (self.ancho - 1, y)])
         borde_opciones = list(set(borde_opciones)) 
 
-        start_x, start_y = random.choice(borde_opciones)
+        rng = self.flujos.estructura
+        start_x, start_y = rng.choice(borde_opciones)
         
-        self.habitacion_inicial = Habitacion(
-            id=self.habitacion_id_counter, 
-            x=start_x, 
-            y=start_y, 
-            inicial=True
-        )
-        self.habitaciones[(start_x, start_y)] = self.habitacion_inicial
-        self.habitacion_id_counter += 1
+        self.habitacion_inicial = self._crear_habitacion(start_x, start_y, inicial=True)
         self.habitacion_inicial.distancia_manhattan = 0
         self.habitacion_inicial.estado = "Entrada Segura"
         
+        if self._rejilla is not None:
+            self._expandir_compacta(self._rejilla.idx_inicial, n_habitaciones)
+            return
+        
         cola = [self.habitacion_inicial]
         habitaciones_creadas = 1
+        descartadas = 0  # direcciones probadas que no crearon habitación
+        direcciones = list(DIRECCIONES)
         
         while cola and habitaciones_creadas < n_habitaciones:
-            actual: Habitacion = cola.pop(random.randrange(len(cola)))
+            # Extracción aleatoria O(1): se intercambia con el último y se hace pop()
+            i = rng.randrange(len(cola))
+            actual: Habitacion = cola[i]
+            cola[i] = cola[-1]
+            cola.pop()
             
-            direcciones = ["norte", "sur", "este", "oeste"]
-            random.shuffle(direcciones)
+            rng.shuffle(direcciones)
             
             for direccion in direcciones:
                 if habitaciones_creadas >= n_habitaciones: break
 
-                dx, dy = self._obtener_delta(direccion)
+                dx, dy = DELTAS[direccion]
                 new_x, new_y = actual.x + dx, actual.y + dy
                 
                 if (0 <= new_x < self.ancho and 0 <= new_y < self.alto and 
                     (new_x, new_y) not in self.habitaciones and
-                    random.random() < 0.6):
+                    rng.random() < 0.6):
                     
-                    nueva_hab = Habitacion(
-                        id=self.habitacion_id_counter, 
-                        x=new_x, 
-                        y=new_y, 
-                        inicial=False
-                    )
-                    self.habitaciones[(new_x, new_y)] = nueva_hab
-                    self.habitacion_id_counter += 1
+                    nueva_hab = self._crear_habitacion(new_x, new_y)
                     habitaciones_creadas += 1
                     
                     self._conectar(actual, nueva_hab, direccion)
@@ -85,45 +444,208 @@ class Mapa:
                     nueva_hab.estado = "Vacía"
                     
                     cola.append(nueva_hab)
+                else:
+                    descartadas += 1
+        
+        self._anotar_generacion(habitaciones_creadas, descartadas)
+
+    @staticmethod
+    def _anotar_generacion(habitaciones_creadas: int, descartadas: int):
+        if instrumentacion.sesion is not None:
+            instrumentacion.sesion.contar("mapa.habitaciones_creadas", habitaciones_creadas)
+            instrumentacion.sesion.contar("mapa.direcciones_descartadas", descartadas)
+
+    def _expandir_compacta(self, idx_inicial: int, n_habitaciones: int):
+        """Mismo algoritmo que generar_estructura, pero sobre índices empaquetados de la rejilla.
+
+        No crea objetos por habitación: la frontera es un array de enteros con
+        extracción por intercambio y las tablas de desplazamiento se calculan una vez.
+        """
+        rejilla = self._rejilla
+        ancho, alto = self.ancho, self.alto
+        ids, mascaras, distancias = rejilla.ids, rejilla.conexiones, rejilla.distancias
+        start_x, start_y = idx_inicial % ancho, idx_inicial // ancho
+        
+        # (desplazamiento del índice, dx, dy, bit propio, bit opuesto) por dirección
+        tabla = [
+            (DELTAS[d][1] * ancho + DELTAS[d][0], DELTAS[d][0], DELTAS[d][1],
+             BITS_DIRECCION[d], BITS_DIRECCION[OPUESTOS[d]])
+            for d in DIRECCIONES
+        ]
+        
+        cola = array('i', [idx_inicial])
+        habitaciones_creadas = 1
+        descartadas = 0
+        siguiente_id = self.habitacion_id_counter
+        rng = self.flujos.estructura
+        aleatorio, azar, mezclar = rng.random, rng.randrange, rng.shuffle
+        
+        while cola and habitaciones_creadas < n_habitaciones:
+            i = azar(len(cola))
+            actual = cola[i]
+            cola[i] = cola[-1]
+            cola.pop()
+            x, y = actual % ancho, actual // ancho
+            
+            mezclar(tabla)
+            
+            for delta, dx, dy, bit, bit_opuesto in tabla:
+                if habitaciones_creadas >= n_habitaciones: break
+                
+                new_x, new_y = x + dx, y + dy
+                if 0 <= new_x < ancho and 0 <= new_y < alto:
+                    nuevo = actual + delta
+                    if not ids[nuevo] and aleatorio() < 0.6:
+                        ids[nuevo] = siguiente_id
+                        siguiente_id += 1
+                        habitaciones_creadas += 1
+                        mascaras[actual] |= bit
+                        mascaras[nuevo] |= bit_opuesto
+                        distancias[nuevo] = abs(new_x - start_x) + abs(new_y - start_y)
+                        cola.append(nuevo)
+                        continue
+                descartadas += 1
+        
+        self._anotar_generacion(habitaciones_creadas, descartadas)
+        rejilla.n_ocupadas += habitaciones_creadas - 1
+        self.habitacion_id_counter = siguiente_id
+        self.version_topologia += 1
+        # Cada habitación nueva trae exactamente una conexión (dos extremos)
+        self._total_conexiones += 2 * (habitaciones_creadas - 1)
+        # Las celdas nuevas no se anotaron una por una: el conjunto y el índice espacial se rearman al consultarlos
+        self._celdas_habitaciones = None
+        self._espacial = None
+
+    def _crear_habitacion(self, x: int, y: int, inicial: bool = False) -> Habitacion:
+        """Registra una habitación nueva en el almacenamiento activo y la devuelve."""
+        id_hab = self.habitacion_id_counter
+        self.habitacion_id_counter += 1
+        if self._rejilla is not None:
+            idx = self._rejilla.indice(x, y)
+            self._rejilla.agregar(idx, id_hab, inicial)
+            if self._celdas_habitaciones is not None:
+                self._celdas_habitaciones.agregar(idx)
+            if self._espacial is not None:
+                self._espacial.agregar(x, y)
+            return self._rejilla.vista(idx)
+
+        habitaciones = self.habitaciones
+        if not isinstance(habitaciones, dict):
+            raise ValueError("Las habitaciones de este mapa son de solo lectura (p. ej. cargadas de un .dgn).")
+        hab = Habitacion(id=id_hab, x=x, y=y, inicial=inicial)
+        habitaciones[(x, y)] = hab
+        if self._celdas_habitaciones is not None:
+            self._celdas_habitaciones.agregar(y * self.ancho + x)
+        if self._espacial is not None:
+            self._espacial.agregar(x, y)
+        return hab
 
     def _obtener_delta(self, direccion: str) -> Tuple[int, int]:
-        return {"norte": (0, -1), "sur": (0, 1), "este": (1, 0), "oeste": (-1, 0)}.get(direccion, (0, 0))
+        return DELTAS.get(direccion, (0, 0))
 
     def _conectar(self, hab1: Habitacion, hab2: Habitacion, direccion: str):
-        opuesto = {"norte": "sur", "sur": "norte", "este": "oeste", "oeste": "este"}[direccion]
-        hab1.conexiones[direccion] = hab2
-        hab2.conexiones[opuesto] = hab1
+        self.version_topologia += 1
+        if self._rejilla is not None:
+            idx1 = self._rejilla.indice(hab1.x, hab1.y)
+            nueva = not self._rejilla.conexiones[idx1] & BITS_DIRECCION[direccion]
+            self._rejilla.conectar(idx1, self._rejilla.indice(hab2.x, hab2.y), direccion)
+        else:
+            nueva = hab1.vecina(direccion) is None
+            hab1.conectar(direccion, hab2)
+            hab2.conectar(OPUESTOS[direccion], hab1)
+        if nueva:
+            self._total_conexiones += 2
 
     def _calcular_manhattan(self, x1: int, y1: int, x2: int, y2: int) -> int:
         return abs(x1 - x2) + abs(y1 - y2)
 
+    # --- DISTANCIA REAL DE CAMINO (BFS DESDE LA ENTRADA) ---
+    def distancias_camino(self) -> array:
+        """Pasos desde la habitación inicial siguiendo 'conexiones', indexado por y * ancho + x.
+
+        Vale -1 en celdas vacías o inalcanzables. Se calcula con un único BFS y
+        se reutiliza hasta que cambie la topología (ver version_topologia).
+        """
+        if self._distancias_camino is None or self._version_distancias != self.version_topologia:
+            self._distancias_camino = self._calcular_distancias_camino()
+            self._version_distancias = self.version_topologia
+        return self._distancias_camino
+
+    def distancia_camino(self, x: int, y: int) -> int:
+        return self.distancias_camino()[y * self.ancho + x]
+
+    def _calcular_distancias_camino(self) -> array:
+        ancho = self.ancho
+        distancias = array('i', [-1]) * (ancho * self.alto)
+        if self.habitacion_inicial is None:
+            return distancias
+        inicio = self.habitacion_inicial.y * ancho + self.habitacion_inicial.x
+        distancias[inicio] = 0
+
+        if self._rejilla is not None:
+            mascaras = self._rejilla.conexiones
+            vecinos = [(BITS_DIRECCION[d], DELTAS[d][1] * ancho + DELTAS[d][0]) for d in DIRECCIONES]
+            cola = array('i', [inicio])
+            i = 0
+            while i < len(cola):
+                idx = cola[i]; i += 1
+                mascara, d = mascaras[idx], distancias[idx] + 1
+                for bit, delta in vecinos:
+                    if mascara & bit and distancias[idx + delta] < 0:
+                        distancias[idx + delta] = d
+                        cola.append(idx + delta)
+            return distancias
+
+        cola = [self.habitacion_inicial]
+        for hab in cola:  # la lista crece mientras se recorre: BFS en orden de llegada
+            d = distancias[hab.y * ancho + hab.x] + 1
+            for vecina in hab.conexiones.values():
+                idx = vecina.y * ancho + vecina.x
+                if distancias[idx] < 0:
+                    distancias[idx] = d
+                    cola.append(vecina)
+        return distancias
+
     # --- REQUISITO 6, 11: COLOCACIÓN DE CONTENIDO (RESOLUCIÓN DEL SESGO) ---
-    def colocar_contenido(self):
-        """Distribuye el contenido (Monstruos, Tesoros, Jefes, Eventos)."""
+    @medido("mapa.colocar_contenido")
+    def colocar_contenido(self, usar_distancia_camino: bool = False, k_jefe: int = 3, nivel_extra: int = 0):
+        """Distribuye el contenido (Monstruos, Tesoros, Jefes, Eventos).
+
+        Con usar_distancia_camino=True la dificultad sale de distancias_camino()
+        (pasos reales desde la entrada) en lugar de distancia_manhattan.
+        nivel_extra se suma al nivel de todo el contenido (pisos más profundos).
+        """
         
+        rng = self.flujos.contenido
         habitaciones_restantes: List[Habitacion] = [hab for hab in self.habitaciones.values() if not hab.inicial]
 
         if not habitaciones_restantes: return 
+        
+        if usar_distancia_camino:
+            campo, ancho = self.distancias_camino(), self.ancho
+            distancia = lambda h: campo[h.y * ancho + h.x]
+        else:
+            distancia = lambda h: h.distancia_manhattan
+        if nivel_extra:
+            # Sumar una constante no cambia qué habitaciones quedan más lejos (ni la del jefe)
+            distancia_base = distancia
+            distancia = lambda h: distancia_base(h) + nivel_extra
             
-        # 1. COLOCAR AL JEFE
-        habitaciones_ordenadas = sorted(
-            habitaciones_restantes, 
-            key=lambda h: h.distancia_manhattan, 
-            reverse=True
-        )
-        jefe_habitacion = random.choice(habitaciones_ordenadas[:min(3, len(habitaciones_ordenadas))])
-        self._colocar_jefe(jefe_habitacion)
+        # 1. COLOCAR AL JEFE (selección parcial de las k más lejanas, sin ordenar todo)
+        candidatas_jefe = heapq.nlargest(k_jefe, habitaciones_restantes, key=distancia)
+        jefe_habitacion = rng.choice(candidatas_jefe)
+        self._colocar_jefe(jefe_habitacion, distancia(jefe_habitacion))
         
         # 2. PREPARAR LISTA PARA ASIGNACIÓN ALEATORIA 
         habitaciones_elegibles = [hab for hab in habitaciones_restantes if hab.contenido is None]
-        random.shuffle(habitaciones_elegibles) # Rompe el sesgo del Sur
+        rng.shuffle(habitaciones_elegibles) # Rompe el sesgo del Sur
         
         n_elegibles = len(habitaciones_elegibles)
         
         # 3. CALCULAR CANTIDADES
-        n_monstruos = random.randint(int(n_elegibles * 0.20), int(n_elegibles * 0.30))
-        n_tesoros = random.randint(int(n_elegibles * 0.15), int(n_elegibles * 0.25))
-        n_eventos = random.randint(int(n_elegibles * 0.05), int(n_elegibles * 0.10))
+        n_monstruos = rng.randint(int(n_elegibles * 0.20), int(n_elegibles * 0.30))
+        n_tesoros = rng.randint(int(n_elegibles * 0.15), int(n_elegibles * 0.25))
+        n_eventos = rng.randint(int(n_elegibles * 0.05), int(n_elegibles * 0.10))
         
         # Ajuste por límite total
         total_contenido = n_monstruos + n_tesoros + n_eventos
@@ -132,82 +654,80 @@ class Mapa:
             n_tesoros = int(n_tesoros * n_elegibles / total_contenido)
             n_monstruos = n_elegibles - n_tesoros - n_eventos 
             
-        # 4. ASIGNACIÓN SECUENCIAL
-        idx = 0
+        # 4. ASIGNACIÓN SECUENCIAL (todas las llamadas a _crear_contenido caen en este tramo)
+        with instrumentacion.tramo("mapa.crear_contenido", habitaciones=n_monstruos + n_tesoros + n_eventos):
+            idx = 0
         
-        for _ in range(n_monstruos):
-            hab = habitaciones_elegibles[idx]; idx += 1
-            hab.contenido = self._crear_contenido("monstruo", hab.distancia_manhattan)
-            hab.estado = hab.contenido.tipo.capitalize()
+            for _ in range(n_monstruos):
+                hab = habitaciones_elegibles[idx]; idx += 1
+                self._poner_contenido(hab, "monstruo", distancia(hab))
             
-        for _ in range(n_tesoros):
-            hab = habitaciones_elegibles[idx]; idx += 1
-            hab.contenido = self._crear_contenido("tesoro", hab.distancia_manhattan)
-            hab.estado = hab.contenido.tipo.capitalize() 
+            for _ in range(n_tesoros):
+                hab = habitaciones_elegibles[idx]; idx += 1
+                self._poner_contenido(hab, "tesoro", distancia(hab))
             
-        for _ in range(n_eventos):
-            hab = habitaciones_elegibles[idx]; idx += 1
-            hab.contenido = self._crear_contenido("evento", hab.distancia_manhattan)
-            hab.estado = hab.contenido.tipo.capitalize() 
+            for _ in range(n_eventos):
+                hab = habitaciones_elegibles[idx]; idx += 1
+                self._poner_contenido(hab, "evento", distancia(hab))
+
+    def _poner_contenido(self, habitacion: Habitacion, tipo: str, distancia: int):
+        """Asigna contenido recién generado.
 
-    def _colocar_jefe(self, habitacion: Habitacion):
+        En mapas compactos, monstruos, tesoros y el jefe quedan como (plantilla, nivel)
+        en las columnas: no se crea ningún objeto hasta que alguien lee el contenido.
+        """
+        plantilla = _PLANTILLA_POR_TIPO.get(tipo)
+        if self._rejilla is not None and plantilla is not None:
+            self._contar_contenido(habitacion, self._tipo_contenido(habitacion), -1)
+            self._rejilla.fijar_plantilla(self._rejilla.indice(habitacion.x, habitacion.y), plantilla, distancia)
+            self._contar_contenido(habitacion, tipo, 1)
+            if instrumentacion.sesion is not None:
+                instrumentacion.sesion.contar("contenido.plantillas_fijadas")
+        else:
+            self.asignar_contenido(habitacion, self._crear_contenido(tipo, distancia))
+            if instrumentacion.sesion is not None:
+                instrumentacion.sesion.contar("contenido.objetos_creados")
+        habitacion.estado = tipo.capitalize()
+
+    @medido("mapa.colocar_jefe")
+    def _colocar_jefe(self, habitacion: Habitacion, distancia: Optional[int] = None):
         """Helper para colocar el jefe, usando la dificultad (Requisito 11)."""
-        d = habitacion.distancia_manhattan
-        
-        recompensa = Objeto(
-            nombre="Corona del Jefe", 
-            valor=500 + d * 50, 
-            descripcion="El tesoro final del dungeon: un símbolo de poder."
-        )
+        d = habitacion.distancia_manhattan if distancia is None else distancia
         
-        vida = 20 + d * 5
-        ataque = 5 + d * 2
-        
-        habitacion.contenido = Jefe(vida=vida, ataque=ataque, recompensa_especial=recompensa)
-        habitacion.estado = "Jefe"
+        # Vida, ataque y la recompensa (que se crea al derrotarlo) escalan con la distancia
+        self._poner_contenido(habitacion, "jefe", d)
+        self.habitacion_jefe = habitacion
 
-    def _crear_contenido(self, tipo: str, distancia: int) -> ContenidoHabitacion:
-        """Helper para crear Monstruo, Tesoro o Evento según el tipo y distancia."""
-        
-        if tipo == "monstruo":
-            vida = 5 + distancia * 2
-            ataque = 2 + int(distancia / 2)
-            return Monstruo(vida=vida, ataque=ataque) 
-            
-        elif tipo == "tesoro":
-            valor = 50 + distancia * 10
-            recompensa = Objeto(
-                nombre=f"Joya Dist. {distancia}", 
-                valor=valor,
-                descripcion=f"Una joya con un brillo tenue, encontrada lejos (Distancia: {distancia})."
-            )
-            return Tesoro(recompensa=recompensa)
-            
-        elif tipo == "evento":
-            eventos_posibles = [
-                Trampa(dano=2), 
-                Curacion(cura=3), 
-                Portal(self) # Pasa la instancia del Mapa (self)
-            ]
-            return random.choice(eventos_posibles)
-            
-        raise ValueError(f"Tipo de contenido desconocido: {tipo}")
 
--
-    def obtener_estadisticas_mapa(self) -> Dict[str, int | float]:
-        n_habitaciones = len(self.habitaciones)
-        contador_contenido = Counter()
-        total_conexiones = 0
-        
-        for hab in self.habitaciones.values():
-            tipo_contenido = hab.contenido.tipo if hab.contenido else "vacía"
-            contador_contenido[tipo_contenido] += 1
-            total_conexiones += len(hab.conexiones)
+def generar_mapa(ancho: int, alto: int, n_habitaciones: int, semilla: Optional[int] = None,
+                 compacto: bool = False, usar_distancia_camino: bool = False, nivel_extra: int = 0) -> Mapa:
+    """Atajo: crea un mapa, genera su estructura y coloca el contenido."""
+    mapa = Mapa(ancho, alto, compacto=compacto, semilla=semilla)
+    mapa.generar_estructura(n_habitaciones)
+    mapa.colocar_contenido(usar_distancia_camino=usar_distancia_camino, nivel_extra=nivel_extra)
+    return mapa
 
-        promedio_conexiones = total_conexiones / n_habitaciones if n_habitaciones > 0 else 0
-        
-        return {
-            "habitaciones_totales": n_habitaciones,
-            "distribucion_contenido": dict(contador_contenido),
-            "promedio_conexiones": promedio_conexiones
-        }
+
+def es_jugable(mapa: Mapa, n_habitaciones: int) -> bool:
+    return mapa.habitacion_jefe is not None and len(mapa.habitaciones) >= n_habitaciones * FRACCION_JUGABLE
+
+
+def semillas_de_respaldo(semilla: int) -> Iterator[int]:
+    """'semilla' y después las semillas derivadas que se prueban si su mapa no es jugable."""
+    yield semilla
+    for intento in range(1, INTENTOS_JUGABLE):
+        yield derivar_semilla(semilla, "respaldo", intento)
+
+
+def generar_mapa_jugable(ancho: int, alto: int, n_habitaciones: int, semilla: Optional[int] = None,
+                         compacto: bool = False, usar_distancia_camino: bool = False, nivel_extra: int = 0) -> Mapa:
+    """Como generar_mapa, pero reintenta con semillas_de_respaldo() mientras el mapa no sea jugable.
+
+    El mapa lleva la semilla con la que salió (mapa.flujos.semilla): regenerarlo con
+    generar_mapa y esa semilla da el mismo dungeon.
+    """
+    for candidata in semillas_de_respaldo(semilla if semilla is not None else semilla_nueva()):
+        mapa = generar_mapa(ancho, alto, n_habitaciones, candidata, compacto, usar_distancia_camino, nivel_extra)
+        if es_jugable(mapa, n_habitaciones):
+            break
+    return mapa
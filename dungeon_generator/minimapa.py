@@ -0,0 +1,136 @@
+"""Minimapa por ventana: solo se dibujan las celdas alrededor del explorador.
+
+Las filas dibujadas quedan en caché y los avisos del mapa (Mapa.observar)
+marcan sucias solo las celdas que cambiaron, así que el coste de cada cuadro
+es proporcional a la ventana y no al tamaño del dungeon.
+"""
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from . import instrumentacion
+from .instrumentacion import medido
+
+if TYPE_CHECKING:
+    from .habitacion import Habitacion
+    from .mapa import Mapa
+
+Simbolo = Callable[[Optional['Habitacion']], str]
+
+_SIMBOLOS_CONTENIDO = {"jefe": " J ", "monstruo": " M ", "tesoro": " T "}
+
+
+def simbolo_visitadas(hab: Optional['Habitacion']) -> str:
+    """Símbolos del minimapa de Visualizador: solo se ven las habitaciones visitadas."""
+    if hab is None or not hab.visitada:
+        return "   "
+    contenido = hab.contenido
+    simbolo = _SIMBOLOS_CONTENIDO.get(contenido.tipo) if contenido is not None else None
+    if simbolo is not None:
+        return simbolo
+    return " I " if hab.inicial else " . "
+
+
+def _inicio_ventana(centro: int, tamano: int, limite: Optional[int]) -> int:
+    """Primera celda de una ventana centrada que no se sale del mapa (sin límite en mapas infinitos)."""
+    inicio = centro - tamano // 2
+    if limite is None:
+        return inicio
+    return max(0, min(inicio, limite - tamano))
+
+
+class Minimapa:
+    """Ventana de ancho x alto celdas alrededor de una posición, con filas en caché.
+
+    Cada fila se guarda como lista de símbolos más el texto ya unido. Al moverse
+    la ventana solo se dibujan las filas o columnas que entran en ella. El
+    marcador del explorador se superpone al armar su fila y nunca entra en la caché.
+    """
+
+    def __init__(self, mapa: 'Mapa', ancho: int = 7, alto: int = 7,
+                 simbolo: Simbolo = simbolo_visitadas, marcador: str = " @ "):
+        self.mapa = mapa
+        self.ancho = ancho
+        self.alto = alto
+        self.simbolo = simbolo
+        self.marcador = marcador
+        self.celdas_dibujadas = 0  # cuántas veces se llamó a 'simbolo' (para medir la caché)
+        self._origen_x: Optional[int] = None
+        self._filas: Dict[int, List[str]] = {}
+        self._textos: Dict[int, str] = {}
+        self._sucias: Set[Tuple[int, int]] = set()
+        mapa.observar(self._al_cambiar)
+
+    def cerrar(self):
+        """Deja de escuchar al mapa (el minimapa ya no se va a dibujar)."""
+        self.mapa.dejar_de_observar(self._al_cambiar)
+
+    def _al_cambiar(self, hab: 'Habitacion', cambio: str):
+        # Solo importan las celdas que ya están en caché; el resto se dibujará al entrar en la ventana
+        if hab.y in self._filas and 0 <= hab.x - self._origen_x < self.ancho:
+            self._sucias.add((hab.x, hab.y))
+
+    def _dibujar(self, x: int, y: int) -> str:
+        self.celdas_dibujadas += 1
+        return self.simbolo(self.mapa.obtener_habitacion(x, y))
+
+    def ventana(self, posicion: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """(x0, y0, ancho, alto) de la ventana centrada en 'posicion' y recortada al mapa."""
+        mapa = self.mapa
+        ancho = self.ancho if mapa.ancho is None else min(self.ancho, mapa.ancho)
+        alto = self.alto if mapa.alto is None else min(self.alto, mapa.alto)
+        return (_inicio_ventana(posicion[0], ancho, mapa.ancho),
+                _inicio_ventana(posicion[1], alto, mapa.alto), ancho, alto)
+
+    def _desplazar(self, x0: int, ancho: int):
+        """Corre las filas en caché al nuevo origen horizontal; solo se dibujan las columnas que entran."""
+        anterior, self._origen_x = self._origen_x, x0
+        self._textos.clear()
+        if anterior is None or abs(x0 - anterior) >= ancho:
+            self._filas.clear()
+            return
+        for y, fila in self._filas.items():
+            if x0 > anterior:
+                fila[:] = fila[x0 - anterior:] + [self._dibujar(x, y) for x in range(anterior + ancho, x0 + ancho)]
+            else:
+                fila[:] = [self._dibujar(x, y) for x in range(x0, anterior)] + fila[:x0 - anterior]
+
+    @medido("minimapa.filas")
+    def filas(self, posicion: Tuple[int, int]) -> List[str]:
+        """Líneas de texto de la ventana alrededor de 'posicion', con el marcador en ella."""
+        dibujadas_antes = self.celdas_dibujadas
+        x0, y0, ancho, alto = self.ventana(posicion)
+        filas, textos = self._filas, self._textos
+        if self._origen_x is not None:
+            # Las celdas sucias se corrigen en las coordenadas viejas, antes de desplazar
+            for x, y in self._sucias:
+                fila = filas.get(y)
+                if fila is not None:
+                    fila[x - self._origen_x] = self._dibujar(x, y)
+                    textos.pop(y, None)
+        self._sucias.clear()
+
+        for y in [y for y in filas if not y0 <= y < y0 + alto]:
+            del filas[y]
+            textos.pop(y, None)
+        if x0 != self._origen_x:
+            self._desplazar(x0, ancho)
+
+        px, py = posicion
+        salida = []
+        for y in range(y0, y0 + alto):
+            fila = filas.get(y)
+            if fila is None:
+                fila = filas[y] = [self._dibujar(x, y) for x in range(x0, x0 + ancho)]
+            if y == py and 0 <= px - x0 < ancho:
+                i = px - x0
+                salida.append("".join(fila[:i]) + self.marcador + "".join(fila[i + 1:]))
+                continue
+            texto = textos.get(y)
+            if texto is None:
+                texto = textos[y] = "".join(fila)
+            salida.append(texto)
+        if instrumentacion.sesion is not None:
+            instrumentacion.contar("minimapa.celdas_dibujadas", self.celdas_dibujadas - dibujadas_antes)
+        return salida
+
+    def texto(self, posicion: Tuple[int, int]) -> str:
+        return "\n".join(self.filas(posicion))
@@ -0,0 +1,55 @@
+"""Conjuntos de celdas con inserción, borrado y muestreo uniforme en O(1)."""
+from array import array
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import random
+
+
+class ConjuntoIndexado:
+    """Conjunto de índices de celda (y * ancho + x) sobre un array denso.
+
+    'elementos' guarda los índices sin huecos, así que elegir uno al azar es un
+    único sorteo; 'posiciones' dice en qué lugar de 'elementos' está cada celda
+    (-1 si no pertenece), lo que permite quitar intercambiando con el último.
+    """
+
+    __slots__ = ('elementos', 'posiciones')
+
+    def __init__(self, n_celdas: int):
+        self.elementos = array('i')
+        self.posiciones = array('i', [-1]) * n_celdas
+
+    def __len__(self) -> int:
+        return len(self.elementos)
+
+    def __contains__(self, idx: int) -> bool:
+        return self.posiciones[idx] >= 0
+
+    def agregar(self, idx: int):
+        if self.posiciones[idx] < 0:
+            self.posiciones[idx] = len(self.elementos)
+            self.elementos.append(idx)
+
+    def quitar(self, idx: int):
+        pos = self.posiciones[idx]
+        if pos < 0:
+            return
+        ultimo = self.elementos.pop()
+        if ultimo != idx:
+            self.elementos[pos] = ultimo
+            self.posiciones[ultimo] = pos
+        self.posiciones[idx] = -1
+
+    def elegir(self, rng: 'random.Random', excluir: int = -1) -> int:
+        """Índice uniforme del conjunto, distinto de 'excluir'; -1 si no hay candidatos."""
+        elementos = self.elementos
+        pos = self.posiciones[excluir] if excluir >= 0 else -1
+        if pos < 0:
+            # Mismo sorteo que rng.choice sobre la lista de claves del mapa
+            return rng.choice(elementos) if elementos else -1
+        if len(elementos) < 2:
+            return -1
+        # Se sortea entre los demás lugares saltando el del excluido
+        i = rng.randrange(len(elementos) - 1)
+        return elementos[i + 1 if i >= pos else i]
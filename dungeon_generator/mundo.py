@@ -0,0 +1,352 @@
+import os
+import random
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .aleatorio import derivar_semilla
+from .habitacion import DIRECCIONES, DELTAS, OPUESTOS, BITS_DIRECCION
+from .mapa import MapaBase, _PLANTILLA_POR_TIPO
+from .muestreo import ConjuntoIndexado
+from .rejilla import RejillaCompacta, HabitacionCompacta
+
+ClaveTrozo = Tuple[int, int]
+
+# Probabilidades acumuladas de contenido por habitación dentro de un trozo
+_REPARTO_CONTENIDO = ((0.25, "monstruo"), (0.45, "tesoro"), (0.52, "evento"))
+
+
+class MapaInfinito(MapaBase):
+    """Dungeon sin límites dividido en trozos (chunks) de tamano x tamano celdas.
+
+    Cada trozo se genera bajo demanda y de forma determinista a partir de su
+    propia semilla, así que se puede descartar y regenerar igual. Las puertas
+    entre trozos vecinos salen de una semilla por borde: ambos lados eligen las
+    mismas celdas y las conexiones coinciden sin importar qué trozo se cargó antes.
+
+    Como mucho quedan 'max_chunks' trozos en memoria (LRU). Al desalojar uno solo
+    se conserva lo que cambió durante la partida (visitas y contenido consumido),
+    en memoria o en 'directorio_volcado' si se indica.
+
+    No hereda lo que necesita un mapa con límites (generar_estructura,
+    colocar_contenido, distancias_camino, enrutador, empaquetar): ver mapa.Mapa.
+    """
+
+    def __init__(self, semilla: Optional[int] = None, tamano_chunk: int = 32, densidad: float = 0.5,
+                 max_chunks: int = 64, directorio_volcado: Optional[str] = None, radio_precarga: int = 1):
+        self.ancho = self.alto = None  # sin límites
+        self.tamano_chunk = tamano_chunk
+        self.densidad = densidad
+        self.radio_precarga = radio_precarga
+        # El anillo precargado alrededor del explorador nunca se desaloja
+        self.max_chunks = max(max_chunks, (2 * radio_precarga + 1) ** 2 + 1)
+        self.directorio_volcado = directorio_volcado
+        if directorio_volcado:
+            os.makedirs(directorio_volcado, exist_ok=True)
+
+        self._chunks: 'OrderedDict[ClaveTrozo, RejillaCompacta]' = OrderedDict()
+        self._volcados: Dict[ClaveTrozo, bytes] = {}
+        # Por trozo cargado: celdas con habitación y celdas visitadas (ver posicion_aleatoria)
+        self._celdas: Dict[ClaveTrozo, Tuple[ConjuntoIndexado, ConjuntoIndexado]] = {}
+        self._chunk_actual: Optional[ClaveTrozo] = None
+        self.chunks_generados = 0
+        self.chunks_desalojados = 0
+
+        self._rejilla = None
+        self.habitaciones = HabitacionesPorTrozos(self)
+        super().__init__(semilla)
+        centro = tamano_chunk // 2
+        self._inicio = (centro, centro)
+        self.habitacion_inicial = self.obtener_habitacion(centro, centro)
+        self.al_entrar(centro, centro)
+
+    # --- ACCESO ---
+    def obtener_habitacion(self, x: int, y: int) -> Optional[HabitacionCompacta]:
+        t = self.tamano_chunk
+        cx, cy = x // t, y // t
+        rejilla = self._trozo(cx, cy)
+        idx = (y - cy * t) * t + (x - cx * t)
+        return HabitacionCompacta(rejilla, idx) if rejilla.ids[idx] else None
+
+    def al_entrar(self, x: int, y: int):
+        """Precarga los trozos alrededor del explorador cuando cambia de trozo."""
+        clave = (x // self.tamano_chunk, y // self.tamano_chunk)
+        if clave == self._chunk_actual:
+            return
+        self._chunk_actual = clave
+        r = self.radio_precarga
+        for dy in range(-r, r + 1):
+            for dx in range(-r, r + 1):
+                self._trozo(clave[0] + dx, clave[1] + dy)
+
+    def chunks_cargados(self) -> List[ClaveTrozo]:
+        return list(self._chunks)
+
+    def _reconstruir_indices(self):
+        """Solo los trozos cargados, por columnas: recorrer las vistas cargaría los trozos vecinos."""
+        self._reiniciar_indices()
+        for rejilla in self._chunks.values():
+            self._contar_columnas(rejilla.tipos, rejilla.conexiones, rejilla.visitadas)
+
+    def marcar_visitada(self, habitacion: HabitacionCompacta):
+        if not habitacion.visitada:
+            t = self.tamano_chunk
+            celdas = self._celdas.get((habitacion.x // t, habitacion.y // t))
+            if celdas is not None:
+                celdas[1].agregar((habitacion.y % t) * t + habitacion.x % t)
+        super().marcar_visitada(habitacion)
+
+    def posicion_aleatoria(self, rng: random.Random, solo_visitadas: bool = False,
+                           excluir: Optional[Tuple[int, int]] = None) -> Optional[Tuple[int, int]]:
+        """Habitación uniforme entre los trozos cargados; None si no hay candidatas.
+
+        Se elige el trozo según cuántas candidatas tiene y la celda con un único
+        sorteo en su ConjuntoIndexado: el coste depende de los trozos cargados,
+        no de las habitaciones.
+        """
+        t = self.tamano_chunk
+        cual = 1 if solo_visitadas else 0
+        clave_excluida, idx_excluido, pos_excluida = None, -1, -1
+        if excluir is not None:
+            clave_excluida = (excluir[0] // t, excluir[1] // t)
+            celdas = self._celdas.get(clave_excluida)
+            if celdas is not None:
+                idx_excluido = (excluir[1] % t) * t + excluir[0] % t
+                pos_excluida = celdas[cual].posiciones[idx_excluido]
+
+        total = sum(len(celdas[cual]) for celdas in self._celdas.values()) - (pos_excluida >= 0)
+        if total <= 0:
+            return None
+        sorteo = rng.randrange(total)
+        for clave, celdas in self._celdas.items():
+            elementos = celdas[cual].elementos
+            n = len(elementos)
+            if clave == clave_excluida and pos_excluida >= 0:
+                n -= 1
+                if sorteo < n:
+                    # Se salta el lugar del excluido, como ConjuntoIndexado.elegir
+                    idx = elementos[sorteo + 1 if sorteo >= pos_excluida else sorteo]
+                    return clave[0] * t + idx % t, clave[1] * t + idx // t
+            elif sorteo < n:
+                idx = elementos[sorteo]
+                return clave[0] * t + idx % t, clave[1] * t + idx // t
+            sorteo -= n
+        return None
+
+    def _indexar_celdas(self, clave: ClaveTrozo, rejilla: RejillaCompacta):
+        """Conjuntos (habitaciones, visitadas) del trozo para posicion_aleatoria."""
+        n_celdas = rejilla.ancho * rejilla.alto
+        habitaciones, visitadas = ConjuntoIndexado(n_celdas), ConjuntoIndexado(n_celdas)
+        columna = rejilla.visitadas
+        for idx in rejilla.indices_ocupados():
+            habitaciones.agregar(idx)
+            if columna[idx]:
+                visitadas.agregar(idx)
+        self._celdas[clave] = (habitaciones, visitadas)
+
+    # --- CACHÉ LRU DE TROZOS ---
+    def _trozo(self, cx: int, cy: int) -> RejillaCompacta:
+        clave = (cx, cy)
+        rejilla = self._chunks.get(clave)
+        if rejilla is not None:
+            self._chunks.move_to_end(clave)
+            return rejilla
+
+        rejilla = self._generar_trozo(cx, cy)
+        self._restaurar(clave, rejilla)
+        self._chunks[clave] = rejilla
+        self._indexar_celdas(clave, rejilla)
+        self._desalojar()
+        # Las estadísticas cubren los trozos cargados: cambiaron, se recalculan al consultarlas
+        self.invalidar_indices()
+        return rejilla
+
+    def _protegido(self, clave: ClaveTrozo) -> bool:
+        if self._chunk_actual is None:
+            return False
+        r = self.radio_precarga
+        return abs(clave[0] - self._chunk_actual[0]) <= r and abs(clave[1] - self._chunk_actual[1]) <= r
+
+    def _desalojar(self):
+        while len(self._chunks) > self.max_chunks:
+            victima = next((clave for clave in self._chunks if not self._protegido(clave)), None)
+            if victima is None:
+                return
+            self._volcar(victima, self._chunks.pop(victima))
+            del self._celdas[victima]
+            self.chunks_desalojados += 1
+
+    def _ruta_volcado(self, clave: ClaveTrozo) -> str:
+        return os.path.join(self.directorio_volcado, f"chunk_{clave[0]}_{clave[1]}.bin")
+
+    def _volcar(self, clave: ClaveTrozo, rejilla: RejillaCompacta):
+        """Guarda solo el estado de partida del trozo; la estructura se regenera con su semilla."""
+        if rejilla.visitadas.find(1) < 0:
+            return  # nunca se visitó: nada cambió respecto a la generación
+        datos = zlib.compress(bytes(rejilla.visitadas) + bytes(rejilla.tipos), 1)
+        if self.directorio_volcado:
+            with open(self._ruta_volcado(clave), 'wb') as f:
+                f.write(datos)
+        else:
+            self._volcados[clave] = datos
+
+    def _restaurar(self, clave: ClaveTrozo, rejilla: RejillaCompacta):
+        datos = self._volcados.get(clave)
+        if datos is None and self.directorio_volcado and os.path.exists(self._ruta_volcado(clave)):
+            with open(self._ruta_volcado(clave), 'rb') as f:
+                datos = f.read()
+        if datos is None:
+            return
+        estado = zlib.decompress(datos)
+        n_celdas = len(rejilla.visitadas)
+        rejilla.visitadas[:] = estado[:n_celdas]
+        tipos_guardados = estado[n_celdas:]
+        tipos = rejilla.tipos
+        for idx in range(n_celdas):
+            if tipos[idx] and not tipos_guardados[idx]:
+                rejilla.fijar_contenido(idx, None)  # consumido antes del desalojo
+
+    # --- GENERACIÓN DE UN TROZO ---
+    def _puertas(self, orientacion: str, cx: int, cy: int) -> List[int]:
+        """Posiciones (a lo largo del borde) de las puertas entre un trozo y su vecino este ('v') o sur ('h')."""
+        rng = random.Random(derivar_semilla(self.flujos.semilla, "borde", orientacion, cx, cy))
+        return rng.sample(range(self.tamano_chunk), 1 + (rng.random() < 0.5))
+
+    def _generar_trozo(self, cx: int, cy: int) -> RejillaCompacta:
+        t = self.tamano_chunk
+        rejilla = RejillaCompacta(t, t)
+        rejilla.origen_x, rejilla.origen_y = cx * t, cy * t
+        rejilla.resolver_vecina = self.obtener_habitacion
+        ids, mascaras, distancias = rejilla.ids, rejilla.conexiones, rejilla.distancias
+        rng = random.Random(derivar_semilla(self.flujos.semilla, "chunk", cx, cy))
+
+        # Celdas de puerta en los cuatro bordes, con su conexión hacia el trozo vecino ya marcada
+        semillas = []
+        for fila in self._puertas('v', cx, cy):
+            semillas.append((fila * t + t - 1, BITS_DIRECCION["este"]))
+        for fila in self._puertas('v', cx - 1, cy):
+            semillas.append((fila * t, BITS_DIRECCION["oeste"]))
+        for columna in self._puertas('h', cx, cy):
+            semillas.append(((t - 1) * t + columna, BITS_DIRECCION["sur"]))
+        for columna in self._puertas('h', cx, cy - 1):
+            semillas.append((columna, BITS_DIRECCION["norte"]))
+        idx_inicio = -1
+        if (cx, cy) == (0, 0):
+            idx_inicio = self._inicio[1] * t + self._inicio[0]
+            semillas.append((idx_inicio, 0))
+
+        # Crecimiento aleatorio desde todas las semillas; las componentes que se tocan se unen
+        raiz = array('i', [-1]) * (t * t)
+
+        def buscar(i: int) -> int:
+            while raiz[i] != i:
+                raiz[i] = raiz[raiz[i]]
+                i = raiz[i]
+            return i
+
+        frontera = array('i')
+        creadas: List[int] = []
+        n_componentes = 0
+        for idx, bit in semillas:
+            mascaras[idx] |= bit
+            if not ids[idx]:
+                creadas.append(idx)
+                ids[idx] = len(creadas)
+                raiz[idx] = idx
+                frontera.append(idx)
+                n_componentes += 1
+
+        vecinos = [(DELTAS[d][0], DELTAS[d][1], DELTAS[d][1] * t + DELTAS[d][0],
+                    BITS_DIRECCION[d], BITS_DIRECCION[OPUESTOS[d]]) for d in DIRECCIONES]
+        objetivo = max(len(creadas), int(self.densidad * t * t))
+
+        while frontera and (n_componentes > 1 or len(creadas) < objetivo):
+            i = rng.randrange(len(frontera))
+            actual = frontera[i]
+            ax, ay = actual % t, actual // t
+            libres = [(delta, bit, bit_op) for dx, dy, delta, bit, bit_op in vecinos
+                      if 0 <= ax + dx < t and 0 <= ay + dy < t and not ids[actual + delta]]
+            if not libres:
+                frontera[i] = frontera[-1]
+                frontera.pop()
+                continue
+
+            delta, bit, bit_op = rng.choice(libres)
+            nuevo = actual + delta
+            creadas.append(nuevo)
+            ids[nuevo] = len(creadas)
+            mascaras[actual] |= bit
+            mascaras[nuevo] |= bit_op
+            raiz[nuevo] = buscar(actual)
+            frontera.append(nuevo)
+
+            nx, ny = nuevo % t, nuevo // t
+            for dx, dy, delta_v, bit_v, bit_v_op in vecinos:
+                vecina = nuevo + delta_v
+                if 0 <= nx + dx < t and 0 <= ny + dy < t and ids[vecina]:
+                    r1, r2 = buscar(nuevo), buscar(vecina)
+                    if r1 != r2:
+                        raiz[r2] = r1
+                        mascaras[nuevo] |= bit_v
+                        mascaras[vecina] |= bit_v_op
+                        n_componentes -= 1
+
+        rejilla.n_ocupadas = len(creadas)
+        rejilla.idx_inicial = idx_inicio
+        inicio_x, inicio_y = self._inicio
+        codigo_inicio = rejilla.codigo_estado("Entrada Segura")
+        for idx in creadas:
+            gx, gy = rejilla.origen_x + idx % t, rejilla.origen_y + idx // t
+            distancia = abs(gx - inicio_x) + abs(gy - inicio_y)
+            distancias[idx] = distancia
+            if idx == idx_inicio:
+                rejilla.estados[idx] = codigo_inicio
+                continue
+            sorteo = rng.random()
+            for limite, tipo in _REPARTO_CONTENIDO:
+                if sorteo < limite:
+                    plantilla = _PLANTILLA_POR_TIPO.get(tipo)
+                    if plantilla is not None:
+                        rejilla.fijar_plantilla(idx, plantilla, distancia)
+                    else:
+                        rejilla.fijar_contenido(idx, self._crear_contenido(tipo, distancia, rng))
+                    rejilla.estados[idx] = rejilla.codigo_estado(tipo.capitalize())
+                    break
+
+        self.chunks_generados += 1
+        return rejilla
+
+
+class HabitacionesPorTrozos(Mapping):
+    """Mapping (x, y) -> habitación de un MapaInfinito.
+
+    El acceso por clave genera el trozo si hace falta; la iteración y len()
+    solo cubren los trozos cargados en memoria.
+    """
+
+    def __init__(self, mundo: MapaInfinito):
+        self._mundo = mundo
+
+    def __getitem__(self, clave: Tuple[int, int]) -> HabitacionCompacta:
+        hab = self._mundo.obtener_habitacion(*clave)
+        if hab is None:
+            raise KeyError(clave)
+        return hab
+
+    def get(self, clave: Tuple[int, int], default=None):
+        hab = self._mundo.obtener_habitacion(*clave)
+        return hab if hab is not None else default
+
+    def __contains__(self, clave) -> bool:
+        return self._mundo.obtener_habitacion(*clave) is not None
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        for rejilla in list(self._mundo._chunks.values()):
+            t = rejilla.ancho
+            for idx in rejilla.indices_ocupados():
+                yield (rejilla.origen_x + idx % t, rejilla.origen_y + idx // t)
+
+    def __len__(self) -> int:
+        return sum(rejilla.n_ocupadas for rejilla in self._mundo._chunks.values())
@@ -1,5 +1,6 @@
 
 class Objeto:
+    __slots__ = ('nombre', 'valor', 'descripcion')
    
     def __init__(self, nombre: str, valor: int, descripcion: str):
         self.nombre = nombre
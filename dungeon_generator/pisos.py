@@ -0,0 +1,197 @@
+"""Dungeons de varios pisos unidos por escaleras.
+
+El piso 1 es el mapa de la partida de siempre; el piso n se genera con una
+semilla derivada de la del piso 1 (o una de respaldo si el dungeon se corta
+sin jefe, ver mapa.generar_mapa_jugable) y su contenido sube NIVELES_POR_PISO
+niveles por piso. Al derrotar al jefe de un piso se abre en su habitación la escalera
+hacia abajo; la de subida está en la habitación inicial de cada piso.
+
+Mientras se juega el piso n, el n+1 se genera en segundo plano (un hilo, o un
+proceso con segundo_plano="proceso"), así que bajar solo cambia el mapa por
+uno ya listo. Los pisos que se dejan se escriben en .dgn en otro hilo y se
+sueltan de memoria: quedan el piso actual y el siguiente. Volver a un piso lo
+carga de disco con su estado (visitas, contenido consumido, generadores).
+
+    pisos = Pisos(mapa, n_habitaciones=30, n_pisos=3)
+    if pisos.escalera_abajo(explorador):
+        latencia = pisos.bajar(explorador)
+    pisos.informe()   # descensos, esperas y latencia de bajar
+    pisos.cerrar()
+"""
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Union
+
+from . import instrumentacion
+from .aleatorio import derivar_semilla
+from .binario import cargar_binario, cerrar_archivo, guardar_binario
+from .explorador import Explorador
+from .mapa import Mapa, generar_mapa_jugable
+
+if TYPE_CHECKING:
+    from .habitacion import Habitacion
+
+NIVELES_POR_PISO = 5
+SEGUNDOS_PLANOS = ("hilo", "proceso")
+
+
+def _generar_en_disco(ancho: int, alto: int, n_habitaciones: int, semilla: int, compacto: bool,
+                      nivel_extra: int, ruta: str) -> str:
+    """Tarea del proceso generador: el mapa vuelve como .dgn (se carga perezosamente, sin copiarlo)."""
+    mapa = generar_mapa_jugable(ancho, alto, n_habitaciones, semilla, compacto, nivel_extra=nivel_extra)
+    guardar_binario(mapa, Explorador(mapa, salida=None), ruta)
+    return ruta
+
+
+def _guardar_piso(mapa: Mapa, ruta: str):
+    guardar_binario(mapa, Explorador(mapa, salida=None), ruta)
+    # Un piso que ya venía de disco deja de necesitar su .dgn anterior (ya quedó todo materializado)
+    cerrar_archivo(mapa)
+
+
+class Pisos:
+    """Pisos de una partida: el actual en memoria, el siguiente en preparación y el resto en disco."""
+
+    def __init__(self, mapa: Mapa, n_habitaciones: int, n_pisos: int = 3, compacto: bool = False,
+                 directorio: Optional[str] = None, segundo_plano: Optional[str] = "hilo"):
+        if segundo_plano is not None and segundo_plano not in SEGUNDOS_PLANOS:
+            raise ValueError(f"Segundo plano desconocido: {segundo_plano!r} (opciones: {', '.join(SEGUNDOS_PLANOS)})")
+        self.mapa = mapa
+        self.actual = 1
+        self.n_pisos = n_pisos
+        self.n_habitaciones = n_habitaciones
+        self.compacto = compacto
+        self.semilla = mapa.flujos.semilla
+        self._directorio_propio = directorio is None
+        self.directorio = directorio if directorio is not None else tempfile.mkdtemp(prefix="dungeon_pisos_")
+        os.makedirs(self.directorio, exist_ok=True)
+
+        self._generador: Optional[Executor] = None
+        self._escritor: Optional[Executor] = None
+        if segundo_plano == "proceso":
+            from concurrent.futures import ProcessPoolExecutor
+            self._generador = ProcessPoolExecutor(max_workers=1)
+        elif segundo_plano == "hilo":
+            self._generador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pisos-generador")
+        if segundo_plano is not None:
+            # Escribir un piso no debe quedar detrás de generar el siguiente
+            self._escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pisos-escritor")
+        self._pedidos: Dict[int, Future] = {}
+        self._escrituras: Dict[int, Future] = {}
+        self._en_disco: Set[int] = set()
+
+        # Segundos de cada bajar() y cuántas veces hubo que esperar al generador
+        self.latencias: List[float] = []
+        self.esperas = 0
+        self._pedir(2)
+
+    def semilla_piso(self, n: int) -> int:
+        return self.semilla if n == 1 else derivar_semilla(self.semilla, "piso", n)
+
+    def ruta(self, n: int) -> str:
+        return os.path.join(self.directorio, f"piso_{n}.dgn")
+
+    # --- GENERACIÓN Y DISCO ---
+    def _parametros(self, n: int) -> tuple:
+        return (self.mapa.ancho, self.mapa.alto, self.n_habitaciones, self.semilla_piso(n), self.compacto,
+                (n - 1) * NIVELES_POR_PISO)
+
+    def _generar(self, n: int) -> Mapa:
+        ancho, alto, n_habitaciones, semilla, compacto, nivel_extra = self._parametros(n)
+        with instrumentacion.tramo("pisos.generar", piso=n):
+            return generar_mapa_jugable(ancho, alto, n_habitaciones, semilla, compacto, nivel_extra=nivel_extra)
+
+    def _pedir(self, n: int):
+        """Empieza a generar el piso n en segundo plano, si hace falta."""
+        if self._generador is None or n > self.n_pisos or n in self._pedidos or n in self._en_disco:
+            return
+        if isinstance(self._generador, ThreadPoolExecutor):
+            self._pedidos[n] = self._generador.submit(self._generar, n)
+        else:
+            self._pedidos[n] = self._generador.submit(_generar_en_disco, *self._parametros(n), self.ruta(n))
+
+    def _obtener(self, n: int) -> Mapa:
+        if n in self._en_disco:
+            escritura = self._escrituras.pop(n, None)
+            if escritura is not None:
+                escritura.result()
+            return cargar_binario(self.ruta(n))[0]
+        pedido = self._pedidos.pop(n, None)
+        if pedido is None:
+            return self._generar(n)
+        if not pedido.done():
+            self.esperas += 1
+            instrumentacion.contar("pisos.esperas")
+        resultado: Union[Mapa, str] = pedido.result()
+        return cargar_binario(resultado)[0] if isinstance(resultado, str) else resultado
+
+    def _soltar(self, n: int, mapa: Mapa):
+        """Manda el piso n a disco; la memoria se libera cuando termina de escribirse."""
+        self._en_disco.add(n)
+        if self._escritor is None:
+            _guardar_piso(mapa, self.ruta(n))
+        else:
+            self._escrituras[n] = self._escritor.submit(_guardar_piso, mapa, self.ruta(n))
+
+    # --- ESCALERAS ---
+    @staticmethod
+    def _en(hab: 'Habitacion', destino: Optional['Habitacion']) -> bool:
+        return destino is not None and hab.coordenadas == destino.coordenadas
+
+    def escalera_abajo(self, explorador: Explorador) -> bool:
+        """True si el explorador está en la habitación del jefe ya derrotado y hay un piso más abajo."""
+        hab = explorador.habitacion_actual
+        return self.actual < self.n_pisos and self._en(hab, self.mapa.habitacion_jefe) and hab.contenido is None
+
+    def escalera_arriba(self, explorador: Explorador) -> bool:
+        return self.actual > 1 and self._en(explorador.habitacion_actual, self.mapa.habitacion_inicial)
+
+    def bajar(self, explorador: Explorador) -> float:
+        """Pasa al piso siguiente, a su habitación inicial; devuelve los segundos que tardó."""
+        inicio = time.perf_counter()
+        with instrumentacion.tramo("pisos.bajar", piso=self.actual + 1):
+            self._cambiar(explorador, self.actual + 1)
+            llegada = self.mapa.habitacion_inicial
+            explorador.posicion_actual = llegada.coordenadas
+            self.mapa.marcar_visitada(llegada)
+        latencia = time.perf_counter() - inicio
+        self.latencias.append(latencia)
+        return latencia
+
+    def subir(self, explorador: Explorador):
+        """Vuelve al piso anterior, a la escalera de bajada (la habitación de su jefe)."""
+        with instrumentacion.tramo("pisos.subir", piso=self.actual - 1):
+            self._cambiar(explorador, self.actual - 1)
+            explorador.posicion_actual = self.mapa.habitacion_jefe.coordenadas
+
+    def _cambiar(self, explorador: Explorador, n: int):
+        self._soltar(self.actual, self.mapa)
+        self.mapa = self._obtener(n)
+        self.actual = n
+        explorador.mapa = self.mapa
+        explorador.rng = self.mapa.flujos.combate
+        self._pedir(n + 1)
+
+    # --- INFORME Y CIERRE ---
+    def informe(self) -> Dict[str, float]:
+        """Latencia de bajar en milisegundos (media, máxima) y cuántas veces hubo que esperar."""
+        ms = [latencia * 1000 for latencia in self.latencias]
+        return {
+            "descensos": len(ms),
+            "esperas": self.esperas,
+            "media_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+            "max_ms": round(max(ms), 3) if ms else 0.0,
+        }
+
+    def cerrar(self):
+        """Detiene el segundo plano y, si el directorio era temporal, lo borra."""
+        for ejecutor in (self._generador, self._escritor):
+            if ejecutor is not None:
+                ejecutor.shutdown(wait=True, cancel_futures=True)
+        self._pedidos.clear()
+        self._escrituras.clear()
+        if self._directorio_propio:
+            shutil.rmtree(self.directorio, ignore_errors=True)
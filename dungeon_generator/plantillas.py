@@ -0,0 +1,110 @@
+"""Registro de plantillas de contenido (patrón flyweight).
+
+Una Plantilla guarda lo que comparten todas las habitaciones con el mismo
+contenido: nombre, textos y fórmulas de escalado con la distancia. Cada
+habitación solo guarda la plantilla, su nivel (la distancia) y el estado que
+cambia durante la partida, como la vida restante de un monstruo. Los textos
+y los objetos de recompensa se construyen recién cuando se leen.
+"""
+from typing import Dict, List, Tuple
+
+from .objeto import Objeto
+
+Escala = Tuple[int, float]  # (base, factor): valor = base + int(nivel * factor)
+
+
+class Plantilla:
+    """Definición inmutable de un tipo de contenido."""
+
+    __slots__ = ('id', 'clave', 'tipo', 'nombre', 'vida', 'ataque', 'valor', 'efecto',
+                 'nombre_objeto', 'descripcion_objeto')
+
+    def __init__(self, clave: str, tipo: str, nombre: str, vida: Escala = (0, 0), ataque: Escala = (0, 0),
+                 valor: Escala = (0, 0), efecto: int = 0, nombre_objeto: str = "", descripcion_objeto: str = ""):
+        self.id = -1
+        self.clave = clave
+        self.tipo = tipo
+        self.nombre = nombre
+        self.vida = vida
+        self.ataque = ataque
+        self.valor = valor
+        self.efecto = efecto
+        # Textos de la recompensa; '{nivel}' se reemplaza al crear el Objeto
+        self.nombre_objeto = nombre_objeto
+        self.descripcion_objeto = descripcion_objeto
+
+    @staticmethod
+    def _escalar(escala: Escala, nivel: int) -> int:
+        base, factor = escala
+        return base + int(nivel * factor)
+
+    def vida_en(self, nivel: int) -> int:
+        return self._escalar(self.vida, nivel)
+
+    def ataque_en(self, nivel: int) -> int:
+        return self._escalar(self.ataque, nivel)
+
+    def valor_en(self, nivel: int) -> int:
+        return self._escalar(self.valor, nivel)
+
+    def objeto_en(self, nivel: int) -> Objeto:
+        """Recompensa de la plantilla para 'nivel' (se crea solo cuando alguien la pide)."""
+        return Objeto(
+            nombre=self.nombre_objeto.format(nivel=nivel),
+            valor=self.valor_en(nivel),
+            descripcion=self.descripcion_objeto.format(nivel=nivel),
+        )
+
+    def __repr__(self) -> str:
+        return f"Plantilla({self.clave!r})"
+
+
+# --- REGISTRO ---
+
+PLANTILLAS: List[Plantilla] = []
+_POR_CLAVE: Dict[str, Plantilla] = {}
+
+
+def registrar(plantilla: Plantilla) -> Plantilla:
+    """Agrega la plantilla al registro (o devuelve la ya registrada con la misma clave)."""
+    existente = _POR_CLAVE.get(plantilla.clave)
+    if existente is not None:
+        return existente
+    plantilla.id = len(PLANTILLAS)
+    PLANTILLAS.append(plantilla)
+    _POR_CLAVE[plantilla.clave] = plantilla
+    return plantilla
+
+
+def obtener(clave: str) -> Plantilla:
+    return _POR_CLAVE[clave]
+
+
+def plantilla_fija(tipo: str, nombre: str, vida: int = 0, ataque: int = 0, efecto: int = 0) -> Plantilla:
+    """Plantilla sin escalado para contenido creado a mano (p. ej. Monstruo(vida, ataque)).
+
+    Se comparte entre todos los contenidos con los mismos valores.
+    """
+    clave = f"{tipo}:{nombre}:{vida}:{ataque}:{efecto}"
+    plantilla = _POR_CLAVE.get(clave)
+    if plantilla is None:
+        plantilla = registrar(Plantilla(clave, tipo, nombre, vida=(vida, 0), ataque=(ataque, 0), efecto=efecto))
+    return plantilla
+
+
+# Plantillas que usa Mapa._crear_contenido; las fórmulas son las de la generación original
+ORCO = registrar(Plantilla("orco", "monstruo", "Orco Salvaje", vida=(5, 2), ataque=(2, 0.5)))
+JOYA = registrar(Plantilla(
+    "joya", "tesoro", "Joya", valor=(50, 10),
+    nombre_objeto="Joya Dist. {nivel}",
+    descripcion_objeto="Una joya con un brillo tenue, encontrada lejos (Distancia: {nivel}).",
+))
+JEFE = registrar(Plantilla(
+    "jefe", "jefe", "Gran Jefe Oscuro", vida=(20, 5), ataque=(5, 2), valor=(500, 50),
+    nombre_objeto="Corona del Jefe",
+    descripcion_objeto="El tesoro final del dungeon: un símbolo de poder.",
+))
+# Los eventos no escalan: son las mismas plantillas que usan Trampa(2), Curacion(3) y Portal(mapa)
+TRAMPA = plantilla_fija("evento", "Trampa Oculta", efecto=2)
+CURACION = plantilla_fija("evento", "Fuente de Vida", efecto=3)
+PORTAL = plantilla_fija("evento", "Portal Dimensional")
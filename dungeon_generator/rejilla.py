@@ -0,0 +1,350 @@
+import json
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .habitacion import DIRECCIONES, DELTAS, OPUESTOS, BITS_DIRECCION
+from .contenido import ContenidoHabitacion, Monstruo, Tesoro, Jefe, Trampa, Curacion, Portal
+from .objeto import Objeto
+from .plantillas import PLANTILLAS, Plantilla
+
+# Códigos de tipo de contenido guardados en la columna 'tipos' (0 = sin contenido)
+CODIGOS_CONTENIDO: Dict[str, int] = {"monstruo": 1, "tesoro": 2, "jefe": 3, "evento": 4}
+TIPOS_CONTENIDO: Dict[int, str] = {codigo: tipo for tipo, codigo in CODIGOS_CONTENIDO.items()}
+
+# Clase que materializa una celda guardada como (plantilla, nivel), según el tipo de la plantilla
+CLASES_PLANTILLA = {"monstruo": Monstruo, "tesoro": Tesoro, "jefe": Jefe}
+
+# Clases de los objetos de 'contenidos' que viajan en la forma empaquetada, por nombre
+CLASES_EMPAQUETADAS = {clase.__name__: clase for clase in (Monstruo, Tesoro, Jefe, Trampa, Curacion, Portal)}
+
+# Estados conocidos de antemano; los nuevos se agregan a la tabla de cada rejilla
+ESTADOS_BASE: Tuple[str, ...] = ("Vacía", "Entrada Segura", "Monstruo", "Tesoro", "Jefe", "Evento")
+
+# Cabecera de RejillaCompacta.empaquetar(): magia, versión, ancho, alto, idx inicial,
+# celdas ocupadas, siguiente id y longitud de la tabla de estados
+_CABECERA = struct.Struct('<4sHiiiiiI')
+_MAGIA = b'RJC1'
+_VERSION_EMPAQUETADO = 2
+
+
+class RejillaCompacta:
+    """Almacén columnar de las celdas del mapa, indexado por idx = y * ancho + x.
+
+    Cada celda ocupa unos pocos bytes repartidos en columnas planas:
+    id (0 = celda libre), máscara de conexiones de 4 bits, distancia,
+    visitada, código de contenido y código de estado. El contenido generado
+    se guarda como (id de plantilla, nivel) y se materializa en 'contenidos'
+    la primera vez que se lee; allí van también los objetos asignados a mano.
+    """
+
+    def __init__(self, ancho: int, alto: int):
+        self.ancho = ancho
+        self.alto = alto
+        n_celdas = ancho * alto
+        self.ids = array('i', bytes(4 * n_celdas))
+        self.conexiones = bytearray(n_celdas)
+        self.distancias = array('i', bytes(4 * n_celdas))
+        self.visitadas = bytearray(n_celdas)
+        self.tipos = bytearray(n_celdas)
+        self.estados = bytearray(n_celdas)
+        self.plantillas = array('H', bytes(2 * n_celdas))  # id de plantilla + 1 (0 = ninguna)
+        self.niveles = array('i', bytes(4 * n_celdas))
+        self.contenidos: Dict[int, ContenidoHabitacion] = {}
+        self.tabla_estados: List[str] = list(ESTADOS_BASE)
+        self._codigos_estado: Dict[str, int] = {estado: i for i, estado in enumerate(self.tabla_estados)}
+        self.idx_inicial = -1
+        self.n_ocupadas = 0
+        # Desplazamiento del índice plano para cada dirección
+        self.deltas_idx: Dict[str, int] = {d: dy * ancho + dx for d, (dx, dy) in DELTAS.items()}
+        # Para rejillas que son un trozo (chunk) de un mapa mayor: posición global de la celda 0
+        # y función que entrega las vecinas que caen fuera de esta rejilla
+        self.origen_x = 0
+        self.origen_y = 0
+        self.resolver_vecina: Optional[Callable[[int, int], Optional['HabitacionCompacta']]] = None
+
+    def indice(self, x: int, y: int) -> int:
+        return y * self.ancho + x
+
+    def ocupada(self, idx: int) -> bool:
+        return self.ids[idx] != 0
+
+    def agregar(self, idx: int, id: int, inicial: bool = False):
+        """Marca la celda como ocupada por la habitación 'id'."""
+        self.ids[idx] = id
+        self.n_ocupadas += 1
+        if inicial:
+            self.idx_inicial = idx
+
+    def conectar(self, idx1: int, idx2: int, direccion: str):
+        self.conexiones[idx1] |= BITS_DIRECCION[direccion]
+        self.conexiones[idx2] |= BITS_DIRECCION[OPUESTOS[direccion]]
+
+    def codigo_estado(self, estado: str) -> int:
+        codigo = self._codigos_estado.get(estado)
+        if codigo is None:
+            if len(self.tabla_estados) > 255:
+                raise ValueError(f"Demasiados estados distintos en la rejilla: {estado}")
+            codigo = len(self.tabla_estados)
+            self.tabla_estados.append(estado)
+            self._codigos_estado[estado] = codigo
+        return codigo
+
+    def fijar_contenido(self, idx: int, contenido: Optional[ContenidoHabitacion]):
+        self.plantillas[idx] = 0
+        if contenido is None:
+            self.contenidos.pop(idx, None)
+            self.tipos[idx] = 0
+        else:
+            self.contenidos[idx] = contenido
+            self.tipos[idx] = CODIGOS_CONTENIDO.get(contenido.tipo, 0)
+
+    def fijar_plantilla(self, idx: int, plantilla: Plantilla, nivel: int):
+        """Contenido generado sin crear ningún objeto: solo se anotan plantilla y nivel."""
+        self.contenidos.pop(idx, None)
+        self.plantillas[idx] = plantilla.id + 1
+        self.niveles[idx] = nivel
+        self.tipos[idx] = CODIGOS_CONTENIDO[plantilla.tipo]
+
+    def contenido(self, idx: int) -> Optional[ContenidoHabitacion]:
+        contenido = self.contenidos.get(idx)
+        if contenido is None and self.plantillas[idx]:
+            plantilla = PLANTILLAS[self.plantillas[idx] - 1]
+            contenido = CLASES_PLANTILLA[plantilla.tipo].desde_plantilla(plantilla, self.niveles[idx])
+            # Se guarda para que lecturas sucesivas vean el mismo objeto (y su estado)
+            self.contenidos[idx] = contenido
+            self.plantillas[idx] = 0
+        return contenido
+
+    def indices_ocupados(self) -> Iterator[int]:
+        ids = self.ids
+        return (idx for idx in range(len(ids)) if ids[idx])
+
+    def vista(self, idx: int) -> 'HabitacionCompacta':
+        return HabitacionCompacta(self, idx)
+
+    # --- FORMA EMPAQUETADA (para enviar entre procesos o guardar en disco) ---
+    def empaquetar(self, siguiente_id: int = 0, nivel_compresion: int = 1) -> bytes:
+        """Serializa las columnas a bytes little-endian comprimidos con zlib.
+
+        El contenido sin materializar viaja como (plantilla, nivel); los objetos de
+        'contenidos' como los argumentos de su constructor, en JSON tras las columnas.
+        """
+        columnas = []
+        for columna in (self.ids, self.distancias, self.plantillas, self.niveles):
+            if sys.byteorder == 'big':
+                columna = array(columna.typecode, columna)
+                columna.byteswap()
+            columnas.append(columna.tobytes())
+        columnas.extend((self.conexiones, self.visitadas, self.tipos, self.estados))
+        columnas.append(json.dumps([_contenido_a_lista(idx, contenido) for idx, contenido in self.contenidos.items()],
+                                   separators=(',', ':')).encode("utf-8"))
+        tabla = "\0".join(self.tabla_estados).encode("utf-8")
+        cabecera = _CABECERA.pack(_MAGIA, _VERSION_EMPAQUETADO, self.ancho, self.alto,
+                                  self.idx_inicial, self.n_ocupadas, siguiente_id, len(tabla))
+        return cabecera + tabla + zlib.compress(b"".join(columnas), nivel_compresion)
+
+    @classmethod
+    def desempaquetar(cls, datos: bytes) -> Tuple['RejillaCompacta', int]:
+        """Inverso de empaquetar(); devuelve (rejilla, siguiente_id).
+
+        Los portales vuelven sin mapa: Mapa.desempaquetar() se lo asigna.
+        """
+        magia, version, ancho, alto, idx_inicial, n_ocupadas, siguiente_id, n_tabla = _CABECERA.unpack_from(datos)
+        if magia != _MAGIA or version != _VERSION_EMPAQUETADO:
+            raise ValueError(f"Datos de rejilla no reconocidos (magia={magia!r}, versión={version})")
+        inicio = _CABECERA.size
+        tabla = bytes(datos[inicio:inicio + n_tabla]).decode("utf-8").split("\0")
+        cuerpo = zlib.decompress(datos[inicio + n_tabla:])
+
+        rejilla = cls(ancho, alto)
+        n_celdas = ancho * alto
+        pos = 0
+        for nombre in ('ids', 'distancias', 'plantillas', 'niveles'):
+            columna = array(getattr(rejilla, nombre).typecode)
+            n_bytes = columna.itemsize * n_celdas
+            columna.frombytes(cuerpo[pos:pos + n_bytes])
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            setattr(rejilla, nombre, columna)
+            pos += n_bytes
+        for nombre in ('conexiones', 'visitadas', 'tipos', 'estados'):
+            setattr(rejilla, nombre, bytearray(cuerpo[pos:pos + n_celdas]))
+            pos += n_celdas
+        for idx, nombre_clase, parametros in json.loads(cuerpo[pos:].decode("utf-8")):
+            rejilla.contenidos[idx] = _lista_a_contenido(nombre_clase, parametros)
+
+        rejilla.idx_inicial = idx_inicial
+        rejilla.n_ocupadas = n_ocupadas
+        rejilla.tabla_estados = tabla
+        rejilla._codigos_estado = {estado: i for i, estado in enumerate(tabla)}
+        return rejilla, siguiente_id
+
+
+def _contenido_a_lista(idx: int, contenido: ContenidoHabitacion) -> list:
+    """[idx, clase, argumentos del constructor]; los objetos de recompensa van como [nombre, valor, descripcion]."""
+    nombre_clase = type(contenido).__name__
+    if nombre_clase not in CLASES_EMPAQUETADAS:
+        raise ValueError(f"Contenido no soportado por la forma empaquetada: {nombre_clase}")
+    parametros = {clave: [valor.nombre, valor.valor, valor.descripcion] if isinstance(valor, Objeto) else valor
+                  for clave, valor in contenido.parametros().items()}
+    return [idx, nombre_clase, parametros]
+
+
+def _lista_a_contenido(nombre_clase: str, parametros: dict) -> ContenidoHabitacion:
+    clase = CLASES_EMPAQUETADAS[nombre_clase]
+    if clase is Portal:
+        return Portal(None)
+    for clave in ('recompensa', 'recompensa_especial'):
+        if clave in parametros:
+            parametros[clave] = Objeto(*parametros[clave])
+    return clase(**parametros)
+
+
+class HabitacionCompacta:
+    """Vista ligera sobre una celda de RejillaCompacta con la interfaz de Habitacion.
+
+    No guarda estado propio: cada lectura y escritura va a las columnas de la rejilla.
+    """
+    __slots__ = ("_rejilla", "_idx")
+
+    def __init__(self, rejilla: RejillaCompacta, idx: int):
+        self._rejilla = rejilla
+        self._idx = idx
+
+    def __eq__(self, otra: object) -> bool:
+        return (isinstance(otra, HabitacionCompacta)
+                and otra._rejilla is self._rejilla and otra._idx == self._idx)
+
+    def __hash__(self) -> int:
+        return hash((id(self._rejilla), self._idx))
+
+    @property
+    def id(self) -> int:
+        return self._rejilla.ids[self._idx]
+
+    @property
+    def x(self) -> int:
+        return self._rejilla.origen_x + self._idx % self._rejilla.ancho
+
+    @property
+    def y(self) -> int:
+        return self._rejilla.origen_y + self._idx // self._rejilla.ancho
+
+    @property
+    def coordenadas(self) -> Tuple[int, int]:
+        rejilla = self._rejilla
+        return (rejilla.origen_x + self._idx % rejilla.ancho, rejilla.origen_y + self._idx // rejilla.ancho)
+
+    @property
+    def inicial(self) -> bool:
+        return self._idx == self._rejilla.idx_inicial
+
+    @property
+    def conexiones(self) -> Dict[str, 'HabitacionCompacta']:
+        rejilla = self._rejilla
+        mascara = rejilla.conexiones[self._idx]
+        if rejilla.resolver_vecina is None:
+            return {
+                direccion: HabitacionCompacta(rejilla, self._idx + rejilla.deltas_idx[direccion])
+                for direccion in DIRECCIONES if mascara & BITS_DIRECCION[direccion]
+            }
+
+        # Trozo de un mapa mayor: las conexiones pueden cruzar el borde de la rejilla
+        lx, ly = self._idx % rejilla.ancho, self._idx // rejilla.ancho
+        conexiones = {}
+        for direccion in DIRECCIONES:
+            if mascara & BITS_DIRECCION[direccion]:
+                dx, dy = DELTAS[direccion]
+                if 0 <= lx + dx < rejilla.ancho and 0 <= ly + dy < rejilla.alto:
+                    conexiones[direccion] = HabitacionCompacta(rejilla, self._idx + rejilla.deltas_idx[direccion])
+                else:
+                    vecina = rejilla.resolver_vecina(rejilla.origen_x + lx + dx, rejilla.origen_y + ly + dy)
+                    if vecina is not None:
+                        conexiones[direccion] = vecina
+        return conexiones
+
+    def vecina(self, direccion: str) -> Optional['HabitacionCompacta']:
+        """Solo mira el bit de 'direccion' y calcula el índice de la vecina (sin armar 'conexiones')."""
+        rejilla = self._rejilla
+        bit = BITS_DIRECCION.get(direccion)
+        if bit is None or not rejilla.conexiones[self._idx] & bit:
+            return None
+        if rejilla.resolver_vecina is not None:
+            dx, dy = DELTAS[direccion]
+            lx, ly = self._idx % rejilla.ancho + dx, self._idx // rejilla.ancho + dy
+            if not (0 <= lx < rejilla.ancho and 0 <= ly < rejilla.alto):
+                return rejilla.resolver_vecina(rejilla.origen_x + lx, rejilla.origen_y + ly)
+        return HabitacionCompacta(rejilla, self._idx + rejilla.deltas_idx[direccion])
+
+    @property
+    def contenido(self) -> Optional[ContenidoHabitacion]:
+        return self._rejilla.contenido(self._idx)
+
+    @contenido.setter
+    def contenido(self, valor: Optional[ContenidoHabitacion]):
+        self._rejilla.fijar_contenido(self._idx, valor)
+
+    @property
+    def visitada(self) -> bool:
+        return bool(self._rejilla.visitadas[self._idx])
+
+    @visitada.setter
+    def visitada(self, valor: bool):
+        self._rejilla.visitadas[self._idx] = 1 if valor else 0
+
+    @property
+    def distancia_manhattan(self) -> int:
+        return self._rejilla.distancias[self._idx]
+
+    @distancia_manhattan.setter
+    def distancia_manhattan(self, valor: int):
+        self._rejilla.distancias[self._idx] = valor
+
+    @property
+    def estado(self) -> str:
+        return self._rejilla.tabla_estados[self._rejilla.estados[self._idx]]
+
+    @estado.setter
+    def estado(self, valor: str):
+        self._rejilla.estados[self._idx] = self._rejilla.codigo_estado(valor)
+
+
+class HabitacionesCompactas(Mapping):
+    """Mapping (x, y) -> HabitacionCompacta que reemplaza al dict 'habitaciones' del Mapa."""
+
+    def __init__(self, rejilla: RejillaCompacta):
+        self._rejilla = rejilla
+
+    def _indice_valido(self, clave) -> int:
+        x, y = clave
+        rejilla = self._rejilla
+        if 0 <= x < rejilla.ancho and 0 <= y < rejilla.alto:
+            idx = y * rejilla.ancho + x
+            if rejilla.ids[idx]:
+                return idx
+        return -1
+
+    def __getitem__(self, clave: Tuple[int, int]) -> HabitacionCompacta:
+        idx = self._indice_valido(clave)
+        if idx < 0:
+            raise KeyError(clave)
+        return HabitacionCompacta(self._rejilla, idx)
+
+    def get(self, clave: Tuple[int, int], default=None):
+        idx = self._indice_valido(clave)
+        return HabitacionCompacta(self._rejilla, idx) if idx >= 0 else default
+
+    def __contains__(self, clave) -> bool:
+        return self._indice_valido(clave) >= 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        ancho = self._rejilla.ancho
+        for idx in self._rejilla.indices_ocupados():
+            yield (idx % ancho, idx // ancho)
+
+    def __len__(self) -> int:
+        return self._rejilla.n_ocupadas
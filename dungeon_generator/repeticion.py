@@ -0,0 +1,306 @@
+"""Grabación de partidas para reproducirlas sin consola (regresiones, reportes de errores).
+
+Todo el azar de una partida sale de los flujos del mapa, sembrados con su
+semilla: el combate y los portales usan explorador.rng (el flujo 'combate').
+Por eso no hace falta guardar cada tirada: basta con los parámetros de
+generación, la semilla y la secuencia de comandos. Para detectar divergencias,
+cada turno lleva una suma de control del estado (vida, posición, inventario,
+visitas, contenido restante y posición del generador de combate): una tirada
+de más o de menos cambia la suma del turno en que ocurrió.
+
+En partidas de varios pisos, los pisos de abajo salen de la semilla del
+primero (pisos.Pisos): la cabecera solo agrega la cantidad de pisos.
+
+Formato .dgr (little-endian):
+    cabecera _CABECERA + semilla en decimal ASCII + pisos (u16, desde la versión 2)
+    + suma del estado inicial (u32)
+    por turno: código del comando (índice en comandos.COMANDOS, u8) + suma (u32)
+
+    grabador = Grabador.para_partida(explorador, 30, "partida.dgr")
+    ...  grabador.registrar(comando) después de cada comando válido
+    resultado = reproducir("partida.dgr")   # resultado.divergencia es None si coincide
+"""
+import os
+import struct
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, List, Optional, Tuple
+
+from . import instrumentacion
+from .comandos import COMANDOS, DIRECCIONES_COMANDO
+from .explorador import Explorador
+from .mapa import VERSION_GENERADOR, generar_mapa
+from .pisos import Pisos
+
+if TYPE_CHECKING:
+    from .cache import CacheMapas
+    from .mapa import Mapa
+
+MAGIA = b'DGNR'
+VERSION = 2
+EXTENSION = ".dgr"
+
+# magia, versión, versión del generador, ancho, alto, habitaciones, vida, banderas, largo de la semilla
+_CABECERA = struct.Struct('<4sHHiiiiBH')
+_SUMA = struct.Struct('<I')
+_PISOS = struct.Struct('<H')
+_TURNO = struct.Struct('<BI')        # comando, suma de control después de aplicarlo
+# vida, vida_max, x, y, bonificación, inventario, valor del inventario, visitadas, contenido restante,
+# índice del generador de combate y su última palabra de estado
+_ESTADO = struct.Struct('<iiiiiIiIIIQ')
+
+_COMPACTO = 1
+
+_CODIGOS = {comando: i for i, comando in enumerate(COMANDOS)}
+
+
+def suma_de_control(explorador: Explorador) -> int:
+    """crc32 del estado de la partida que puede cambiar un comando."""
+    mapa = explorador.mapa
+    estadisticas = mapa.obtener_estadisticas_mapa()
+    contenido = sum(n for tipo, n in estadisticas["distribucion_contenido"].items() if tipo != "vacía")
+    # getstate() del Mersenne Twister: 624 palabras + índice; el índice avanza con cada tirada
+    estado_rng = explorador.rng.getstate()[1]
+    indice = estado_rng[-1]
+    x, y = explorador.posicion_actual
+    return zlib.crc32(_ESTADO.pack(
+        explorador.vida, explorador.vida_max, x, y, explorador.bonificacion_combate,
+        len(explorador.inventario), sum(obj.valor for obj in explorador.inventario),
+        estadisticas["habitaciones_visitadas"], contenido, indice, estado_rng[indice - 1]))
+
+
+class Cabecera:
+    """Parámetros con los que se generó la partida grabada."""
+    __slots__ = ('ancho', 'alto', 'n_habitaciones', 'semilla', 'vida', 'compacto', 'n_pisos',
+                 'version_generador', 'suma_inicial')
+
+    def __init__(self, ancho: int, alto: int, n_habitaciones: int, semilla: int, vida: int,
+                 compacto: bool = False, n_pisos: int = 1, version_generador: int = VERSION_GENERADOR,
+                 suma_inicial: int = 0):
+        self.ancho = ancho
+        self.alto = alto
+        self.n_habitaciones = n_habitaciones
+        self.semilla = semilla
+        self.vida = vida
+        self.compacto = compacto
+        self.n_pisos = n_pisos
+        self.version_generador = version_generador
+        self.suma_inicial = suma_inicial
+
+    def a_bytes(self) -> bytes:
+        semilla = str(self.semilla).encode("ascii")
+        return (_CABECERA.pack(MAGIA, VERSION, self.version_generador, self.ancho, self.alto,
+                               self.n_habitaciones, self.vida, _COMPACTO if self.compacto else 0, len(semilla))
+                + semilla + _PISOS.pack(self.n_pisos) + _SUMA.pack(self.suma_inicial))
+
+    @classmethod
+    def desde_bytes(cls, datos: bytes) -> Tuple['Cabecera', int]:
+        """(cabecera, desplazamiento del primer turno)."""
+        magia, version, version_generador, ancho, alto, n, vida, banderas, largo = _CABECERA.unpack_from(datos)
+        if magia != MAGIA:
+            raise ValueError("No es una grabación de partida (.dgr)")
+        if version not in (1, VERSION):
+            raise ValueError(f"Versión de grabación no soportada: {version}")
+        pos = _CABECERA.size
+        semilla = int(datos[pos:pos + largo].decode("ascii"))
+        pos += largo
+        n_pisos = 1
+        if version >= 2:
+            n_pisos, = _PISOS.unpack_from(datos, pos)
+            pos += _PISOS.size
+        suma, = _SUMA.unpack_from(datos, pos)
+        cabecera = cls(ancho, alto, n, semilla, vida, bool(banderas & _COMPACTO), n_pisos, version_generador, suma)
+        return cabecera, pos + _SUMA.size
+
+
+def preparar_partida(cabecera: Cabecera, cache: Optional['CacheMapas'] = None) -> Tuple['Mapa', Explorador]:
+    """Mapa del primer piso y explorador tal como empiezan la partida (igual que main.inicializar_juego)."""
+    if cache is not None:
+        mapa = cache.obtener(cabecera.ancho, cabecera.alto, cabecera.n_habitaciones, cabecera.semilla,
+                             cabecera.compacto)
+    else:
+        mapa = generar_mapa(cabecera.ancho, cabecera.alto, cabecera.n_habitaciones, cabecera.semilla,
+                            cabecera.compacto)
+    explorador = Explorador(mapa, vida=cabecera.vida, salida=None)
+    mapa.marcar_visitada(explorador.habitacion_actual)
+    return mapa, explorador
+
+
+# --- GRABACIÓN ---
+
+class Grabador:
+    """Anota cada comando aplicado con la suma de control del estado que dejó."""
+
+    def __init__(self, explorador: Explorador, cabecera: Cabecera, destino: BinaryIO):
+        self.explorador = explorador
+        self.cabecera = cabecera
+        self.destino = destino
+        self.turnos = 0
+        cabecera.suma_inicial = suma_de_control(explorador)
+        destino.write(cabecera.a_bytes())
+        destino.flush()
+
+    @classmethod
+    def para_partida(cls, explorador: Explorador, n_habitaciones: int, archivo: str,
+                     compacto: bool = False, n_pisos: int = 1) -> 'Grabador':
+        """Graba en 'archivo' la partida de 'explorador' (recién creado, sin comandos aplicados).
+
+        n_habitaciones y compacto son los que se pasaron al generar: el mapa puede haber quedado
+        con menos habitaciones que las pedidas.
+        """
+        mapa = explorador.mapa
+        cabecera = Cabecera(mapa.ancho, mapa.alto, n_habitaciones, mapa.flujos.semilla, explorador.vida_max,
+                            compacto, n_pisos)
+        return cls(explorador, cabecera, open(archivo, "wb"))
+
+    def registrar(self, comando: str):
+        # Se escribe turno a turno: si el juego se cae, la grabación llega hasta el último comando
+        self.destino.write(_TURNO.pack(_CODIGOS[comando], suma_de_control(self.explorador)))
+        self.destino.flush()
+        self.turnos += 1
+
+    def cerrar(self):
+        self.destino.close()
+
+
+# --- REPRODUCCIÓN ---
+
+class Resultado:
+    __slots__ = ('archivo', 'turnos', 'total_turnos', 'divergencia', 'esperada', 'obtenida', 'terminada')
+
+    def __init__(self, archivo: str, total_turnos: int):
+        self.archivo = archivo
+        self.turnos = 0
+        self.total_turnos = total_turnos
+        # Turno de la primera suma distinta (0 = estado inicial, p. ej. el generador cambió); None si coincide
+        self.divergencia: Optional[int] = None
+        self.esperada = 0
+        self.obtenida = 0
+        self.terminada = False
+
+    @property
+    def correcta(self) -> bool:
+        return self.divergencia is None
+
+    def __str__(self) -> str:
+        if self.correcta:
+            return f"{self.archivo}: {self.turnos} turnos, OK"
+        return (f"{self.archivo}: diverge en el turno {self.divergencia}/{self.total_turnos} "
+                f"(suma esperada {self.esperada:08x}, obtenida {self.obtenida:08x})")
+
+
+def _aplicar(explorador: Explorador, comando: str, pisos: Optional[Pisos]) -> bool:
+    """Como comandos.ejecutar, sin mensajes. True si la partida terminó."""
+    if comando == "SALIR":
+        return True
+    if comando == "EXPLORAR":
+        hab_actual = explorador.habitacion_actual
+        explorador.resolver_habitacion()
+        jefe_derrotado = hab_actual.estado == "Jefe" and hab_actual.contenido is None
+        ultimo_piso = pisos is None or pisos.actual >= pisos.n_pisos
+        return (jefe_derrotado and ultimo_piso) or explorador.vida <= 0
+    if comando in DIRECCIONES_COMANDO:
+        explorador.mover(DIRECCIONES_COMANDO[comando])
+    elif comando == "BAJAR":
+        if pisos is not None and pisos.escalera_abajo(explorador):
+            pisos.bajar(explorador)
+    elif comando == "SUBIR":
+        if pisos is not None and pisos.escalera_arriba(explorador):
+            pisos.subir(explorador)
+    # ESTADO, MAPA y GUARDAR no cambian la partida
+    return False
+
+
+def reproducir_bytes(datos: bytes, archivo: str = "<memoria>",
+                     cache: Optional['CacheMapas'] = None) -> Resultado:
+    """Vuelve a jugar la grabación 'datos' y se detiene en la primera suma de control distinta."""
+    cabecera, inicio = Cabecera.desde_bytes(datos)
+    # Un turno cortado a medio escribir (el juego se cayó) se ignora
+    total = (len(datos) - inicio) // _TURNO.size
+    resultado = Resultado(archivo, total)
+    mapa, explorador = preparar_partida(cabecera, cache)
+
+    obtenida = suma_de_control(explorador)
+    if obtenida != cabecera.suma_inicial:
+        resultado.divergencia, resultado.esperada, resultado.obtenida = 0, cabecera.suma_inicial, obtenida
+        return resultado
+
+    # Sin segundo plano: los pisos se generan al bajar, en el mismo hilo
+    pisos = (Pisos(mapa, cabecera.n_habitaciones, cabecera.n_pisos, cabecera.compacto, segundo_plano=None)
+             if cabecera.n_pisos > 1 else None)
+    try:
+        turnos = _TURNO.iter_unpack(datos[inicio:inicio + total * _TURNO.size])
+        for turno, (codigo, esperada) in enumerate(turnos, 1):
+            if resultado.terminada:
+                # Comandos después del final: la grabación no corresponde a esta partida
+                resultado.divergencia, resultado.esperada, resultado.obtenida = turno, esperada, 0
+                return resultado
+            resultado.terminada = _aplicar(explorador, COMANDOS[codigo], pisos)
+            obtenida = suma_de_control(explorador)
+            resultado.turnos = turno
+            if obtenida != esperada:
+                resultado.divergencia, resultado.esperada, resultado.obtenida = turno, esperada, obtenida
+                return resultado
+    finally:
+        if pisos is not None:
+            pisos.cerrar()
+    instrumentacion.contar("repeticion.turnos", resultado.turnos)
+    return resultado
+
+
+def reproducir(archivo: str, cache: Optional['CacheMapas'] = None) -> Resultado:
+    with instrumentacion.tramo("repeticion.reproducir", archivo=archivo):
+        with open(archivo, "rb") as f:
+            return reproducir_bytes(f.read(), archivo, cache)
+
+
+def buscar_grabaciones(rutas: List[str]) -> List[str]:
+    """Archivos .dgr de 'rutas' (los directorios se recorren recursivamente), en orden estable."""
+    archivos = []
+    for ruta in rutas:
+        if not os.path.isdir(ruta):
+            archivos.append(ruta)
+            continue
+        for raiz, _, nombres in os.walk(ruta):
+            archivos.extend(os.path.join(raiz, nombre) for nombre in nombres if nombre.endswith(EXTENSION))
+    return sorted(archivos)
+
+
+def main(argv=None):
+    import argparse  # solo para la consola
+    import sys
+    import time
+
+    parser = argparse.ArgumentParser(description="Reproduce partidas grabadas (.dgr) y verifica cada turno.")
+    parser.add_argument("rutas", nargs="+", help="Archivos .dgr o directorios que los contienen")
+    parser.add_argument("--cache", default=None, help="Directorio de la caché de mapas (por defecto, se generan)")
+    parser.add_argument("-v", "--detalle", action="store_true", help="Una línea por grabación, no solo las fallas")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache:
+        from .cache import CacheMapas
+        cache = CacheMapas(args.cache)
+
+    archivos = buscar_grabaciones(args.rutas)
+    inicio = time.perf_counter()
+    fallas = 0
+    turnos = 0
+    for archivo in archivos:
+        try:
+            resultado = reproducir(archivo, cache)
+        except (ValueError, struct.error, IndexError) as e:
+            print(f"{archivo}: grabación ilegible ({e})")
+            fallas += 1
+            continue
+        turnos += resultado.turnos
+        if not resultado.correcta:
+            fallas += 1
+        if args.detalle or not resultado.correcta:
+            print(resultado)
+    segundos = time.perf_counter() - inicio
+    print(f"{len(archivos)} grabaciones, {turnos} turnos en {segundos:.2f} s; {fallas} con fallas.")
+    sys.exit(1 if fallas else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from array import array
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .habitacion import DIRECCIONES, DELTAS, BITS_DIRECCION
+
+if TYPE_CHECKING:
+    from .mapa import Mapa
+
+Posicion = Tuple[int, int]
+
+
+class Enrutador:
+    """Caminos más cortos sobre el grafo de 'conexiones' del mapa.
+
+    Cada consulta se responde con un árbol BFS de una sola fuente (todas las
+    aristas pesan 1, así que BFS ya es óptimo). Los árboles se guardan en una
+    caché LRU indexada por la raíz y se descartan en cuanto cambia
+    mapa.version_topologia. Cada árbol ocupa 8 bytes por celda del mapa.
+    """
+
+    def __init__(self, mapa: 'Mapa', capacidad: int = 32):
+        if mapa.ancho is None or mapa.alto is None:
+            # Los árboles son arrays de ancho * alto celdas: un mapa sin límites no tiene tamaño
+            raise ValueError(f"{type(mapa).__name__} no tiene límites: el enrutador necesita un mapa de ancho y alto fijos.")
+        self.mapa = mapa
+        self.capacidad = capacidad
+        self._arboles: 'OrderedDict[int, Tuple[array, array]]' = OrderedDict()
+        self._version = mapa.version_topologia
+        self.aciertos = 0
+        self.fallos = 0
+        ancho = mapa.ancho
+        self._vecinos = [(BITS_DIRECCION[d], DELTAS[d][1] * ancho + DELTAS[d][0]) for d in DIRECCIONES]
+        # Diferencia de índices entre celdas vecinas -> dirección (norte/sur al final por si ancho == 1)
+        self._direccion_por_delta = {DELTAS[d][1] * ancho + DELTAS[d][0]: d for d in ("este", "oeste", "norte", "sur")}
+
+    # --- ÁRBOLES BFS ---
+    def arbol(self, raiz: Posicion) -> Tuple[array, array]:
+        """(padres, distancias) del árbol BFS con raíz en 'raiz'; -1 en celdas no alcanzables."""
+        if self._version != self.mapa.version_topologia:
+            self._arboles.clear()
+            self._version = self.mapa.version_topologia
+
+        idx = raiz[1] * self.mapa.ancho + raiz[0]
+        arbol = self._arboles.get(idx)
+        if arbol is not None:
+            self.aciertos += 1
+            self._arboles.move_to_end(idx)
+            return arbol
+
+        self.fallos += 1
+        arbol = self._bfs(idx)
+        self._arboles[idx] = arbol
+        if len(self._arboles) > self.capacidad:
+            self._arboles.popitem(last=False)
+        return arbol
+
+    def _mascara(self, idx: int) -> int:
+        rejilla = self.mapa._rejilla
+        if rejilla is not None:
+            return rejilla.conexiones[idx]
+        hab = self.mapa.obtener_habitacion(idx % self.mapa.ancho, idx // self.mapa.ancho)
+        mascara = 0
+        if hab is not None:
+            for direccion in hab.conexiones:
+                mascara |= BITS_DIRECCION[direccion]
+        return mascara
+
+    def _bfs(self, raiz: int) -> Tuple[array, array]:
+        n_celdas = self.mapa.ancho * self.mapa.alto
+        padres = array('i', [-1]) * n_celdas
+        distancias = array('i', [-1]) * n_celdas
+        if not 0 <= raiz < n_celdas or self.mapa.obtener_habitacion(raiz % self.mapa.ancho, raiz // self.mapa.ancho) is None:
+            return padres, distancias
+
+        rejilla = self.mapa._rejilla
+        if rejilla is not None:
+            mascaras = rejilla.conexiones
+        elif hasattr(self.mapa.habitaciones, 'mascaras'):
+            mascaras = self.mapa.habitaciones.mascaras()  # partidas .dgn: sin materializar habitaciones
+        else:
+            mascaras = None
+        mascara_de = self._mascara
+        vecinos = self._vecinos
+        padres[raiz] = raiz
+        distancias[raiz] = 0
+        cola = array('i', [raiz])
+        i = 0
+        while i < len(cola):
+            idx = cola[i]; i += 1
+            mascara = mascaras[idx] if mascaras is not None else mascara_de(idx)
+            d = distancias[idx] + 1
+            for bit, delta in vecinos:
+                if mascara & bit and distancias[idx + delta] < 0:
+                    distancias[idx + delta] = d
+                    padres[idx + delta] = idx
+                    cola.append(idx + delta)
+        return padres, distancias
+
+    def _posicion(self, idx: int) -> Posicion:
+        return (idx % self.mapa.ancho, idx // self.mapa.ancho)
+
+    # --- CONSULTAS ---
+    def ruta(self, origen: Posicion, destino: Posicion) -> Optional[List[Posicion]]:
+        """Lista de posiciones de origen a destino (ambas incluidas), o None si no hay camino."""
+        padres, _ = self.arbol(destino)
+        ancho = self.mapa.ancho
+        idx = origen[1] * ancho + origen[0]
+        if padres[idx] < 0:
+            return None
+        ruta = [origen]
+        while padres[idx] != idx:
+            idx = padres[idx]
+            ruta.append(self._posicion(idx))
+        return ruta
+
+    def distancia(self, origen: Posicion, destino: Posicion) -> int:
+        """Pasos entre dos habitaciones, -1 si no están conectadas."""
+        _, distancias = self.arbol(destino)
+        return distancias[origen[1] * self.mapa.ancho + origen[0]]
+
+    def siguiente_paso(self, origen: Posicion, destino: Posicion) -> Optional[str]:
+        """Dirección del primer paso de origen hacia destino (None si ya llegó o no hay camino)."""
+        padres, _ = self.arbol(destino)
+        idx = origen[1] * self.mapa.ancho + origen[0]
+        padre = padres[idx]
+        if padre < 0 or padre == idx:
+            return None
+        return self._direccion_por_delta[padre - idx]
+
+    def pasos_hacia(self, destino: Posicion, origenes: Optional[Iterable[Posicion]] = None) -> Dict[Posicion, str]:
+        """Consulta muchos-a-uno: siguiente dirección hacia 'destino' para cada origen.
+
+        Sin 'origenes' se responde para todas las habitaciones del mapa. Un solo
+        árbol BFS (con raíz en el destino) atiende todo el lote.
+        """
+        padres, _ = self.arbol(destino)
+        ancho = self.mapa.ancho
+        direccion_por_delta = self._direccion_por_delta
+        if origenes is None:
+            origenes = self.mapa.habitaciones.keys()
+        pasos = {}
+        for x, y in origenes:
+            idx = y * ancho + x
+            padre = padres[idx]
+            if padre >= 0 and padre != idx:
+                pasos[(x, y)] = direccion_por_delta[padre - idx]
+        return pasos
+
+    def distancias_hacia(self, destino: Posicion) -> array:
+        """Distancia de cada celda (y * ancho + x) a 'destino'; -1 si no lo alcanza."""
+        return self.arbol(destino)[1]
@@ -0,0 +1,97 @@
+"""Destinos de los avisos del juego, sin importar rich salvo que se use.
+
+Los mensajes del juego llevan marcado de rich ("[bold red]...[/bold red]").
+Hay tres salidas intercambiables, todas callables de un argumento:
+
+    SalidaRich   imprime con rich (se importa en el primer aviso, no al cargar el módulo)
+    SalidaPlana  print común, con el marcado quitado
+    SalidaNula   no hace nada (simulaciones, lotes, servidor)
+
+avisar() usa la salida elegida con usar_salida() o, si no se eligió ninguna,
+la variable DUNGEON_SALIDA ("rich", "plano" o "nulo"). Sin ella se usa rich si
+la salida es una terminal y rich está instalado, y texto plano si no.
+"""
+import os
+import re
+import sys
+from typing import Callable, Optional, TextIO
+
+VARIABLE_SALIDA = "DUNGEON_SALIDA"
+
+# Misma expresión que rich.markup: [bold red], [/bold red], [/], [#ff0000]...; "\[" es un corchete literal
+_ETIQUETA = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+
+
+def quitar_marcado(mensaje: str) -> str:
+    """Texto sin las etiquetas de rich (equivale a Text.from_markup(mensaje).plain)."""
+    if "[" not in mensaje:
+        return mensaje
+
+    def reemplazar(m: 're.Match') -> str:
+        barras = m.group(1)
+        if len(barras) % 2:
+            # Corchete escapado: se conserva la etiqueta como texto y se quita la barra del escape
+            return barras[:-1][:len(barras) // 2] + m.group(0)[len(barras):]
+        return barras[:len(barras) // 2]
+
+    return _ETIQUETA.sub(reemplazar, mensaje)
+
+
+class SalidaRich:
+    def __init__(self):
+        self._imprimir: Optional[Callable[[str], None]] = None
+
+    def __call__(self, mensaje: str):
+        if self._imprimir is None:
+            from rich import print as imprimir
+            self._imprimir = imprimir
+        self._imprimir(mensaje)
+
+
+class SalidaPlana:
+    def __init__(self, archivo: Optional[TextIO] = None):
+        self.archivo = archivo
+
+    def __call__(self, mensaje: str):
+        print(quitar_marcado(mensaje), file=self.archivo if self.archivo is not None else sys.stdout)
+
+
+class SalidaNula:
+    def __call__(self, mensaje: str):
+        pass
+
+
+SALIDAS = {"rich": SalidaRich, "plano": SalidaPlana, "nulo": SalidaNula}
+
+_actual: Optional[Callable[[str], None]] = None
+
+
+def _rich_disponible() -> bool:
+    if "rich" in sys.modules:
+        return True
+    from importlib.util import find_spec
+    return find_spec("rich") is not None
+
+
+def crear_salida(modo: Optional[str] = None) -> Callable[[str], None]:
+    """Salida para 'modo' ("rich", "plano", "nulo"); None elige según DUNGEON_SALIDA y la terminal."""
+    modo = modo or os.environ.get(VARIABLE_SALIDA)
+    if modo is None:
+        modo = "rich" if sys.stdout.isatty() and _rich_disponible() else "plano"
+    if modo not in SALIDAS:
+        raise ValueError(f"Salida desconocida: {modo!r} (opciones: {', '.join(SALIDAS)})")
+    return SALIDAS[modo]()
+
+
+def usar_salida(salida: Optional[Callable[[str], None]]):
+    """Fija la salida de avisar(); None vuelve a la elección automática."""
+    global _actual
+    _actual = salida
+
+
+def avisar(mensaje: str):
+    """Muestra un aviso del juego por la salida actual (se elige en el primer aviso)."""
+    global _actual
+    if _actual is None:
+        _actual = crear_salida()
+    _actual(mensaje)
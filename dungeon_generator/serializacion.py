@@ -2,14 +2,21 @@
 import json
 import os
 from typing import TYPE_CHECKING, Any, Callable, Union 
-from rich import print
 
 # IMPORTACIONES NECESARIAS PARA DEFINIR TIPOS Y LÓGICA
 
 from .mapa import Mapa          
 from .explorador import Explorador 
 from .habitacion import Habitacion # Necesario para reconstruir habitaciones
+from .rejilla import HabitacionCompacta
 from .objeto import Objeto # Necesario para reconstruir el inventario
+from .aleatorio import FlujosAleatorios
+from .binario import guardar_binario
+from .diario import cargar_con_diario, descartar_diario
+from .lector_json import cargar_json_incremental, parsear_posicion
+from . import instrumentacion
+from .instrumentacion import medido
+from .salida import avisar
 
 # Contenido de combate y tesoro desde .contenido
 from .contenido import Tesoro, Monstruo, Jefe, ContenidoHabitacion
@@ -18,37 +25,49 @@ from .evento import EventoTeletransporte, EventoCuracion, EventoTrampa
 
 # --- AUXILIARES DE SERIALIZACIÓN ---
 
+def _atributos(obj: Any, excluir: tuple = ()) -> dict:
+    """Atributos de instancia: las ranuras de __slots__ de toda la jerarquía y el __dict__, si existe."""
+    data = {}
+    for clase in type(obj).__mro__:
+        for ranura in getattr(clase, '__slots__', ()):
+            if ranura not in excluir and not ranura.startswith('__') and hasattr(obj, ranura):
+                data[ranura] = getattr(obj, ranura)
+    data.update({k: v for k, v in getattr(obj, '__dict__', {}).items() if k not in excluir})
+    return data
+
 def _objeto_a_diccionario(obj: Any) -> dict:
     """Convierte un objeto complejo a un diccionario con metadatos de clase."""
     
-    # 1. Clases con __dict__ simple (Contenido, Objeto)
+    # 1. Contenido y Objeto
     if isinstance(obj, (Tesoro, Monstruo, Jefe, 
                         EventoTeletransporte, EventoCuracion, EventoTrampa, 
                         ContenidoHabitacion, Objeto)):
         
-        data = obj.__dict__.copy()
+        # El contenido comparte plantillas: se guardan los argumentos de su constructor
+        data = obj.parametros() if isinstance(obj, ContenidoHabitacion) else _atributos(obj)
         
-        # Excepción: EventoTeletransporte no debe serializar la referencia del mapa
-        if isinstance(obj, EventoTeletransporte):
-            # Usamos getattr para verificar si existe la referencia interna
-            if getattr(obj, 'mapa', None): 
-                del data['mapa']
+        # Excepción: los portales no deben serializar la referencia del mapa
+        data.pop('mapa', None)
 
         return {
             '__clase__': obj.__class__.__name__,
             '__data__': data
         }
     
-    # 2. Habitacion
-    elif isinstance(obj, Habitacion):
-        data = obj.__dict__.copy()
-        
-        # Convertir objetos de conexión a tuplas de coordenadas
-        if 'conexiones' in data:
-            data['conexiones'] = {
-                direccion: (hab.x, hab.y) 
-                for direccion, hab in data['conexiones'].items()
-            }
+    # 2. Habitacion (también las vistas de mapas compactos, que no tienen __dict__)
+    elif isinstance(obj, (Habitacion, HabitacionCompacta)):
+        data = {
+            'id': obj.id,
+            'x': obj.x,
+            'y': obj.y,
+            'inicial': obj.inicial,
+            # Conexiones como coordenadas de la vecina
+            'conexiones': {direccion: (hab.x, hab.y) for direccion, hab in obj.conexiones.items()},
+            'contenido': obj.contenido,
+            'visitada': obj.visitada,
+            'distancia_manhattan': obj.distancia_manhattan,
+            'estado': obj.estado,
+        }
         
         return {
             '__clase__': 'Habitacion',
@@ -61,10 +80,20 @@ def _objeto_a_diccionario(obj: Any) -> dict:
         
         if 'habitaciones' in data:
              del data['habitaciones'] 
+        # Inicial y jefe se guardan solo como posición (ver abajo)
+        data.pop('habitacion_inicial', None)
+        data.pop('habitacion_jefe', None)
+        
+        # Los generadores se guardan como estado serializable para poder continuar la partida
+        data['flujos'] = obj.flujos.estado()
+        
+        # Los atributos privados son cachés derivadas: se recalculan al cargar
+        for clave in [c for c in data if c.startswith('_')]:
+            del data[clave]
         
         # Guardamos la posición de la inicial y jefe en tupla
-        data['habitacion_inicial_pos'] = obj.habitacion_inicial.x, obj.habitacion_inicial.y if obj.habitacion_inicial else None
-        data['habitacion_jefe_pos'] = obj.habitacion_jefe.x, obj.habitacion_jefe.y if obj.habitacion_jefe else None
+        data['habitacion_inicial_pos'] = (obj.habitacion_inicial.x, obj.habitacion_inicial.y) if obj.habitacion_inicial else None
+        data['habitacion_jefe_pos'] = (obj.habitacion_jefe.x, obj.habitacion_jefe.y) if obj.habitacion_jefe else None
         
         return {
             '__clase__': 'Mapa',
@@ -73,9 +102,8 @@ def _objeto_a_diccionario(obj: Any) -> dict:
 
     # 4. Explorador (Serializa sin la referencia al mapa)
     elif isinstance(obj, Explorador):
-        data = obj.__dict__.copy()
-        if 'mapa' in data:
-            del data['mapa']
+        # Sin el mapa; el generador de combate se restaura desde los flujos del mapa
+        data = _atributos(obj, excluir=('mapa', 'rng', 'salida'))
         return {
             '__clase__': 'Explorador',
             '__data__': data
@@ -109,9 +137,14 @@ def _diccionario_a_objeto(diccionario: dict) -> Any:
         if clase_nombre in CLASES_MAPEO:
             clase = CLASES_MAPEO[clase_nombre]
             
+            # El contenido se guarda como argumentos de su constructor
+            if clase in (Tesoro, Monstruo, Jefe, Objeto):
+                return clase(**data)
+
             # Usamos object.__new__ para crear la instancia sin llamar al constructor (__init__)
             instance = object.__new__(clase)
-            instance.__dict__.update(data)
+            for atributo, valor in data.items():
+                setattr(instance, atributo, valor)
             
             # Las instancias de Mapa, Explorador y Habitacion se procesan en cargar_partida
             if clase_nombre in ['Mapa', 'Explorador', 'Habitacion']:
@@ -123,13 +156,25 @@ def _diccionario_a_objeto(diccionario: dict) -> Any:
 
 # --- GUARDAR Y CARGAR PARTIDA (REQ. 8) ---
 
+@medido("serializacion.guardar_partida")
 def guardar_partida(mapa: Mapa, explorador: Explorador, archivo: str):
-    """Guarda el estado completo del mapa y del explorador en JSON o YAML."""
-    
+    """Guarda el estado completo del mapa y del explorador en JSON, YAML o binario (.dgn)."""
+    _escribir_partida(mapa, explorador, archivo)
+    if instrumentacion.sesion is not None and os.path.exists(archivo):
+        instrumentacion.contar("serializacion.bytes_escritos", os.path.getsize(archivo))
+
+
+def _escribir_partida(mapa: Mapa, explorador: Explorador, archivo: str):
+    if archivo.lower().endswith('.dgn'):
+        guardar_binario(mapa, explorador, archivo)
+        descartar_diario(archivo)  # el diario anterior ya no corresponde a esta instantánea
+        return
+
     estado_juego = {
         'mapa': mapa,
         'explorador': explorador,
-        'habitaciones': mapa.habitaciones # Guardamos las habitaciones completas aquí
+        # Guardamos las habitaciones completas aquí; JSON solo admite claves de texto: "(x, y)"
+        'habitaciones': {str(pos): hab for pos, hab in mapa.habitaciones.items()}
     }
 
     if archivo.lower().endswith('.json'):
@@ -142,33 +187,35 @@ def guardar_partida(mapa: Mapa, explorador: Explorador, archivo: str):
             with open(archivo, 'w') as f:
                 yaml.dump(estado_juego, f, default=_objeto_a_diccionario, sort_keys=False)
         except ImportError:
-            print("[bold red]ADVERTENCIA:[/bold red] PyYAML no está instalado. No se puede guardar en YAML.")
+            avisar("[bold red]ADVERTENCIA:[/bold red] PyYAML no está instalado. No se puede guardar en YAML.")
 
 
 # Tipado corregido, sin comillas simples
+@medido("serializacion.cargar_partida")
 def cargar_partida(archivo: str) -> tuple[Mapa | None, Explorador | None]:
-    """Carga una partida completa desde un archivo JSON o YAML."""
+    """Carga una partida completa desde un archivo JSON, YAML o binario (.dgn, reaplicando su diario)."""
     
-    data = None
+    if archivo.lower().endswith('.dgn'):
+        return cargar_con_diario(archivo)
+
     if archivo.lower().endswith('.json'):
-        with open(archivo, 'r') as f:
-            data = json.load(f, object_hook=_diccionario_a_objeto)
-    
-    elif archivo.lower().endswith('.yaml') or archivo.lower().endswith('.yml'):
+        return cargar_json_incremental(archivo)
+
+    data = None
+    if archivo.lower().endswith('.yaml') or archivo.lower().endswith('.yml'):
         try:
             import yaml
             with open(archivo, 'r') as f:
                 data = yaml.load(f, Loader=yaml.SafeLoader) 
         except ImportError:
-            print("[bold red]ERROR:[/bold red] PyYAML no está instalado. No se puede cargar YAML.")
+            avisar("[bold red]ERROR:[/bold red] PyYAML no está instalado. No se puede cargar YAML.")
             return None, None
         except Exception as e:
-            print(f"[bold red]ERROR:[/bold red] Error al cargar YAML: {e}")
+            avisar(f"[bold red]ERROR:[/bold red] Error al cargar YAML: {e}")
             return None, None
             
     if not data or 'mapa' not in data or 'explorador' not in data or 'habitaciones' not in data:
         return None, None
---
     
     # 1. Obtener instancias reconstruidas (
     mapa = data['mapa']['__data__']
@@ -178,12 +225,14 @@ def cargar_partida(archivo: str) -> tuple[Mapa | None, Explorador | None]:
     # 2. Reconstruir Habitaciones e Inventario
     habitaciones_instancias = {}
     for pos_str, hab_dict in habitaciones_data.items():
-        pos_tuple = eval(pos_str) 
+        pos_tuple = parsear_posicion(pos_str)
         hab = hab_dict['__data__']
         habitaciones_instancias[pos_tuple] = hab
     
     # 3. Asignar Referencias Circulares
     mapa.habitaciones = habitaciones_instancias
+    mapa._rejilla = None
+    mapa._reiniciar_caches()
     
     # 4. Asignar Habitacion Inicial/Jefe al mapa (usan las referencias ya existentes)
     mapa.habitacion_inicial = habitaciones_instancias.get(mapa.habitacion_inicial_pos)
@@ -202,7 +251,9 @@ def cargar_partida(archivo: str) -> tuple[Mapa | None, Explorador | None]:
              hab.contenido.mapa = mapa
 
 
-    # 7. Asignar la referencia del mapa al explorador
+    # 7. Asignar la referencia del mapa al explorador y restaurar los generadores
+    mapa.flujos = FlujosAleatorios.desde_estado(mapa.flujos) if isinstance(getattr(mapa, 'flujos', None), dict) else FlujosAleatorios()
     explorador.mapa = mapa 
+    explorador.rng = mapa.flujos.combate
 
     return mapa, explorador
@@ -0,0 +1,351 @@
+"""Servidor asyncio de partidas simultáneas con un protocolo de líneas por TCP local.
+
+Un solo proceso guarda en memoria muchas partidas (Mapa + Explorador) y acepta
+el mismo vocabulario que la consola (ver comandos.py). Protocolo, una línea
+UTF-8 por pedido:
+
+    NUEVA [semilla]     crea una partida y la asocia a la conexión; responde su id
+    RETOMAR <id>        continúa una partida (en memoria o desalojada a disco)
+    NORTE | SUR | ESTE | OESTE | EXPLORAR | ESTADO | MAPA | GUARDAR
+    SALIR               guarda la partida en disco y cierra la conexión
+    METRICAS            ocupación del servidor y latencia por comando
+
+Cada respuesta es "OK <n>" seguida de n líneas, o una única línea "ERR <motivo>".
+
+Las partidas sin comandos durante --inactividad segundos se desalojan a disco
+en formato .dgn (serializacion.guardar_partida) y vuelven a cargarse, de forma
+perezosa, con su siguiente comando; al recargarse se materializa entera y el
+archivo se cierra. Con --max-sesiones partidas en memoria, la menos usada se
+desaloja para hacer lugar. Una partida terminada (victoria o
+muerte) se borra.
+
+Uso por consola:
+    python -m dungeon_generator.servidor --puerto 7777 --directorio sesiones
+    printf 'NUEVA 42\\nESTE\\nEXPLORAR\\nSALIR\\n' | nc 127.0.0.1 7777
+"""
+import argparse
+import asyncio
+import os
+import re
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from . import instrumentacion
+from .binario import cerrar_archivo
+from .comandos import COMANDOS, ejecutar, mensaje_bienvenida
+from .explorador import Explorador
+from .mapa import Mapa, generar_mapa
+from .minimapa import Minimapa
+from .salida import quitar_marcado
+from .serializacion import guardar_partida, cargar_partida
+
+# Los id se usan como nombre de archivo: solo hexadecimal, sin rutas
+_ID_VALIDO = re.compile(r"[0-9a-f]{12}")
+EXTENSION = ".dgn"
+MUESTRAS_LATENCIA = 1024
+
+
+class Partida:
+    """Una partida del servidor. mapa y explorador son None mientras está desalojada en disco."""
+    __slots__ = ('id', 'mapa', 'explorador', 'minimapa', 'ultimo_uso')
+
+    def __init__(self, id: str, mapa: Optional[Mapa], explorador: Optional[Explorador]):
+        self.id = id
+        self.mapa = mapa
+        self.explorador = explorador
+        self.minimapa: Optional[Minimapa] = None  # se crea con el primer MAPA
+        self.ultimo_uso = time.monotonic()
+
+
+class Latencias:
+    """Cantidad, total y máximo por comando, más las últimas muestras para los percentiles."""
+
+    def __init__(self):
+        self.cantidad: Dict[str, int] = {}
+        self.total: Dict[str, float] = {}
+        self.maximo: Dict[str, float] = {}
+        self.muestras: Dict[str, Deque[float]] = {}
+
+    def registrar(self, comando: str, segundos: float):
+        self.cantidad[comando] = self.cantidad.get(comando, 0) + 1
+        self.total[comando] = self.total.get(comando, 0.0) + segundos
+        if segundos > self.maximo.get(comando, 0.0):
+            self.maximo[comando] = segundos
+        muestras = self.muestras.get(comando)
+        if muestras is None:
+            muestras = self.muestras[comando] = deque(maxlen=MUESTRAS_LATENCIA)
+        muestras.append(segundos)
+
+    def lineas(self) -> List[str]:
+        salida = []
+        for comando in sorted(self.cantidad):
+            orden = sorted(self.muestras[comando])
+            p50 = orden[len(orden) // 2]
+            p99 = orden[min(len(orden) - 1, len(orden) * 99 // 100)]
+            salida.append(f"{comando} n={self.cantidad[comando]} media_ms={self.total[comando] / self.cantidad[comando] * 1e3:.3f} "
+                          f"p50_ms={p50 * 1e3:.3f} p99_ms={p99 * 1e3:.3f} max_ms={self.maximo[comando] * 1e3:.3f}")
+        return salida
+
+
+class ErrorProtocolo(Exception):
+    """Pedido inválido: se responde con ERR y la conexión sigue abierta."""
+
+
+class Servidor:
+    """Partidas en memoria (en orden de uso), desalojo a disco y atención de conexiones."""
+
+    def __init__(self, directorio: str, max_sesiones: int = 10000, max_conexiones: int = 1000,
+                 inactividad: float = 300.0, ancho: int = 10, alto: int = 10, n_habitaciones: int = 30,
+                 vida: int = 10, compacto: bool = False):
+        self.directorio = directorio
+        self.max_sesiones = max_sesiones
+        self.max_conexiones = max_conexiones
+        self.inactividad = inactividad
+        self.ancho = ancho
+        self.alto = alto
+        self.n_habitaciones = n_habitaciones
+        self.vida = vida
+        self.compacto = compacto
+        # id -> Partida cargada, de la menos a la más recientemente usada
+        self.partidas: 'OrderedDict[str, Partida]' = OrderedDict()
+        self.conexiones = 0
+        self.desalojos = 0
+        self.cargas = 0
+        self.latencias = Latencias()
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta(self, id: str) -> str:
+        return os.path.join(self.directorio, id + EXTENSION)
+
+    # --- CICLO DE VIDA DE LAS PARTIDAS ---
+    def nueva(self, semilla: Optional[int] = None) -> Partida:
+        if semilla is None:
+            semilla = secrets.randbits(32)
+        mapa = generar_mapa(self.ancho, self.alto, self.n_habitaciones, semilla=semilla, compacto=self.compacto)
+        explorador = Explorador(mapa, vida=self.vida, salida=None)
+        mapa.marcar_visitada(explorador.habitacion_actual)
+        id = secrets.token_hex(6)
+        while id in self.partidas or os.path.exists(self.ruta(id)):
+            id = secrets.token_hex(6)
+        partida = Partida(id, mapa, explorador)
+        self._alojar(partida)
+        return partida
+
+    def retomar(self, id: str) -> Partida:
+        if not _ID_VALIDO.fullmatch(id):
+            raise ErrorProtocolo(f"id inválido: {id!r}")
+        partida = self.partidas.get(id)
+        if partida is not None:
+            return partida
+        if not os.path.exists(self.ruta(id)):
+            raise ErrorProtocolo(f"no existe la partida {id}")
+        partida = Partida(id, None, None)
+        self._alojar(partida)
+        return partida
+
+    def _alojar(self, partida: Partida):
+        # Se hace lugar antes de agregar, para no desalojar a la propia partida
+        while len(self.partidas) >= self.max_sesiones:
+            _, menos_usada = self.partidas.popitem(last=False)
+            self._desalojar(menos_usada)
+        self.partidas[partida.id] = partida
+
+    def _desalojar(self, partida: Partida):
+        """Guarda la partida en disco y suelta su mapa; el siguiente comando la vuelve a cargar."""
+        if partida.mapa is None:
+            return
+        guardar_partida(partida.mapa, partida.explorador, self.ruta(partida.id))
+        if partida.minimapa is not None:
+            partida.minimapa.cerrar()
+        partida.mapa = partida.explorador = partida.minimapa = None
+        self.desalojos += 1
+
+    def _cargar(self, partida: Partida):
+        mapa, explorador = cargar_partida(self.ruta(partida.id))
+        if mapa is None:
+            raise ErrorProtocolo(f"no se pudo cargar la partida {partida.id}")
+        explorador.salida = None
+        # Las partidas son chicas: se materializan enteras y se suelta el archivo, así cada partida
+        # retomada no retiene un descriptor abierto (el mmap duplica el del archivo) hasta desalojarse
+        cerrar_archivo(mapa)
+        partida.mapa, partida.explorador = mapa, explorador
+        self.cargas += 1
+
+    def _usar(self, partida: Partida):
+        if partida.id not in self.partidas:
+            # Fue desalojada por el límite de sesiones mientras la conexión seguía abierta
+            self._alojar(partida)
+        self.partidas.move_to_end(partida.id)
+        partida.ultimo_uso = time.monotonic()
+        if partida.mapa is None:
+            self._cargar(partida)
+
+    def _terminar(self, partida: Partida):
+        self.partidas.pop(partida.id, None)
+        if partida.minimapa is not None:
+            partida.minimapa.cerrar()
+        partida.mapa = partida.explorador = partida.minimapa = None
+        try:
+            os.remove(self.ruta(partida.id))
+        except FileNotFoundError:
+            pass
+
+    def guardar(self, partida: Partida):
+        self.partidas.pop(partida.id, None)
+        self._desalojar(partida)
+
+    def barrer_inactivas(self) -> int:
+        """Desaloja las partidas sin uso desde hace más de 'inactividad' segundos."""
+        limite = time.monotonic() - self.inactividad
+        desalojadas = 0
+        # Las partidas están en orden de uso: se corta en la primera reciente
+        while self.partidas:
+            id, partida = next(iter(self.partidas.items()))
+            if partida.ultimo_uso > limite:
+                break
+            del self.partidas[id]
+            self._desalojar(partida)
+            desalojadas += 1
+        return desalojadas
+
+    async def barrer_periodicamente(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.inactividad / 4))
+            self.barrer_inactivas()
+
+    # --- PROTOCOLO ---
+    def procesar(self, partida: Optional[Partida], linea: str) -> Tuple[List[str], Optional[Partida], bool]:
+        """Resuelve un pedido: (líneas de respuesta, partida de la conexión, cerrar conexión)."""
+        partes = linea.split()
+        if not partes:
+            raise ErrorProtocolo("pedido vacío")
+        comando = partes[0].upper()
+
+        if comando == "METRICAS":
+            return ([f"sesiones_en_memoria {len(self.partidas)}",
+                     f"sesiones_cargadas {sum(1 for p in self.partidas.values() if p.mapa is not None)}",
+                     f"conexiones {self.conexiones}",
+                     f"desalojos {self.desalojos}",
+                     f"cargas {self.cargas}"] + self.latencias.lineas(), partida, False)
+        if comando == "NUEVA":
+            try:
+                semilla = int(partes[1]) if len(partes) > 1 else None
+            except ValueError:
+                raise ErrorProtocolo(f"semilla inválida: {partes[1]!r}")
+            partida = self.nueva(semilla)
+            return [partida.id] + mensaje_bienvenida(partida.explorador), partida, False
+        if comando == "RETOMAR":
+            if len(partes) < 2:
+                raise ErrorProtocolo("falta el id de la partida")
+            partida = self.retomar(partes[1].lower())
+            self._usar(partida)
+            return [partida.id, f"Continúas en la habitación {partida.explorador.posicion_actual}."], partida, False
+
+        if comando not in COMANDOS:
+            raise ErrorProtocolo(f"comando desconocido: {comando}")
+        if partida is None:
+            raise ErrorProtocolo("no hay partida: usa NUEVA o RETOMAR <id>")
+        self._usar(partida)
+        explorador = partida.explorador
+
+        mensajes: List[str] = []
+        if comando == "SALIR":
+            self.guardar(partida)
+            return [f"Partida {partida.id} guardada. ¡Hasta luego!"], None, True
+        if comando == "GUARDAR":
+            guardar_partida(partida.mapa, explorador, self.ruta(partida.id))
+            mensajes.append(f"Partida {partida.id} guardada.")
+        elif comando == "MAPA":
+            if partida.minimapa is None:
+                partida.minimapa = Minimapa(partida.mapa)
+            mensajes.extend(partida.minimapa.filas(explorador.posicion_actual))
+        elif ejecutar(explorador, comando, mensajes):
+            self._terminar(partida)
+            return mensajes + ["Partida terminada."], None, False
+        return mensajes, partida, False
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        if self.conexiones >= self.max_conexiones:
+            escritor.write(b"ERR servidor lleno\n")
+            await escritor.drain()
+            escritor.close()
+            return
+        self.conexiones += 1
+        partida: Optional[Partida] = None
+        try:
+            while True:
+                try:
+                    datos = await lector.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    break  # línea más larga que el límite del lector
+                if not datos:
+                    break
+                linea = datos.decode("utf-8", errors="replace").strip()
+                if not linea:
+                    continue
+                comando = linea.split(None, 1)[0].upper()
+                inicio = time.perf_counter()
+                cerrar = False
+                try:
+                    with instrumentacion.tramo("servidor.comando", comando=comando):
+                        lineas, partida, cerrar = self.procesar(partida, linea)
+                    # Los mensajes del juego traen marcado de rich; al cliente le llega texto plano
+                    respuesta = "\n".join([f"OK {len(lineas)}"] + [quitar_marcado(l) for l in lineas]) + "\n"
+                except ErrorProtocolo as e:
+                    respuesta = f"ERR {e}\n"
+                if comando in COMANDOS or comando in ("NUEVA", "RETOMAR", "METRICAS"):
+                    self.latencias.registrar(comando, time.perf_counter() - inicio)
+                escritor.write(respuesta.encode("utf-8"))
+                await escritor.drain()
+                if cerrar:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.conexiones -= 1
+            escritor.close()
+
+    async def servir(self, host: str = "127.0.0.1", puerto: int = 7777):
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        barrido = asyncio.create_task(self.barrer_periodicamente())
+        direcciones = ", ".join(str(s.getsockname()) for s in servidor.sockets)
+        print(f"Servidor de dungeons escuchando en {direcciones}", flush=True)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            barrido.cancel()
+            # Al apagar, todas las partidas en memoria quedan en disco para retomarlas
+            while self.partidas:
+                _, partida = self.partidas.popitem(last=False)
+                self._desalojar(partida)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de partidas simultáneas por TCP local.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=7777)
+    parser.add_argument("--directorio", default="sesiones", help="Donde se guardan las partidas desalojadas")
+    parser.add_argument("--max-sesiones", type=int, default=10000, help="Partidas en memoria a la vez")
+    parser.add_argument("--max-conexiones", type=int, default=1000)
+    parser.add_argument("--inactividad", type=float, default=300.0,
+                        help="Segundos sin comandos antes de desalojar una partida a disco")
+    parser.add_argument("--ancho", type=int, default=10)
+    parser.add_argument("--alto", type=int, default=10)
+    parser.add_argument("--habitaciones", type=int, default=30)
+    parser.add_argument("--vida", type=int, default=10)
+    parser.add_argument("--compacto", action="store_true", help="Mapas con almacenamiento compacto")
+    args = parser.parse_args(argv)
+
+    servidor = Servidor(args.directorio, args.max_sesiones, args.max_conexiones, args.inactividad,
+                        args.ancho, args.alto, args.habitaciones, args.vida, args.compacto)
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Motor de simulación sin interfaz para partidas de Explorador (Monte Carlo).
+
+Las partidas se juegan con Explorador.mover y Explorador.resolver_habitacion:
+nada se imprime ni se formatea en el bucle de turnos. Cada partida devuelve un
+ResultadoPartida con datos estructurados para ajustar la dificultad.
+
+Uso por consola:
+    python -m dungeon_generator.simulacion --partidas 10000 --politica jefe --semilla 1
+"""
+import random
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .aleatorio import derivar_semilla
+from .explorador import Explorador
+from .habitacion import DELTAS
+from .mapa import Mapa, generar_mapa
+
+EXPLORAR = "explorar"
+
+
+class Politica:
+    """Estrategia que decide la acción de cada turno: EXPLORAR o una dirección."""
+    nombre = "base"
+
+    def reiniciar(self, explorador: Explorador, rng: random.Random):
+        """Se llama al comienzo de cada partida."""
+        self.rng = rng
+
+    def elegir(self, explorador: Explorador) -> str:
+        raise NotImplementedError("La política debe implementar elegir().")
+
+
+class PaseoAleatorio(Politica):
+    """Explora el contenido que encuentra y se mueve a una salida al azar."""
+    nombre = "aleatoria"
+
+    def elegir(self, explorador: Explorador) -> str:
+        hab = explorador.habitacion_actual
+        if hab.contenido is not None:
+            return EXPLORAR
+        salidas = list(hab.conexiones)
+        return self.rng.choice(salidas) if salidas else EXPLORAR
+
+
+class CodiciosaJefe(Politica):
+    """Va al Jefe por el camino más corto y solo pelea con él.
+
+    Usa el árbol BFS con raíz en el Jefe que guarda mapa.enrutador, así que cada
+    turno es una consulta O(1). Si un portal la deja sin camino, camina al azar.
+    """
+    nombre = "jefe"
+
+    def reiniciar(self, explorador: Explorador, rng: random.Random):
+        super().reiniciar(explorador, rng)
+        jefe = explorador.mapa.habitacion_jefe
+        self.objetivo = jefe.coordenadas if jefe is not None else None
+        self.enrutador = explorador.mapa.enrutador
+
+    def elegir(self, explorador: Explorador) -> str:
+        if self.objetivo is None or explorador.posicion_actual == self.objetivo:
+            return EXPLORAR
+        paso = self.enrutador.siguiente_paso(explorador.posicion_actual, self.objetivo)
+        if paso is not None:
+            return paso
+        salidas = explorador.obtener_habitaciones_adyacentes()
+        return self.rng.choice(salidas) if salidas else EXPLORAR
+
+
+class ExplorarTodo(Politica):
+    """Recorrido en profundidad: explora cada habitación y vuelve sobre sus pasos."""
+    nombre = "explorar"
+
+    def reiniciar(self, explorador: Explorador, rng: random.Random):
+        super().reiniciar(explorador, rng)
+        self.vistas = {explorador.posicion_actual}
+        self.camino: List[Tuple[int, int]] = []
+
+    def elegir(self, explorador: Explorador) -> str:
+        hab = explorador.habitacion_actual
+        if hab.contenido is not None:
+            return EXPLORAR
+
+        posicion = explorador.posicion_actual
+        self.vistas.add(posicion)
+        conexiones = hab.conexiones
+        for direccion, vecina in conexiones.items():
+            if vecina.coordenadas not in self.vistas:
+                self.camino.append(posicion)
+                return direccion
+
+        # Sin vecinas nuevas: retroceder (un portal puede haber roto el camino)
+        while self.camino:
+            px, py = self.camino.pop()
+            for direccion, (dx, dy) in DELTAS.items():
+                if direccion in conexiones and (posicion[0] + dx, posicion[1] + dy) == (px, py):
+                    return direccion
+            self.camino.clear()
+
+        salidas = list(conexiones)
+        return self.rng.choice(salidas) if salidas else EXPLORAR
+
+
+POLITICAS = {clase.nombre: clase for clase in (PaseoAleatorio, CodiciosaJefe, ExplorarTodo)}
+
+
+class ResultadoPartida:
+    """Resultado estructurado de una partida simulada."""
+
+    def __init__(self, victoria: bool, turnos: int, curva_vida: array, valor_tesoro: int, visitadas: int):
+        self.victoria = victoria
+        self.turnos = turnos
+        self.curva_vida = curva_vida
+        self.valor_tesoro = valor_tesoro
+        self.visitadas = visitadas
+
+    @property
+    def muerte(self) -> bool:
+        return self.curva_vida[-1] <= 0
+
+    def a_diccionario(self) -> dict:
+        return {
+            'victoria': self.victoria,
+            'muerte': self.muerte,
+            'turnos': self.turnos,
+            'curva_vida': self.curva_vida.tolist(),
+            'valor_tesoro': self.valor_tesoro,
+            'visitadas': self.visitadas,
+        }
+
+
+def jugar_partida(mapa: Mapa, politica: Politica, rng_combate: random.Random, rng_politica: random.Random,
+                  vida: int = 10, max_turnos: int = 1000) -> ResultadoPartida:
+    """Juega una partida completa sobre 'mapa' (que queda modificado)."""
+    explorador = Explorador(mapa, vida=vida, rng=rng_combate, salida=None)
+    explorador.mapa.marcar_visitada(explorador.habitacion_actual)
+    politica.reiniciar(explorador, rng_politica)
+
+    jefe = mapa.habitacion_jefe
+    curva_vida = array('h', [explorador.vida])
+    visitadas = {explorador.posicion_actual}
+    elegir, mover, resolver = politica.elegir, explorador.mover, explorador.resolver_habitacion
+    victoria = False
+    turnos = 0
+
+    while turnos < max_turnos:
+        turnos += 1
+        accion = elegir(explorador)
+        if accion == EXPLORAR:
+            resolver()
+        elif mover(accion):
+            visitadas.add(explorador.posicion_actual)
+        curva_vida.append(explorador.vida)
+
+        if explorador.vida <= 0:
+            break
+        if jefe is not None and jefe.contenido is None:
+            victoria = True
+            break
+
+    valor_tesoro = sum(obj.valor for obj in explorador.inventario)
+    return ResultadoPartida(victoria, turnos, curva_vida, valor_tesoro, len(visitadas))
+
+
+def simular(n_partidas: int, politica: Politica, ancho: int = 10, alto: int = 10, n_habitaciones: int = 30,
+            semilla: int = 0, semilla_mapa: Optional[int] = None, vida: int = 10,
+            max_turnos: int = 1000) -> Iterable[ResultadoPartida]:
+    """Genera los resultados de 'n_partidas' partidas.
+
+    Sin semilla_mapa cada partida usa un mapa distinto; con ella todas juegan el
+    mismo dungeon (regenerado desde la semilla) y solo varían combate y decisiones.
+    """
+    for i in range(n_partidas):
+        mapa = generar_mapa(ancho, alto, n_habitaciones,
+                            semilla_mapa if semilla_mapa is not None else derivar_semilla(semilla, i, "mapa"))
+        rng_combate = random.Random(derivar_semilla(semilla, i, "combate"))
+        rng_politica = random.Random(derivar_semilla(semilla, i, "politica"))
+        yield jugar_partida(mapa, politica, rng_combate, rng_politica, vida, max_turnos)
+
+
+def resumir(resultados: Iterable[ResultadoPartida]) -> Dict[str, float]:
+    """Agrega tasas y promedios de un conjunto de partidas."""
+    n = victorias = muertes = turnos = tesoro = visitadas = vida_final = 0
+    for resultado in resultados:
+        n += 1
+        victorias += resultado.victoria
+        muertes += resultado.muerte
+        turnos += resultado.turnos
+        tesoro += resultado.valor_tesoro
+        visitadas += resultado.visitadas
+        vida_final += resultado.curva_vida[-1]
+    if n == 0:
+        return {'partidas': 0}
+    return {
+        'partidas': n,
+        'tasa_victoria': victorias / n,
+        'tasa_muerte': muertes / n,
+        'turnos_medios': turnos / n,
+        'valor_tesoro_medio': tesoro / n,
+        'visitadas_medias': visitadas / n,
+        'vida_final_media': vida_final / n,
+    }
+
+
+def main(argv=None):
+    # Solo la consola los necesita: importar el módulo desde un lote no los carga
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo de partidas sin interfaz.")
+    parser.add_argument("--partidas", type=int, default=1000)
+    parser.add_argument("--politica", choices=sorted(POLITICAS), default="aleatoria")
+    parser.add_argument("--ancho", type=int, default=10)
+    parser.add_argument("--alto", type=int, default=10)
+    parser.add_argument("--habitaciones", type=int, default=30)
+    parser.add_argument("--vida", type=int, default=10)
+    parser.add_argument("--max-turnos", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--semilla-mapa", type=int, default=None, help="Juega siempre el mismo mapa")
+    parser.add_argument("--detalle", action="store_true", help="Una línea JSON por partida además del resumen")
+    args = parser.parse_args(argv)
+
+    resultados = simular(args.partidas, POLITICAS[args.politica](), args.ancho, args.alto, args.habitaciones,
+                         args.semilla, args.semilla_mapa, args.vida, args.max_turnos)
+    if args.detalle:
+        resultados = list(resultados)
+        for resultado in resultados:
+            print(json.dumps(resultado.a_diccionario(), separators=(',', ':')))
+    print(json.dumps(resumir(resultados)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Salida por cuadros para el bucle interactivo.
+
+Pantalla guarda el cuadro anterior y, en una terminal, escribe solo los tramos
+de línea que cambiaron usando secuencias ANSI de posicionamiento del cursor.
+Si la salida no es una terminal (archivo, tubería, registro de CI) cada cuadro
+se agrega completo, como un print común.
+
+Los cuadros son listas de líneas de texto plano: un carácter por columna.
+"""
+import sys
+from typing import List, Optional, TextIO
+
+from . import instrumentacion
+from .instrumentacion import medido
+
+_INICIO = "\x1b[H\x1b[2J"     # cursor arriba a la izquierda y pantalla limpia
+_BORRAR_LINEA = "\x1b[K"       # desde el cursor hasta el final de la línea
+_BORRAR_DEBAJO = "\x1b[J"      # desde el cursor hasta el final de la pantalla
+
+
+def _ir_a(fila: int, columna: int) -> str:
+    return f"\x1b[{fila + 1};{columna + 1}H"
+
+
+def marco(titulo: str, lineas: List[str], ancho: int) -> List[str]:
+    """Encierra 'lineas' en un recuadro de 'ancho' columnas con el título en el borde superior."""
+    interior = ancho - 2
+    cabecera = f" {titulo} " if titulo else ""
+    salida = ["╭" + cabecera.center(interior, "─") + "╮"]
+    for linea in lineas:
+        salida.append("│" + linea[:interior].ljust(interior) + "│")
+    salida.append("╰" + "─" * interior + "╯")
+    return salida
+
+
+class Pantalla:
+    """Búfer de cuadros que escribe solo las diferencias con el cuadro anterior.
+
+    bytes_escritos acumula todo lo enviado y bytes_ultimo_cuadro lo del último
+    dibujar(), para medir cuánto cuesta cada turno en la conexión.
+    """
+
+    def __init__(self, salida: Optional[TextIO] = None, es_tty: Optional[bool] = None):
+        self.salida = salida if salida is not None else sys.stdout
+        self.es_tty = self.salida.isatty() if es_tty is None else es_tty
+        self.bytes_escritos = 0
+        self.bytes_ultimo_cuadro = 0
+        self.cuadros = 0
+        self._anterior: Optional[List[str]] = None
+
+    def _escribir(self, texto: str):
+        self.salida.write(texto)
+        self.salida.flush()
+        n = len(texto.encode('utf-8'))
+        self.bytes_escritos += n
+        self.bytes_ultimo_cuadro = n
+        self.cuadros += 1
+        if instrumentacion.sesion is not None:
+            instrumentacion.contar("terminal.bytes_escritos", n)
+
+    def reiniciar(self):
+        """El próximo cuadro se dibuja entero (p. ej. si otro código escribió en la terminal)."""
+        self._anterior = None
+
+    @medido("terminal.dibujar")
+    def dibujar(self, lineas: List[str]):
+        if not self.es_tty:
+            self._escribir("\n".join(lineas) + "\n")
+            return
+
+        anterior = self._anterior
+        if anterior is None:
+            partes = [_INICIO, "\n".join(lineas)]
+        else:
+            partes = []
+            for fila, nueva in enumerate(lineas):
+                vieja = anterior[fila] if fila < len(anterior) else ""
+                if nueva != vieja:
+                    partes.append(self._diferencia(fila, vieja, nueva))
+        # El cursor queda debajo del cuadro y se limpia lo que sobre del anterior y del último input()
+        partes.append(_ir_a(len(lineas), 0) + _BORRAR_DEBAJO)
+        self._anterior = list(lineas)
+        self._escribir("".join(partes))
+
+    @staticmethod
+    def _diferencia(fila: int, vieja: str, nueva: str) -> str:
+        """Secuencia que convierte 'vieja' en 'nueva' reescribiendo solo el tramo distinto."""
+        inicio = 0
+        limite = min(len(vieja), len(nueva))
+        while inicio < limite and vieja[inicio] == nueva[inicio]:
+            inicio += 1
+        if len(nueva) < len(vieja):
+            return _ir_a(fila, inicio) + nueva[inicio:] + _BORRAR_LINEA
+        fin = len(nueva)
+        if len(nueva) == len(vieja):
+            # Mismo largo: también se conserva el sufijo común
+            while fin > inicio and vieja[fin - 1] == nueva[fin - 1]:
+                fin -= 1
+        return _ir_a(fila, inicio) + nueva[inicio:fin]
@@ -4,6 +4,8 @@ from rich import print
 from rich.table import Table
 from typing import TYPE_CHECKING, Optional
 
+from .minimapa import Minimapa
+
 # Importaciones circulares para tipado
 if TYPE_CHECKING:
     from .explorador import Explorador
@@ -15,6 +17,7 @@ class Visualizador:
     
     def __init__(self, mapa: 'Mapa'):
         self.mapa = mapa
+        self.minimapa = Minimapa(mapa)
 
     def mostrar_habitacion_actual(self, explorador: 'Explorador'):
         """Muestra los detalles de la habitación actual y las conexiones disponibles."""
@@ -81,13 +84,13 @@ class Visualizador:
         table_estado.add_column("Valor", style="yellow")
         
         table_estado.add_row("Vida", f"{explorador.vida}/{explorador.vida_max}")
-        table_estado.add_row("Posición Actual", str(explorador.posicion))
+        table_estado.add_row("Posición Actual", str(explorador.posicion_actual))
         
         # Resumen de inventario
         inventario_resumen = ", ".join([f"{obj.nombre} ({obj.valor})" for obj in explorador.inventario])
         
         table_estado.add_row("Inventario", "Vacío" if not explorador.inventario else f"{len(explorador.inventario)} items")
-        table_estado.add_row("Valor Total Inventario", str(explorador.obtener_inventario_valor()))
+        table_estado.add_row("Valor Total Inventario", str(sum(obj.valor for obj in explorador.inventario)))
         
         print(table_estado)
         
@@ -96,51 +99,7 @@ class Visualizador:
         
         print("╭────────────────────────────────────────────────────────────────────────────────────────────── MINIMAPA (Visitado) ───────────────────────────────────────────────────────────────────────────────────────────────╮")
         
-        # Lógica para determinar los límites del minimapa (por ejemplo, 6x6 alrededor del explorador)
-        cx, cy = explorador.posicion
-        mapa_width = self.mapa.ancho
-        mapa_height = self.mapa.alto
-        
-        # Muestra una ventana de 6x6, centrada o ajustada
-        size = 6
-        start_x = max(0, cx - size // 2)
-        end_x = min(mapa_width, cx + size // 2 + 1)
-        start_y = max(0, cy - size // 2)
-        end_y = min(mapa_height, cy + size // 2 + 1)
-        
-        # Asegurarse de tener al menos 6x6 si es posible
-        if end_x - start_x < size and mapa_width >= size: end_x = start_x + size
-        if end_y - start_y < size and mapa_height >= size: end_y = start_y + size
-
-        output = []
-        for y in range(mapa_height):
-            line = []
-            for x in range(mapa_width):
-                hab = self.mapa.obtener_habitacion(x, y)
-                
-                # Símbolos
-                if (x, y) == (cx, cy):
-                    line.append(" @ ") # Posición del explorador
-                elif hab and hab.visitada:
-                    # Usamos un símbolo simple para la habitación visitada, por ejemplo un punto.
-                    if hab.contenido and hab.contenido.tipo == 'jefe':
-                        line.append(" J ") # Jefe
-                    elif hab.contenido and hab.contenido.tipo == 'monstruo':
-                        line.append(" M ") # Monstruo
-                    elif hab.contenido and hab.contenido.tipo == 'tesoro':
-                        line.append(" T ") # Tesoro
-                    elif hab.inicial:
-                        line.append(" I ") # Inicial
-                    else:
-                        line.append(" . ") 
-                else:
-                    line.append("   ") # No visitada (espacio vacío)
-            
-            # Imprime solo las filas dentro de la ventana de visualización
-            if start_y <= y < end_y:
-                 output.append("".join(line))
-        
-        # Imprime el minimapa
-        print("\n".join(output))
+        # Solo se dibuja la ventana alrededor del explorador; las filas sin cambios salen de la caché
+        print(self.minimapa.texto(explorador.posicion_actual))
 
         print("╰───────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────────╯")
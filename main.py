@@ -1,157 +1,210 @@
-rom dungeon_generator.mapa import Mapa
+from dungeon_generator.mapa import Mapa, es_jugable, semillas_de_respaldo
+from dungeon_generator.aleatorio import semilla_nueva
 from dungeon_generator.explorador import Explorador
 from dungeon_generator.objeto import Objeto
+from dungeon_generator.diario import Diario
+from dungeon_generator.habitacion import Habitacion
+from dungeon_generator.minimapa import Minimapa
+from dungeon_generator.terminal import Pantalla, marco
+from dungeon_generator.comandos import COMANDOS, ejecutar, mensaje_bienvenida
+from dungeon_generator.salida import quitar_marcado
+from dungeon_generator import instrumentacion
+from dungeon_generator.cache import CacheMapas, directorio_por_defecto
+from dungeon_generator.repeticion import Grabador
+from dungeon_generator.pisos import Pisos
 from rich.console import Console
-from rich.panel import Panel
-from rich import print
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 import os
+import textwrap
 import time
-import random
 
 ANCHO_MAPA = 10
 ALTO_MAPA = 10
 NUM_HABITACIONES = 30
 VIDA_INICIAL = 10
+# Semilla de la partida por defecto (da las 30 habitaciones pedidas, con jefe)
+SEMILLA = 43
+# Pisos de la partida; el siguiente se genera en segundo plano mientras se juega el actual
+PISOS = 3
+ARCHIVO_AUTOGUARDADO = "autoguardado.dgn"
+# Comandos y sumas de control de la última partida: python -m dungeon_generator.repeticion ultima_partida.dgr
+ARCHIVO_REPETICION = "ultima_partida.dgr"
+# Ventana del mapa que se dibuja alrededor del explorador
+VISTA_ANCHO = 40
+VISTA_ALTO = 20
+# Columnas del cuadro de cada turno (los recuadros y las líneas largas se recortan a este ancho)
+ANCHO_CUADRO = 78
+# DUNGEON_PERFIL=perfil.json (o perfil.trace.json para chrome://tracing) activa la instrumentación;
+# DUNGEON_PERFIL_MEMORIA=1 anota además los bytes asignados en cada tramo
+VARIABLE_PERFIL = "DUNGEON_PERFIL"
+VARIABLE_PERFIL_MEMORIA = "DUNGEON_PERFIL_MEMORIA"
+# Directorio de la caché de mapas generados (por defecto ~/.cache/dungeon_generator); "0" la desactiva
+VARIABLE_CACHE = "DUNGEON_CACHE"
 
 console = Console()
 
-def mostrar_bienvenida(explorador: Explorador):
-    explorador.habitacion_actual.visitada = True
-    
-    print(Panel(
-        f"[bold green]¡Bienvenido al Dungeon Mapa Generador![/bold green]\n"
-        f"Tu aventura comienza en la habitación {explorador.posicion_actual}.\n"
-        f"Explorador [yellow]{explorador.vida}/{explorador.vida_max}[/yellow] HP. "
-        f"Encuentra la habitación del Jefe para ganar."
-    ))
-
-def mostrar_estado(explorador: Explorador):
-    inventario_str = ", ".join([obj.nombre for obj in explorador.inventario]) if explorador.inventario else "Vacío"
-    
-    print(Panel(
-        f"[bold blue]-- ESTADO DEL EXPLORADOR --[/bold blue]\n"
-        f"Ubicación: {explorador.posicion_actual}\n"
-        f"Vida: [red]{explorador.vida}/{explorador.vida_max}[/red]\n"
-        f"Inventario: {inventario_str}"
-    ))
-
-def mostrar_mapa(mapa: Mapa, explorador: Explorador):
-    mapa_str = ""
-    for y in range(mapa.alto):
-        for x in range(mapa.ancho):
-            hab = mapa.obtener_habitacion(x, y)
-            
-            if (x, y) == explorador.posicion_actual:
-                mapa_str += "[bold magenta]X[/bold magenta]"
-            elif hab and hab.visitada:
-                simbolo = ""
-                if hab.estado == "Jefe": simbolo = "[bold red]J[/bold red]"
-                elif hab.estado == "Monstruo": simbolo = "[bold yellow]M[/bold yellow]"
-                elif hab.estado == "Tesoro": simbolo = "[bold green]T[/bold green]"
-                elif hab.estado == "Evento": simbolo = "[bold cyan]E[/bold cyan]"
-                else: simbolo = "[grey]#[/grey]"
-                mapa_str += simbolo
-            elif hab:
-                mapa_str += "[dim]?[/dim]"
-            else:
-                mapa_str += " "
-                
-        mapa_str += "\n"
-        
-    print(Panel(mapa_str, title="Mapa del Dungeon"))
-    
-    adyacentes = explorador.habitacion_actual.obtener_conexiones()
-    print(f"Conexiones disponibles: [bold yellow]{', '.join(adyacentes)}[/bold yellow]")
+_SIMBOLOS_ESTADO = {"Jefe": "J", "Monstruo": "M", "Tesoro": "T", "Evento": "E"}
 
+def simbolo_mapa(hab: Optional[Habitacion]) -> str:
+    if hab is None:
+        return " "
+    if not hab.visitada:
+        return "?"
+    return _SIMBOLOS_ESTADO.get(hab.estado, "#")
 
-def inicializar_juego() -> Tuple[Mapa, Explorador]:
-    
-    random.seed(42)
-    
+def crear_minimapa(mapa: Mapa) -> Minimapa:
+    return Minimapa(mapa, VISTA_ANCHO, VISTA_ALTO, simbolo=simbolo_mapa, marcador="X")
+
+def armar_cuadro(explorador: Explorador, minimapa: Minimapa, turno: int, mensajes: List[str],
+                 con_mapa: bool = True) -> List[str]:
+    """Líneas del cuadro del turno: estado, mapa (ventana del minimapa), habitación y mensajes."""
+    hab_actual = explorador.habitacion_actual
+    lineas = marco(f"TURNO {turno}", [
+        f"Vida: {explorador.vida}/{explorador.vida_max}   Ubicación: {explorador.posicion_actual}   "
+        f"Inventario: {len(explorador.inventario)} objetos",
+    ], ANCHO_CUADRO)
+    if con_mapa:
+        lineas += marco("Mapa del Dungeon", minimapa.filas(explorador.posicion_actual), ANCHO_CUADRO)
+    desc_contenido = hab_actual.contenido.descripcion if hab_actual.contenido else "Vacía"
+    lineas.append(f"Estás en la habitación {hab_actual.x, hab_actual.y}. Estado: {hab_actual.estado}. Contenido: {desc_contenido}")
+    lineas.append(f"Conexiones disponibles: {', '.join(hab_actual.conexiones) or 'ninguna'}")
+    for mensaje in mensajes:
+        # Los cuadros de Pantalla son texto plano (un carácter por columna): sin marcado de rich
+        lineas.extend(textwrap.wrap(quitar_marcado(mensaje), ANCHO_CUADRO) or [""])
+    # Una línea más ancha que la terminal se partiría y correría las filas del cuadro
+    return [linea[:ANCHO_CUADRO] for linea in lineas]
+
+
+def cache_de_mapas() -> Optional[CacheMapas]:
+    directorio = os.environ.get(VARIABLE_CACHE) or directorio_por_defecto()
+    if directorio == "0":
+        return None
+    try:
+        return CacheMapas(directorio)
+    except OSError:
+        return None  # sin permisos de escritura: se genera siempre
+
+def _mapa_para_semilla(cache: Optional[CacheMapas], semilla: int) -> Mapa:
+    clave = cache.clave(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, semilla) if cache is not None else None
+    mapa = cache.cargar(clave) if cache is not None else None
+    if mapa is not None:
+        console.print("Mapa de {} habitaciones cargado desde la caché.".format(NUM_HABITACIONES))
+        return mapa
+
+    # La semilla va al propio mapa: no se toca el estado global de 'random'
     console.print("Generando estructura de {} habitaciones...".format(NUM_HABITACIONES))
-    mapa = Mapa(ANCHO_MAPA, ALTO_MAPA)
+    mapa = Mapa(ANCHO_MAPA, ALTO_MAPA, semilla=semilla)
     mapa.generar_estructura(NUM_HABITACIONES)
-    
-    recompensa_final = Objeto(nombre="Amuleto de Leyenda", descripcion="Objeto clave para la victoria.", valor=1000)
-    mapa.colocar_jefe(recompensa_final)
 
-    console.print("Distribuyendo contenido (Tesoros, Monstruos, Eventos)...")
+    console.print("Distribuyendo contenido (Tesoros, Monstruos, Eventos, Jefe)...")
     mapa.colocar_contenido()
+    if cache is not None:
+        cache.guardar(clave, mapa)
+    return mapa
+
+def inicializar_juego(semilla: Optional[int] = SEMILLA) -> Tuple[Mapa, Explorador]:
     
-    explorador = Explorador(
-        mapa=mapa,
-        posicion_inicial=mapa.entrada_segura,
-        vida_max=VIDA_INICIAL
-    )
-    
-    explorador.habitacion_actual.visitada = True
+    with instrumentacion.tramo("juego.inicializar", habitaciones=NUM_HABITACIONES):
+        cache = cache_de_mapas() if semilla is not None else None
+        # Si el dungeon se cortó a las pocas habitaciones o quedó sin jefe, se prueba la siguiente semilla de respaldo
+        for candidata in semillas_de_respaldo(semilla if semilla is not None else semilla_nueva()):
+            mapa = _mapa_para_semilla(cache, candidata)
+            if es_jugable(mapa, NUM_HABITACIONES):
+                break
+            console.print("El dungeon quedó con {} habitaciones o sin jefe; se genera otro.".format(len(mapa.habitaciones)))
+
+        with instrumentacion.tramo("juego.explorador"):
+            explorador = Explorador(
+                mapa=mapa,
+                vida=VIDA_INICIAL
+            )
+            explorador.mapa.marcar_visitada(explorador.habitacion_actual)
     
     return mapa, explorador
 
-def simular_interaccion(explorador: Explorador, visualizador: Console):
+def simular_interaccion(explorador: Explorador, visualizador: Console, diario: Optional[Diario] = None,
+                        minimapa: Optional[Minimapa] = None, pantalla: Optional[Pantalla] = None,
+                        grabador: Optional[Grabador] = None, pisos: Optional[Pisos] = None):
     
-    opciones_validas = {"ESTE", "NORTE", "SUR", "OESTE", "SALIR", "ESTADO", "MAPA", "GUARDAR", "EXPLORAR"}
+    if minimapa is None:
+        minimapa = crear_minimapa(explorador.mapa)
+    if pantalla is None:
+        pantalla = Pantalla()
     turno = 1
+    mensajes = mensaje_bienvenida(explorador)
+    con_mapa = True
+    terminada = False
     
     while explorador.vida > 0:
-        visualizador.print(f"\n[bold]-- TURNO {turno} --[/bold]")
-        
-        hab_actual = explorador.habitacion_actual
-        desc_contenido = hab_actual.contenido.descripcion if hab_actual.contenido else "Vacía"
-        visualizador.print(f"Estás en la habitación {hab_actual.x, hab_actual.y}. Estado: {hab_actual.estado}. Contenido: {desc_contenido}")
+        # Solo se envían las partes del cuadro que cambiaron desde el turno anterior
+        pantalla.dibujar(armar_cuadro(explorador, minimapa, turno, mensajes, con_mapa))
+        mensajes = []
         
-        comando = visualizador.input("¿Qué deseas hacer? (Opciones: ESTE, SUR, SALIR, ESTADO, MAPA, GUARDAR, EXPLORAR): ").upper()
+        comando = visualizador.input(f"¿Qué deseas hacer? (Opciones: {', '.join(COMANDOS)}): ").upper()
         
-        if comando not in opciones_validas:
-            visualizador.print("[bold red]Comando inválido.[/bold red] Intenta de nuevo.")
+        if comando not in COMANDOS:
+            mensajes.append("Comando inválido. Intenta de nuevo.")
             continue
             
-        if comando == "SALIR":
-            visualizador.print("[bold cyan]¡Adiós! Gracias por jugar.[/bold cyan]")
-            break
-        elif comando == "ESTADO":
-            mostrar_estado(explorador)
-        elif comando == "MAPA":
-            mostrar_mapa(explorador.mapa, explorador)
-        elif comando == "EXPLORAR":
-            interaccion = explorador.explorar_habitacion()
-            visualizador.print(interaccion)
-            
-            if hab_actual.estado == "Jefe" and hab_actual.contenido is None:
-                   visualizador.print("[bold yellow blink]¡HAS DERROTADO AL JEFE Y GANADO EL JUEGO![/bold yellow blink]")
-                   break
-            
-            if explorador.vida <= 0: break
-            
-        elif comando in {"NORTE", "SUR", "ESTE", "OESTE"}:
-            if explorador.moverse(comando.upper()):
-                visualizador.print(f"Te has movido a la habitación {explorador.posicion_actual} en dirección {comando}.")
-            else:
-                visualizador.print("[bold red]No hay conexión[/bold red] en esa dirección.")
-        
+        if comando == "MAPA":
+            con_mapa = not con_mapa
         elif comando == "GUARDAR":
             try:
                 stats = "Información del mapa (simulado)"
                 with open("juego_guardado.txt", "w") as f:
                     f.write(f"Estado de Explorador - Vida: {explorador.vida}/{explorador.vida_max}, Posición: {explorador.posicion_actual}\n")
                     f.write(f"Estadísticas del Mapa: {stats}\n")
-                visualizador.print("[bold green]Juego guardado[/bold green] en 'juego_guardado.txt'.")
+                mensajes.append("Juego guardado en 'juego_guardado.txt'.")
             except Exception as e:
-                 visualizador.print(f"[bold red]Error al guardar:[/bold red] {e}")
+                 mensajes.append(f"Error al guardar: {e}")
+        elif ejecutar(explorador, comando, mensajes, pisos):
+            terminada = True
+
+        if minimapa.mapa is not explorador.mapa:
+            # Cambio de piso: minimapa y autoguardado pasan al mapa nuevo
+            minimapa.cerrar()
+            minimapa = crear_minimapa(explorador.mapa)
+            if diario is not None:
+                diario.cambiar_mapa(explorador.mapa)
 
+        if grabador is not None:
+            grabador.registrar(comando)
+        if terminada:
+            break
+
+        # Autoguardado: solo se anotan los cambios del turno en el diario
+        if diario is not None:
+            diario.registrar()
 
         turno += 1
     
-    if explorador.vida <= 0:
-        visualizador.print("\n[bold red]GAME OVER. Tu vida llegó a cero.[/bold red]")
+    pantalla.dibujar(armar_cuadro(explorador, minimapa, turno, mensajes, con_mapa))
 
 def main():
-    mapa_base, explorador_base = inicializar_juego()
-    mostrar_bienvenida(explorador_base)
-    mostrar_mapa(mapa_base, explorador_base)
-    simular_interaccion(explorador_base, console)
+    archivo_perfil = os.environ.get(VARIABLE_PERFIL)
+    if archivo_perfil:
+        instrumentacion.activar(memoria=os.environ.get(VARIABLE_PERFIL_MEMORIA) == "1")
+    try:
+        mapa_base, explorador_base = inicializar_juego()
+        diario = Diario(mapa_base, explorador_base, ARCHIVO_AUTOGUARDADO)
+        grabador = Grabador.para_partida(explorador_base, NUM_HABITACIONES, ARCHIVO_REPETICION, n_pisos=PISOS)
+        pisos = Pisos(mapa_base, NUM_HABITACIONES, PISOS)
+        try:
+            simular_interaccion(explorador_base, console, diario, crear_minimapa(mapa_base),
+                                grabador=grabador, pisos=pisos)
+        finally:
+            diario.registrar()  # el último turno puede terminar con 'break' antes del autoguardado
+            diario.cerrar()
+            grabador.cerrar()
+            pisos.cerrar()
+        informe = pisos.informe()
+        if informe["descensos"]:
+            console.print("Pisos: {descensos} descensos, latencia media {media_ms:.1f} ms, máxima {max_ms:.1f} ms, "
+                          "{esperas} esperas al generador.".format(**informe))
+    finally:
+        sesion = instrumentacion.desactivar()
+        if sesion is not None:
+            sesion.guardar(archivo_perfil)
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.mapa import generar_mapa
+
+DIRECCIONES = ("norte", "sur", "este", "oeste")
+
+
+def firma_contenido(contenido) -> tuple:
+    """Lo observable de un contenido: clase, descripción y argumentos del constructor."""
+    if contenido is None:
+        return None
+    parametros = {clave: (valor.nombre, valor.valor, valor.descripcion) if hasattr(valor, "valor") else valor
+                  for clave, valor in contenido.parametros().items()}
+    return type(contenido).__name__, contenido.descripcion, parametros
+
+
+def firma_mapa(mapa) -> dict:
+    """(x, y) -> id, conexiones, visitada, distancia, estado y contenido de cada habitación."""
+    return {
+        posicion: (hab.id, sorted(hab.conexiones), hab.visitada, hab.distancia_manhattan, hab.estado,
+                   firma_contenido(hab.contenido))
+        for posicion, hab in mapa.habitaciones.items()
+    }
+
+
+def firma_explorador(explorador) -> tuple:
+    return (explorador.vida, explorador.vida_max, tuple(explorador.posicion_actual), explorador.bonificacion_combate,
+            [(obj.nombre, obj.valor, obj.descripcion) for obj in explorador.inventario])
+
+
+def jugar(explorador: Explorador, turnos: int, semilla: int = 0):
+    """Recorre el mapa al azar resolviendo cada habitación, hasta morir o cumplir los turnos."""
+    elegir = random.Random(semilla)
+    for _ in range(turnos):
+        if not explorador.esta_vivo:
+            return
+        explorador.mover(elegir.choice(DIRECCIONES))
+        explorador.resolver_habitacion()
+
+
+@pytest.fixture(params=[False, True], ids=["dict", "compacto"])
+def partida(request):
+    """Mapa de 20x20 a medio jugar y su explorador, en modo dict y compacto."""
+    mapa = generar_mapa(20, 20, 120, semilla=7, compacto=request.param)
+    explorador = Explorador(mapa, vida=200, salida=None)
+    mapa.marcar_visitada(explorador.habitacion_actual)
+    jugar(explorador, 60)
+    return mapa, explorador
@@ -0,0 +1,98 @@
+import random
+
+from dungeon_generator.binario import ArchivoPartida, cargar_binario, cerrar_archivo, guardar_binario
+
+from conftest import firma_explorador, firma_mapa, jugar
+
+
+def test_ida_y_vuelta(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+
+    copia, explorador_copia = cargar_binario(archivo)
+
+    assert firma_mapa(copia) == firma_mapa(mapa)
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
+    assert copia.habitacion_inicial.coordenadas == mapa.habitacion_inicial.coordenadas
+    assert (copia.habitacion_jefe is None) == (mapa.habitacion_jefe is None)
+    assert copia.flujos.estado() == mapa.flujos.estado()
+
+
+def test_la_partida_cargada_sigue_igual(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+    copia, explorador_copia = cargar_binario(archivo)
+
+    jugar(explorador, 40, semilla=1)
+    jugar(explorador_copia, 40, semilla=1)
+
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
+    assert firma_mapa(copia) == firma_mapa(mapa)
+
+
+def test_cerrar_suelta_el_archivo_y_el_mapa_sigue_completo(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+    copia, _ = cargar_binario(archivo)
+
+    cerrar_archivo(copia)
+
+    assert copia.habitaciones._archivo.cerrado
+    assert firma_mapa(copia) == firma_mapa(mapa)
+    assert len(copia.habitaciones) == len(mapa.habitaciones)
+
+
+def test_archivo_partida_como_contexto(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+
+    with ArchivoPartida(archivo) as datos:
+        assert datos.n_registros == len(mapa.habitaciones)
+    assert datos.cerrado
+
+
+def test_guardar_no_deja_temporales(partida, tmp_path):
+    mapa, explorador = partida
+    for _ in range(3):
+        guardar_binario(mapa, explorador, str(tmp_path / "partida.dgn"))
+    assert [p.name for p in tmp_path.iterdir()] == ["partida.dgn"]
+
+
+def test_indices_desde_el_archivo_sin_materializar(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+    copia, _ = cargar_binario(archivo)
+    antes = copia.habitaciones.materializadas
+
+    assert copia.obtener_estadisticas_mapa() == mapa.obtener_estadisticas_mapa()
+    assert copia.posicion_aleatoria(random.Random(3)) == mapa.posicion_aleatoria(random.Random(3))
+    assert copia.habitaciones_con("monstruo") == mapa.habitaciones_con("monstruo")
+    assert copia.indice_espacial().cercanas(0, 0, "tesoro", k=3) == mapa.indice_espacial().cercanas(0, 0, "tesoro", k=3)
+    assert copia.habitaciones.materializadas == antes
+
+
+def test_indices_del_archivo_ven_lo_jugado_tras_cargar(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    guardar_binario(mapa, explorador, archivo)
+    copia, explorador_copia = cargar_binario(archivo)
+
+    # Las habitaciones ya materializadas cambian (visitas, contenido consumido) antes de armar los índices
+    jugar(explorador, 40, semilla=2)
+    jugar(explorador_copia, 40, semilla=2)
+
+    assert copia.obtener_estadisticas_mapa() == mapa.obtener_estadisticas_mapa()
+    for tipo in ("monstruo", "tesoro", "evento", "jefe"):
+        assert copia.habitaciones_con(tipo) == mapa.habitaciones_con(tipo)
+    ancho, alto = mapa.ancho, mapa.alto
+    for tipo in (None, "monstruo", "tesoro"):
+        assert (sorted(copia.indice_espacial().rectangulo(0, 0, ancho, alto, tipo))
+                == sorted(mapa.indice_espacial().rectangulo(0, 0, ancho, alto, tipo)))
+    for solo_visitadas in (False, True):
+        assert ([copia.posicion_aleatoria(random.Random(i), solo_visitadas) for i in range(20)]
+                == [mapa.posicion_aleatoria(random.Random(i), solo_visitadas) for i in range(20)])
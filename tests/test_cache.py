@@ -0,0 +1,88 @@
+import errno
+import os
+
+import pytest
+
+from dungeon_generator import cache as modulo_cache
+from dungeon_generator.cache import CacheMapas
+from dungeon_generator.mapa import generar_mapa
+
+from conftest import firma_mapa
+
+
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+def test_acierto_igual_a_fallo(tmp_path, compacto):
+    cache = CacheMapas(str(tmp_path))
+    fallo = cache.obtener(30, 30, 300, 5, compacto=compacto)
+    acierto = cache.obtener(30, 30, 300, 5, compacto=compacto)
+
+    assert (cache.fallos, cache.aciertos) == (1, 1)
+    assert acierto is not fallo
+    assert acierto.compacto == fallo.compacto == compacto
+    assert firma_mapa(acierto) == firma_mapa(fallo)
+    assert acierto.flujos.estado() == fallo.flujos.estado()
+    assert acierto.habitacion_jefe.coordenadas == fallo.habitacion_jefe.coordenadas
+    assert acierto.obtener_estadisticas_mapa() == fallo.obtener_estadisticas_mapa()
+    if compacto:
+        assert acierto.empaquetar()
+
+
+def test_acierto_igual_a_generar(tmp_path):
+    cache = CacheMapas(str(tmp_path))
+    cache.obtener(20, 20, 100, 9)
+    assert firma_mapa(cache.obtener(20, 20, 100, 9)) == firma_mapa(generar_mapa(20, 20, 100, 9))
+
+
+def test_sin_semilla_no_se_guarda(tmp_path):
+    cache = CacheMapas(str(tmp_path))
+    cache.obtener(10, 10, 30, None)
+    assert cache.estadisticas()["entradas"] == 0
+    assert (cache.aciertos, cache.fallos) == (0, 0)
+
+
+def test_desalojo_lru_por_tamano(tmp_path):
+    cache = CacheMapas(str(tmp_path))
+    claves = []
+    for semilla in range(3):
+        cache.obtener(10, 10, 30, semilla)
+        claves.append(cache.clave(10, 10, 30, semilla))
+    for i, clave in enumerate(claves):
+        os.utime(cache.ruta(clave), (1000 + i, 1000 + i))
+    tamano = os.path.getsize(cache.ruta(claves[0]))
+
+    # Un acierto renueva la entrada más vieja: la que se va es la siguiente
+    assert cache.cargar(claves[0]) is not None
+    cache.max_bytes = 2 * tamano + tamano // 2
+    assert cache.desalojar() == 1
+
+    assert not os.path.exists(cache.ruta(claves[1]))
+    assert os.path.exists(cache.ruta(claves[0])) and os.path.exists(cache.ruta(claves[2]))
+    estadisticas = cache.estadisticas()
+    assert estadisticas["desalojos"] == 1
+    assert estadisticas["entradas"] == 2
+
+
+def test_entrada_danada_se_descarta(tmp_path):
+    cache = CacheMapas(str(tmp_path))
+    clave = cache.clave(10, 10, 30, 1)
+    with open(cache.ruta(clave), "wb") as f:
+        f.write(b"basura que no es un .dgn" * 10)
+
+    assert cache.cargar(clave) is None
+    assert not os.path.exists(cache.ruta(clave))
+    assert cache.fallos == 1
+
+
+@pytest.mark.parametrize("codigo", [errno.EMFILE, errno.EACCES])
+def test_error_del_sistema_no_borra_la_entrada(tmp_path, monkeypatch, codigo):
+    cache = CacheMapas(str(tmp_path))
+    cache.obtener(10, 10, 30, 1)
+    clave = cache.clave(10, 10, 30, 1)
+
+    def falla(*args, **kwargs):
+        raise OSError(codigo, os.strerror(codigo))
+    monkeypatch.setattr(modulo_cache, "cargar_binario", falla)
+
+    assert cache.cargar(clave) is None
+    assert os.path.exists(cache.ruta(clave))
+    assert (cache.aciertos, cache.fallos) == (0, 2)
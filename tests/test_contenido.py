@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from dungeon_generator.contenido import Portal
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.mapa import generar_mapa
+
+from conftest import firma_contenido
+
+
+def _sorteo_hacia_contenido(mapa, origen):
+    """Una semilla cuyo primer sorteo de destino cae en otra habitación, con contenido y sin visitar."""
+    for semilla in range(1000):
+        destino = mapa.posicion_aleatoria(random.Random(semilla))
+        hab = mapa.habitaciones[destino]
+        if destino != origen and hab.contenido is not None and not hab.visitada:
+            return semilla, destino
+    pytest.fail("ningún sorteo cae en una habitación con contenido")
+
+
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+def test_portal_se_consume_en_su_habitacion_y_respeta_el_destino(compacto):
+    mapa = generar_mapa(20, 20, 120, semilla=7, compacto=compacto)
+    origen = mapa.habitacion_inicial
+    mapa.asignar_contenido(origen, Portal(mapa))
+    semilla, destino = _sorteo_hacia_contenido(mapa, origen.coordenadas)
+    contenido_destino = firma_contenido(mapa.habitaciones[destino].contenido)
+    portales = len(mapa.habitaciones_con("evento"))
+    explorador = Explorador(mapa, vida=10, salida=None, rng=random.Random(semilla))
+
+    assert explorador.resolver_habitacion()
+
+    assert explorador.posicion_actual == destino
+    # La habitación del portal queda vacía; la de destino conserva su contenido y queda visitada
+    assert mapa.habitaciones[origen.coordenadas].contenido is None
+    assert firma_contenido(mapa.habitaciones[destino].contenido) == contenido_destino
+    assert mapa.habitaciones[destino].visitada
+    assert len(mapa.habitaciones_con("evento")) == portales - 1
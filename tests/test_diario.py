@@ -0,0 +1,50 @@
+from dungeon_generator.diario import Diario, cargar_con_diario
+
+from conftest import DIRECCIONES, firma_explorador, firma_mapa
+
+
+def _jugar_con_diario(explorador, diario, turnos):
+    for turno in range(turnos):
+        explorador.mover(DIRECCIONES[turno * 7 % 4])
+        explorador.resolver_habitacion()
+        diario.registrar()
+
+
+def test_instantanea_mas_diario(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    diario = Diario(mapa, explorador, archivo)
+    _jugar_con_diario(explorador, diario, 50)
+    diario.cerrar()
+
+    copia, explorador_copia = cargar_con_diario(archivo)
+
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
+    assert firma_mapa(copia) == firma_mapa(mapa)
+
+
+def test_compactaciones_intermedias(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    diario = Diario(mapa, explorador, archivo, compactar_cada=8)
+    _jugar_con_diario(explorador, diario, 50)
+    diario.cerrar()
+
+    assert diario.compactaciones > 1
+    copia, explorador_copia = cargar_con_diario(archivo)
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
+    assert firma_mapa(copia) == firma_mapa(mapa)
+
+
+def test_registro_final_cortado(partida, tmp_path):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.dgn")
+    diario = Diario(mapa, explorador, archivo)
+    _jugar_con_diario(explorador, diario, 10)
+    diario.cerrar()
+    # Corte a mitad de escritura: el último registro queda incompleto y se ignora
+    with open(archivo + ".log", "ab") as f:
+        f.write(b"\x01\x08\x00\x05")
+
+    _, explorador_copia = cargar_con_diario(archivo)
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
@@ -0,0 +1,61 @@
+import pytest
+
+from dungeon_generator.contenido import Curacion, Jefe, Monstruo, Portal, Tesoro, Trampa
+from dungeon_generator.mapa import Mapa, generar_mapa
+from dungeon_generator.objeto import Objeto
+
+from conftest import firma_contenido, firma_mapa
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_ida_y_vuelta_conserva_el_contenido(semilla):
+    mapa = generar_mapa(20, 20, 120, semilla=semilla, compacto=True)
+    # La mitad del contenido queda materializado y la otra mitad como (plantilla, nivel)
+    for i, hab in enumerate(mapa.habitaciones.values()):
+        if i % 2:
+            hab.contenido
+
+    copia = Mapa.desempaquetar(mapa.empaquetar(), semilla)
+
+    assert firma_mapa(copia) == firma_mapa(mapa)
+    assert copia.obtener_estadisticas_mapa() == mapa.obtener_estadisticas_mapa()
+    assert copia.habitacion_inicial.coordenadas == mapa.habitacion_inicial.coordenadas
+    if mapa.habitacion_jefe is not None:
+        assert isinstance(copia.habitacion_jefe.contenido, Jefe)
+
+
+def test_contenido_asignado_a_mano_y_portales():
+    mapa = generar_mapa(12, 12, 40, semilla=3, compacto=True)
+    habitaciones = [hab for hab in mapa.habitaciones.values() if not hab.inicial]
+    asignados = [
+        Monstruo(vida=9, ataque=4, nombre="Troll"),
+        Jefe(vida=30, ataque=6, recompensa_especial=Objeto("Cetro", 900, "Un cetro.")),
+        Tesoro(Objeto("Anillo", 40, "Un anillo.")),
+        Trampa(dano=7),
+        Curacion(cura=3),
+        Portal(mapa),
+    ]
+    for hab, contenido in zip(habitaciones, asignados):
+        hab.contenido = contenido
+
+    copia = Mapa.desempaquetar(mapa.empaquetar())
+
+    for hab, contenido in zip(habitaciones, asignados):
+        assert firma_contenido(copia.habitaciones[hab.coordenadas].contenido) == firma_contenido(contenido)
+    portal = copia.habitaciones[habitaciones[5].coordenadas].contenido
+    assert portal.mapa is copia
+    # Los eventos estándar vuelven a ser las instancias compartidas del mapa
+    assert copia.habitaciones[habitaciones[4].coordenadas].contenido in copia._eventos
+
+
+def test_contenido_consumido_no_reaparece(partida):
+    mapa, _ = partida
+    if not mapa.compacto:
+        pytest.skip("solo los mapas compactos se empaquetan")
+    copia = Mapa.desempaquetar(mapa.empaquetar())
+    assert firma_mapa(copia) == firma_mapa(mapa)
+
+
+def test_mapa_en_modo_dict_no_se_empaqueta():
+    with pytest.raises(ValueError):
+        generar_mapa(10, 10, 20, semilla=1).empaquetar()
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from dungeon_generator.comandos import mensaje_estado
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.mapa import generar_mapa
+from dungeon_generator.mundo import MapaInfinito
+
+from conftest import jugar
+
+TIPOS = (None, "monstruo", "tesoro", "evento", "jefe")
+
+
+def _celdas(mapa, tipo):
+    """Fuerza bruta: todas las habitaciones (o las de contenido 'tipo') del mapa."""
+    return [posicion for posicion, hab in mapa.habitaciones.items()
+            if tipo is None or (hab.contenido is not None and hab.contenido.tipo == tipo)]
+
+
+def _cercanas(mapa, x, y, tipo, k):
+    return sorted(_celdas(mapa, tipo), key=lambda c: (abs(c[0] - x) + abs(c[1] - y), c[1], c[0]))[:k]
+
+
+def _consumir(mapa, rng, n):
+    con_contenido = [hab for hab in mapa.habitaciones.values() if hab.contenido is not None]
+    for hab in rng.sample(con_contenido, min(n, len(con_contenido))):
+        mapa.retirar_contenido(hab)
+
+
+def _comparar(mapa, rng, x0, y0, x1, y1):
+    indice = mapa.indice_espacial()
+    for _ in range(30):
+        tipo = rng.choice(TIPOS)
+        ax, bx = sorted(rng.randint(x0, x1) for _ in range(2))
+        ay, by = sorted(rng.randint(y0, y1) for _ in range(2))
+        esperado = [c for c in _celdas(mapa, tipo) if ax <= c[0] <= bx and ay <= c[1] <= by]
+        assert sorted(indice.rectangulo(ax, ay, bx, by, tipo)) == sorted(esperado)
+
+        x, y, r = rng.randint(x0, x1), rng.randint(y0, y1), rng.randint(0, 12)
+        esperado = [c for c in _celdas(mapa, tipo) if abs(c[0] - x) + abs(c[1] - y) <= r]
+        assert sorted(indice.radio(x, y, r, tipo)) == sorted(esperado)
+
+        k = rng.randint(1, 6)
+        assert indice.cercanas(x, y, tipo, k) == _cercanas(mapa, x, y, tipo, k)
+
+
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+def test_consultas_igual_a_fuerza_bruta(compacto):
+    mapa = generar_mapa(40, 40, 600, semilla=3, compacto=compacto)
+    rng = random.Random(1)
+    for _ in range(4):
+        _comparar(mapa, rng, -5, -5, 45, 45)
+        _consumir(mapa, rng, 25)
+
+
+def test_consultas_en_mapa_infinito_igual_a_fuerza_bruta():
+    mundo = MapaInfinito(semilla=2, tamano_chunk=8, max_chunks=12)
+    explorador = Explorador(mundo, vida=10 ** 6, salida=None)
+    rng = random.Random(2)
+    for turno in range(4):
+        jugar(explorador, 80, semilla=turno)
+        x, y = explorador.posicion_actual
+        _comparar(mundo, rng, x - 30, y - 30, x + 30, y + 30)
+        _consumir(mundo, rng, 10)
+
+
+def test_pista_de_estado_es_el_monstruo_mas_cercano(partida):
+    mapa, explorador = partida
+    x, y = explorador.posicion_actual
+    (mx, my), = _cercanas(mapa, x, y, "monstruo", 1)
+
+    assert mensaje_estado(explorador)[-1] == (
+        f"Pista: el monstruo más cercano está en {(mx, my)}, a {abs(mx - x) + abs(my - y)} casillas.")
@@ -0,0 +1,21 @@
+import pytest
+
+from dungeon_generator.lector_json import cargar_json_incremental
+from dungeon_generator.serializacion import guardar_partida
+
+from conftest import firma_explorador, firma_mapa
+
+
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+@pytest.mark.parametrize("tamano_bloque", [7, 1 << 16])
+def test_ida_y_vuelta(partida, tmp_path, compacto, tamano_bloque):
+    mapa, explorador = partida
+    archivo = str(tmp_path / "partida.json")
+    guardar_partida(mapa, explorador, archivo)
+
+    copia, explorador_copia = cargar_json_incremental(archivo, compacto=compacto, tamano_bloque=tamano_bloque)
+
+    assert firma_mapa(copia) == firma_mapa(mapa)
+    assert firma_explorador(explorador_copia) == firma_explorador(explorador)
+    assert copia.habitacion_inicial.coordenadas == mapa.habitacion_inicial.coordenadas
+    assert copia.flujos.estado() == mapa.flujos.estado()
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from dungeon_generator.explorador import Explorador
+
+from dungeon_generator.mapa import Mapa
+from dungeon_generator.mundo import MapaInfinito
+from dungeon_generator.rutas import Enrutador
+
+from conftest import jugar
+
+
+@pytest.fixture
+def mundo():
+    return MapaInfinito(semilla=1, tamano_chunk=16)
+
+
+def test_enrutador_explica_que_falta_el_tamano(mundo):
+    with pytest.raises(ValueError, match="no tiene límites"):
+        Enrutador(mundo)
+
+
+def test_no_hereda_las_operaciones_de_mapas_con_limites(mundo):
+    assert not isinstance(mundo, Mapa)
+    for nombre in ("generar_estructura", "colocar_contenido", "distancias_camino", "enrutador", "empaquetar"):
+        assert not hasattr(mundo, nombre)
+
+
+def _candidatas(mundo, solo_visitadas, excluir):
+    return {posicion for posicion, hab in mundo.habitaciones.items()
+            if posicion != excluir and (not solo_visitadas or hab.visitada)}
+
+
+@pytest.mark.parametrize("solo_visitadas", [False, True])
+def test_posicion_aleatoria_entre_trozos_cargados(solo_visitadas):
+    mundo = MapaInfinito(semilla=2, tamano_chunk=8, max_chunks=10)
+    explorador = Explorador(mundo, vida=10 ** 6, salida=None)
+    jugar(explorador, 400)
+    assert mundo.chunks_desalojados > 0
+    rng = random.Random(0)
+
+    excluir = explorador.posicion_actual
+    candidatas = _candidatas(mundo, solo_visitadas, excluir)
+    sorteadas = {mundo.posicion_aleatoria(rng, solo_visitadas, excluir) for _ in range(20 * len(candidatas))}
+
+    assert sorteadas == candidatas
+
+
+def test_posicion_aleatoria_sin_candidatas():
+    mundo = MapaInfinito(semilla=2, tamano_chunk=8)
+    assert mundo.posicion_aleatoria(random.Random(0), solo_visitadas=True) is None
+
+
+def test_vecina_coincide_con_conexiones_tambien_entre_trozos():
+    mundo = MapaInfinito(semilla=4, tamano_chunk=8)
+    for hab in list(mundo.habitaciones.values()):
+        for direccion in ("norte", "sur", "este", "oeste", "arriba"):
+            assert hab.vecina(direccion) == hab.conexiones.get(direccion)
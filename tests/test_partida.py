@@ -0,0 +1,34 @@
+import pytest
+
+from dungeon_generator.mapa import es_jugable, generar_mapa, generar_mapa_jugable
+from dungeon_generator.pisos import Pisos
+
+from main import ALTO_MAPA, ANCHO_MAPA, NUM_HABITACIONES, SEMILLA
+
+
+def test_la_semilla_por_defecto_es_jugable():
+    mapa = generar_mapa(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, SEMILLA)
+    assert mapa.habitacion_jefe is not None
+    assert len(mapa.habitaciones) == NUM_HABITACIONES
+
+
+@pytest.mark.parametrize("semilla", [27, 32, 42])
+def test_semillas_sin_salida_usan_una_de_respaldo(semilla):
+    assert not es_jugable(generar_mapa(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, semilla), NUM_HABITACIONES)
+
+    mapa = generar_mapa_jugable(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, semilla)
+
+    assert es_jugable(mapa, NUM_HABITACIONES)
+    # La semilla que quedó en el mapa lo regenera tal cual (así lo reproducen las grabaciones)
+    copia = generar_mapa(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, mapa.flujos.semilla)
+    assert list(copia.habitaciones) == list(mapa.habitaciones)
+
+
+def test_todos_los_pisos_tienen_jefe():
+    mapa = generar_mapa(ANCHO_MAPA, ALTO_MAPA, NUM_HABITACIONES, SEMILLA)
+    pisos = Pisos(mapa, NUM_HABITACIONES, n_pisos=8, segundo_plano=None)
+    try:
+        for n in range(2, 9):
+            assert pisos._generar(n).habitacion_jefe is not None
+    finally:
+        pisos.cerrar()
@@ -0,0 +1,54 @@
+import pytest
+
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.mapa import generar_mapa_jugable
+from dungeon_generator.pisos import Pisos
+
+from conftest import firma_mapa, jugar
+
+
+def _a_la_escalera(pisos, explorador):
+    """Lleva al explorador a la habitación del jefe y lo da por derrotado."""
+    jefe = pisos.mapa.habitacion_jefe
+    explorador.posicion_actual = jefe.coordenadas
+    pisos.mapa.marcar_visitada(jefe)
+    pisos.mapa.retirar_contenido(jefe)
+    assert pisos.escalera_abajo(explorador)
+
+
+@pytest.mark.parametrize("segundo_plano", [None, "hilo"])
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+def test_bajar_y_subir_conserva_los_pisos(tmp_path, segundo_plano, compacto):
+    mapa = generar_mapa_jugable(20, 20, 120, semilla=7, compacto=compacto)
+    explorador = Explorador(mapa, vida=10 ** 6, salida=None)
+    mapa.marcar_visitada(explorador.habitacion_actual)
+    pisos = Pisos(mapa, 120, n_pisos=3, compacto=compacto, directorio=str(tmp_path), segundo_plano=segundo_plano)
+    try:
+        jugar(explorador, 60, semilla=1)
+        _a_la_escalera(pisos, explorador)
+        piso_1 = firma_mapa(pisos.mapa)
+
+        pisos.bajar(explorador)
+        assert pisos.actual == 2 and explorador.mapa is pisos.mapa
+        assert explorador.posicion_actual == pisos.mapa.habitacion_inicial.coordenadas
+        assert pisos.mapa.habitacion_inicial.visitada
+        jugar(explorador, 60, semilla=2)
+        _a_la_escalera(pisos, explorador)
+        piso_2 = firma_mapa(pisos.mapa)
+
+        pisos.subir(explorador)
+        # Visitas y contenido consumido del piso 1 vuelven del .dgn tal cual se dejaron
+        assert pisos.actual == 1 and (tmp_path / "piso_1.dgn").exists()
+        assert firma_mapa(pisos.mapa) == piso_1
+        assert explorador.posicion_actual == pisos.mapa.habitacion_jefe.coordenadas
+        assert pisos.escalera_abajo(explorador)
+
+        pisos.bajar(explorador)
+        assert pisos.actual == 2
+        assert firma_mapa(pisos.mapa) == piso_2
+
+        informe = pisos.informe()
+        assert informe["descensos"] == 2
+        assert informe["max_ms"] >= informe["media_ms"] > 0
+    finally:
+        pisos.cerrar()
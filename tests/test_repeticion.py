@@ -0,0 +1,60 @@
+import pytest
+
+from dungeon_generator.comandos import COMANDOS
+from dungeon_generator.explorador import Explorador
+from dungeon_generator.mapa import generar_mapa
+from dungeon_generator.repeticion import Grabador, _aplicar, reproducir, reproducir_bytes
+
+_MOVIMIENTOS = [comando for comando in COMANDOS if comando not in ("SALIR", "BAJAR", "SUBIR")]
+
+
+def _grabar(archivo, semilla, turnos=80, compacto=False):
+    mapa = generar_mapa(12, 12, 40, semilla=semilla, compacto=compacto)
+    explorador = Explorador(mapa, vida=30, salida=None)
+    mapa.marcar_visitada(explorador.habitacion_actual)
+    grabador = Grabador.para_partida(explorador, 40, archivo, compacto=compacto)
+    for turno in range(turnos):
+        comando = _MOVIMIENTOS[(turno * 5 + semilla) % len(_MOVIMIENTOS)]
+        terminada = _aplicar(explorador, comando, None)
+        grabador.registrar(comando)
+        if terminada:
+            break
+    grabador.cerrar()
+    return grabador.turnos
+
+
+@pytest.mark.parametrize("compacto", [False, True], ids=["dict", "compacto"])
+@pytest.mark.parametrize("semilla", [1, 2, 3])
+def test_reproduccion_coincide(tmp_path, semilla, compacto):
+    archivo = str(tmp_path / "partida.dgr")
+    turnos = _grabar(archivo, semilla, compacto=compacto)
+
+    resultado = reproducir(archivo)
+
+    assert resultado.correcta, str(resultado)
+    assert resultado.turnos == turnos
+
+
+def test_suma_alterada_marca_el_turno(tmp_path):
+    archivo = str(tmp_path / "partida.dgr")
+    turnos = _grabar(archivo, 1)
+    with open(archivo, "rb") as f:
+        datos = bytearray(f.read())
+    # Última suma de control (los 4 bytes finales del último turno)
+    datos[-1] ^= 0xFF
+
+    resultado = reproducir_bytes(bytes(datos))
+
+    assert resultado.divergencia == turnos
+
+
+def test_turno_cortado_se_ignora(tmp_path):
+    archivo = str(tmp_path / "partida.dgr")
+    turnos = _grabar(archivo, 2)
+    with open(archivo, "rb") as f:
+        datos = f.read()
+
+    resultado = reproducir_bytes(datos[:-2])
+
+    assert resultado.correcta
+    assert resultado.turnos == turnos - 1
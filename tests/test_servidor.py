@@ -0,0 +1,43 @@
+import pytest
+
+from dungeon_generator.servidor import Servidor
+
+resource = pytest.importorskip("resource")
+
+
+@pytest.fixture
+def pocos_descriptores():
+    """Baja el límite de archivos abiertos del proceso mientras dura la prueba."""
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    limite = 128
+    resource.setrlimit(resource.RLIMIT_NOFILE, (limite, duro))
+    yield limite
+    resource.setrlimit(resource.RLIMIT_NOFILE, (blando, duro))
+
+
+def test_retomar_mas_partidas_que_descriptores(tmp_path, pocos_descriptores):
+    servidor = Servidor(str(tmp_path))
+    ids = []
+    for semilla in range(2 * pocos_descriptores):
+        respuesta, partida, _ = servidor.procesar(None, f"NUEVA {semilla}")
+        ids.append(respuesta[0])
+        servidor.procesar(partida, "SALIR")
+
+    for id in ids:
+        respuesta, partida, _ = servidor.procesar(None, f"RETOMAR {id}")
+        servidor.procesar(partida, "ESTADO")
+
+    assert servidor.cargas == len(ids)
+    assert all(partida.mapa is not None for partida in servidor.partidas.values())
+
+
+def test_partida_retomada_sigue_igual(tmp_path):
+    servidor = Servidor(str(tmp_path))
+    _, partida, _ = servidor.procesar(None, "NUEVA 43")
+    servidor.procesar(partida, "EXPLORAR")
+    antes = servidor.procesar(partida, "MAPA")[0]
+    servidor.procesar(partida, "SALIR")
+
+    _, partida, _ = servidor.procesar(None, f"RETOMAR {partida.id}")
+
+    assert servidor.procesar(partida, "MAPA")[0] == antes